@@ -0,0 +1,204 @@
+"""
+Script : bench_suite.py
+But : Banc d'essai de bout en bout sur des datasets synthétiques
+      (generer_donnees.py) : pour chaque échelle, chronométrer la purge des
+      doublons, les contrôles d'intégrité, l'import et chaque rapport.
+      Avec un mongod joignable, l'import et les rapports tournent dans une
+      base dédiée (supprimée à la fin) ; sinon, ou avec --local, ils sont
+      remplacés par leurs équivalents en processus : typage des lots sans
+      écriture et moteur analyse_locale.
+      Les mesures sont enregistrées en JSON ; --reference compare avec une
+      exécution précédente et sort en erreur au-delà de --seuil.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from check_doublons import traiter_doublons_par_blocs
+from check_integrity import profiler
+from generer_donnees import ECHELLES, GRAINE, generer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "script"))
+import analyse_locale  # noqa: E402
+from check_integrity_json import trouver_doublons_personnalises  # noqa: E402
+from indexes import creer_indexes  # noqa: E402
+from migration import MONGO_URI, charger, lire_par_lots, ouvrir_collection  # noqa: E402
+from rapports import RAPPORTS, executer_rapport  # noqa: E402
+
+# === CONFIGURATION ===
+BASE_BENCH = 'FirstTry_bench'  # Base jetable : FirstTry n'est jamais touchée
+DOSSIER_RESULTATS = "resultats_bench"
+SEUIL_REGRESSION = 0.20        # +20 % de temps sur une étape = régression
+ECART_MINIMAL = 0.005          # Écarts de moins de 5 ms ignorés (bruit de mesure)
+
+
+@contextlib.contextmanager
+def silencieux():
+    """Masque les impressions des étapes chronométrées."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def chronometrer(fonction, repetitions=1):
+    """(meilleure durée en secondes, résultat de la dernière exécution)."""
+    meilleure, resultat = float('inf'), None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleure = min(meilleure, time.perf_counter() - debut)
+    return meilleure, resultat
+
+
+def collection_bench(uri):
+    """Collection de la base de bench si un mongod répond, sinon None."""
+    if uri is None:
+        return None
+    try:
+        collection = ouvrir_collection(uri)
+        collection.database.client.admin.command('ping')
+    except Exception:
+        return None
+    return collection.database.client[BASE_BENCH][collection.name]
+
+
+def mesurer_echelle(lignes, dossier, collection, graine, repetitions):
+    """Chronomètre chaque étape sur un dataset de `lignes` lignes ; retourne {temps, verifications}."""
+    brut = os.path.join(dossier, f"brut_{lignes}.csv")
+    purge = os.path.join(dossier, f"purge_{lignes}.csv")
+    temps, verifications = {}, {}
+
+    temps['generation'], attendu = chronometrer(lambda: generer(brut, lignes, graine))
+
+    def purger():
+        df = pd.read_csv(brut)
+        with silencieux():
+            resultat = traiter_doublons_par_blocs(df)
+        resultat.to_csv(purge, index=False)
+        return len(resultat)
+    temps['check_doublons'], conservees = chronometrer(purger)
+    verifications['lignes_apres_purge'] = {'attendu': attendu['lignes_attendues_apres_purge'], 'obtenu': conservees}
+
+    temps['integrite_profil'], rapport = chronometrer(lambda: profiler(purge))
+    verifications['doublons_exacts'] = {'attendu': 0, 'obtenu': rapport['doublons_exacts']}
+    df_purge = pd.read_csv(purge)
+    temps['integrite_doublons'], (paires, _) = chronometrer(lambda: trouver_doublons_personnalises(df_purge))
+    verifications['paires_restantes'] = {'attendu': 0, 'obtenu': len(paires)}
+
+    if collection is not None:
+        collection.drop()
+
+        def importer():
+            stats = charger(collection, lire_par_lots(purge), maj_resumes=False)
+            creer_indexes(collection)
+            return stats['inseres']
+        temps['ingestion'], inseres = chronometrer(importer)
+        verifications['documents_importes'] = {'attendu': conservees, 'obtenu': inseres}
+        for nom in RAPPORTS:
+            temps[f'rapport:{nom}'] = min(executer_rapport(collection, nom)['latence'] for _ in range(repetitions))
+    else:
+        temps['ingestion'], documents = chronometrer(lambda: sum(len(lot) for lot in lire_par_lots(purge)))
+        verifications['documents_importes'] = {'attendu': conservees, 'obtenu': documents}
+        df_local = analyse_locale.charger(purge)
+        for nom in analyse_locale.RAPPORTS_LOCAUX:
+            temps[f'rapport:{nom}'] = min(analyse_locale.executer_local(df_local, nom)['latence']
+                                          for _ in range(repetitions))
+    return {'lignes': lignes, 'temps': temps, 'verifications': verifications}
+
+
+def environnement(mode, graine):
+    import pymongo
+    return {
+        'horodatage': datetime.now().isoformat(timespec='seconds'),
+        'mode': mode,
+        'graine': graine,
+        'machine': {'plateforme': platform.platform(), 'python': platform.python_version(),
+                    'processeurs': os.cpu_count()},
+        'versions': {'pandas': pd.__version__, 'numpy': np.__version__, 'pymongo': pymongo.version},
+    }
+
+
+def comparer(resultats, reference, seuil=SEUIL_REGRESSION):
+    """
+    Étapes plus lentes que la référence de plus de `seuil` (et d'au moins
+    ECART_MINIMAL) : [(échelle, étape, avant, après)]. Les deux exécutions
+    doivent avoir le même mode (mongodb / local).
+    """
+    if reference.get('mode') != resultats['mode']:
+        raise ValueError(f"référence en mode {reference.get('mode')}, exécution en mode {resultats['mode']}")
+    regressions = []
+    for echelle, mesures in resultats['echelles'].items():
+        avant = reference.get('echelles', {}).get(echelle, {}).get('temps', {})
+        for etape, duree in mesures['temps'].items():
+            if etape in avant and duree > avant[etape] * (1 + seuil) and duree - avant[etape] >= ECART_MINIMAL:
+                regressions.append((echelle, etape, avant[etape], duree))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de bout en bout sur données synthétiques.")
+    parser.add_argument("--echelles", nargs="+", default=['10k', '100k'], choices=list(ECHELLES))
+    parser.add_argument("--graine", type=int, default=GRAINE)
+    parser.add_argument("--repetitions", type=int, default=3, help="Exécutions par rapport (meilleur temps)")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--local", action="store_true", help="Ne pas utiliser MongoDB même s'il répond")
+    parser.add_argument("--sortie", help=f"Fichier JSON des résultats (défaut : {DOSSIER_RESULTATS}/bench-<date>.json)")
+    parser.add_argument("--reference", help="Résultats JSON précédents à comparer")
+    parser.add_argument("--seuil", type=float, default=SEUIL_REGRESSION, help="Ralentissement toléré (0.2 = +20 %%)")
+    args = parser.parse_args()
+
+    collection = None if args.local else collection_bench(args.uri)
+    mode = 'mongodb' if collection is not None else 'local'
+    resultats = {**environnement(mode, args.graine), 'echelles': {}}
+    print(f"=== ⏱️ Banc d'essai ({mode}) : {', '.join(args.echelles)} ===")
+
+    try:
+        with tempfile.TemporaryDirectory() as dossier:
+            for echelle in args.echelles:
+                mesures = mesurer_echelle(ECHELLES[echelle], dossier, collection, args.graine, args.repetitions)
+                resultats['echelles'][echelle] = mesures
+                print(f"\n📏 {echelle} ({mesures['lignes']} lignes)")
+                for etape, duree in mesures['temps'].items():
+                    print(f"   {etape:<42} {duree * 1000:>12.1f} ms")
+                for nom, v in mesures['verifications'].items():
+                    ok = v['attendu'] == v['obtenu']
+                    print(f"   {'✅' if ok else '❌'} {nom} : {v['obtenu']} (attendu {v['attendu']})")
+    finally:
+        if collection is not None:
+            collection.database.client.drop_database(BASE_BENCH)
+
+    sortie = args.sortie or os.path.join(
+        DOSSIER_RESULTATS, f"bench-{mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(sortie) or ".", exist_ok=True)
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Résultats enregistrés : {sortie}")
+
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = json.load(f)
+        try:
+            regressions = comparer(resultats, reference, args.seuil)
+        except ValueError as e:
+            print(f"❌ Comparaison impossible : {e}")
+            sys.exit(1)
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s) au-delà de +{args.seuil:.0%} :")
+            for echelle, etape, avant, apres in regressions:
+                print(f"   → {echelle} {etape} : {avant * 1000:.1f} ms → {apres * 1000:.1f} ms")
+            sys.exit(1)
+        print(f"\n✅ Aucune régression au-delà de +{args.seuil:.0%} par rapport à {args.reference}")
+
+
+if __name__ == "__main__":
+    main()
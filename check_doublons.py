@@ -3,6 +3,16 @@ Script : purge_healthcare_data_auto.py
 But : Détecter et traiter automatiquement les doublons du dataset santé.
       - Si Medical Condition ou Date of Admission diffèrent → suppression des deux lignes.
       - Sinon → fusion avec âge = moyenne arrondie à l'entier supérieur.
+      Le moteur par blocs (traiter_doublons_par_blocs) regroupe les lignes sur
+      les clés exactes normalisées et n'applique la fenêtre d'âge ±7 ans qu'à
+      l'intérieur de chaque bloc ; traiter_doublons reste l'implémentation de
+      référence en O(n²).
+      Chaque fusion / suppression est un événement du journal échantillonné
+      (instrumentation.JOURNAL) plutôt qu'une ligne imprimée ; la durée, le
+      débit et le pic mémoire de la purge sont mesurés (--metriques).
+      --memoire MO bascule sur la purge hors mémoire (dedup_externe.py) pour
+      les fichiers plus gros que la RAM ; --flou sur la purge floue
+      (dedup_flou.py), qui tolère fautes de frappe, titres et ponctuation.
 Auteur : GPT-5 (Assistant Python)
 """
 
@@ -10,18 +20,34 @@ import pandas as pd
 import numpy as np
 import math
 import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "script"))
+from formats import est_colonnaire  # noqa: E402
+import instrumentation  # noqa: E402
+from instrumentation import JOURNAL, METRIQUES  # noqa: E402
 
 FICHIER_ENTREE = "healthcare_dataset.csv"
 FICHIER_SORTIE = "healthcare_dataset_purge.csv"
 
+# Colonnes comparées à l'égalité stricte (après normalisation) pour former les blocs
+CLES_TEXTE = ["Name", "Gender", "Blood Type", "Doctor", "Hospital", "Date of Admission"]
+ECART_AGE_MAX = 7
+
 
 def charger_fichier(fichier):
-    """Charge le fichier CSV et retourne un DataFrame."""
+    """Charge le fichier CSV (ou .parquet / .arrow, déjà typé) et retourne un DataFrame."""
     if not os.path.exists(fichier):
         print(f"❌ Fichier introuvable : {fichier}")
         exit(1)
 
-    df = pd.read_csv(fichier)
+    if est_colonnaire(fichier):
+        from format_colonnes import lire_table  # pyarrow : fichiers en colonnes seulement
+        df = lire_table(fichier)
+    else:
+        df = pd.read_csv(fichier)
     print(f"✅ Fichier chargé : {fichier} ({len(df)} lignes)")
     return df
 
@@ -57,7 +83,7 @@ def sont_doublons(row1, row2):
             same_hospital, same_billing, same_admission, age_close
         ])
     except Exception as e:
-        print(f"⚠️ Erreur comparaison : {e}")
+        JOURNAL.evenement("erreur_comparaison", erreur=str(e))
         return False
 
 
@@ -70,7 +96,7 @@ def fusion_ou_suppression(row1, row2):
     admission_diff = normaliser_texte(row1["Date of Admission"]) != normaliser_texte(row2["Date of Admission"])
 
     if condition_diff or admission_diff:
-        print(f"🗑️ Suppression : {row1['Name']} (diagnostic ou date différents)")
+        JOURNAL.evenement("suppression", nom=row1["Name"], motif="diagnostic ou date différents")
         return None
 
     # Sinon fusionner
@@ -80,12 +106,20 @@ def fusion_ou_suppression(row1, row2):
 
     merged = row1.copy()
     merged["Age"] = int(age_moy)
-    print(f"🔗 Fusion : {row1['Name']} → Âge fusionné = {age_moy}")
+    JOURNAL.evenement("fusion", nom=row1["Name"], age=age_moy)
     return merged
 
 
 def traiter_doublons(df):
     """Traite automatiquement les doublons."""
+    with METRIQUES.etape("check_doublons", moteur="iterrows") as mesure:
+        resultat = _traiter_doublons(df)
+        mesure["lignes"] = len(df)
+        mesure["conservees"] = len(resultat)
+    return resultat
+
+
+def _traiter_doublons(df):
     processed_indices = set()
     result_rows = []
     doublon_compteur = 0
@@ -125,9 +159,172 @@ def traiter_doublons(df):
     return pd.DataFrame(result_rows)
 
 
+def normaliser_colonne(serie):
+    """Version vectorisée de normaliser_texte appliquée à une colonne entière."""
+    return serie.where(serie.notna(), "").astype(str).str.strip().str.lower()
+
+
+def cles_blocage(df):
+    """
+    Construit la clé de blocage de chaque ligne : colonnes texte normalisées
+    + Billing Amount arrondi au centime. Retourne (cles, ages) où les lignes
+    dont l'âge ou le montant ne sont pas numériques ont une clé manquante.
+    """
+    cles = pd.DataFrame({col: normaliser_colonne(df[col]) for col in CLES_TEXTE}, index=df.index)
+    billing = pd.to_numeric(df["Billing Amount"], errors="coerce")
+    ages = pd.to_numeric(df["Age"], errors="coerce")
+    cles["_billing_cents"] = billing.mul(100).round().astype("Int64")
+    invalides = billing.isna() | ages.isna()
+    cles.loc[invalides, "_billing_cents"] = pd.NA
+    return cles, ages
+
+
+def apparier_bloc(positions, ages):
+    """
+    Apparie les lignes d'un bloc dans l'ordre d'origine : chaque ligne libre est
+    associée à la première ligne suivante encore libre dont l'âge est à ±7 ans.
+    Retourne la liste des couples (position1, position2).
+    """
+    couples = []
+    libres = list(range(len(positions)))
+    while libres:
+        k = libres.pop(0)
+        for idx, m in enumerate(libres):
+            if abs(ages[k] - ages[m]) <= ECART_AGE_MAX:
+                couples.append((positions[k], positions[m]))
+                del libres[idx]
+                break
+    return couples
+
+
+def traiter_doublons_par_blocs(df):
+    """
+    Traite les doublons avec le moteur par blocs.
+    Les lignes sont hachées sur les clés exactes ; seuls les blocs d'au moins
+    deux lignes sont parcourus, avec la même règle fusion/suppression que
+    fusion_ou_suppression. Les groupes de plus de deux lignes sont appariés
+    deux à deux dans l'ordre du fichier ; contrairement à traiter_doublons,
+    une ligne déjà absorbée par une fusion n'est jamais réutilisée.
+    """
+    with METRIQUES.etape("check_doublons", moteur="blocs") as mesure:
+        resultat, compteurs = purger_par_blocs(df.reset_index(drop=True))
+        mesure["lignes"] = len(df)
+        mesure["conservees"] = len(resultat)
+        mesure.update(compteurs)
+
+    print("\n=== Résumé du traitement (moteur par blocs) ===")
+    print(f"🔎 Doublons détectés : {compteurs['doublons']}")
+    print(f"🔗 Fusions effectuées : {compteurs['fusions']}")
+    print(f"🗑️ Suppressions effectuées : {compteurs['suppressions']}")
+    print("===============================================\n")
+
+    return resultat
+
+
+def purger_par_blocs(df):
+    """
+    Moteur par blocs, sans affichage ni mesure, sur un index 0..n-1 ;
+    retourne (DataFrame purgé, compteurs). Sert aussi à chaque partition de
+    dedup_externe.py.
+    """
+    cles, ages = cles_blocage(df)
+    colonnes_cles = CLES_TEXTE + ["_billing_cents"]
+    valides = cles[cles["_billing_cents"].notna()]
+    candidats = valides[valides.duplicated(subset=colonnes_cles, keep=False)]
+
+    conditions = normaliser_colonne(df["Medical Condition"]).to_numpy()
+    ages_np = ages.to_numpy(dtype=float)
+    noms = df["Name"].to_numpy()
+
+    a_supprimer = []
+    ages_fusionnes = {}
+    doublon_compteur = 0
+    fusion_compteur = 0
+    suppression_compteur = 0
+
+    for positions in candidats.groupby(colonnes_cles, sort=False).indices.values():
+        positions = candidats.index.to_numpy()[np.sort(positions)]
+        for p1, p2 in apparier_bloc(positions, ages_np[positions]):
+            doublon_compteur += 1
+            if conditions[p1] != conditions[p2]:
+                suppression_compteur += 1
+                a_supprimer.extend([p1, p2])
+                JOURNAL.evenement("suppression", nom=noms[p1], lignes=[int(p1), int(p2)],
+                                  motif="diagnostic différent")
+            else:
+                fusion_compteur += 1
+                ages_fusionnes[p1] = int(math.ceil(np.mean([ages_np[p1], ages_np[p2]])))
+                a_supprimer.append(p2)
+                JOURNAL.evenement("fusion", nom=noms[p1], lignes=[int(p1), int(p2)],
+                                  age=ages_fusionnes[p1])
+
+    result = df.copy()
+    if ages_fusionnes:
+        result["Age"] = result["Age"].astype(object)
+        result.loc[list(ages_fusionnes), "Age"] = list(ages_fusionnes.values())
+    result = result.drop(index=a_supprimer)
+    return result, {"doublons": doublon_compteur, "fusions": fusion_compteur,
+                    "suppressions": suppression_compteur}
+
+
+def comparer_moteurs(df):
+    """Chronomètre l'ancien parcours O(n²) et le moteur par blocs sur le même DataFrame."""
+    df = df.reset_index(drop=True)
+
+    debut = time.perf_counter()
+    ancien = traiter_doublons(df)
+    duree_ancien = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    nouveau = traiter_doublons_par_blocs(df)
+    duree_nouveau = time.perf_counter() - debut
+
+    print("=== ⏱️ Comparaison des moteurs de déduplication ===")
+    print(f"Ancien parcours (iterrows) : {duree_ancien:.3f} s → {len(ancien)} lignes")
+    print(f"Moteur par blocs           : {duree_nouveau:.3f} s → {len(nouveau)} lignes")
+    if duree_nouveau > 0:
+        print(f"Accélération : x{duree_ancien / duree_nouveau:.1f}")
+    return {"ancien": duree_ancien, "blocs": duree_nouveau}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Purge des doublons du dataset santé.")
+    parser.add_argument("--entree", default=FICHIER_ENTREE, help="Fichier source (CSV, .parquet ou .arrow)")
+    parser.add_argument("--sortie", default=FICHIER_SORTIE, help="Fichier purgé (CSV, .parquet ou .arrow)")
+    parser.add_argument("--ancien", action="store_true",
+                        help="Utiliser l'ancien parcours O(n²) au lieu du moteur par blocs")
+    parser.add_argument("--comparer", action="store_true",
+                        help="Chronométrer l'ancien parcours et le moteur par blocs, sans écrire de fichier")
+    parser.add_argument("--memoire", type=int, metavar="MO",
+                        help="Purge hors mémoire dans ce budget (Mo) : voir dedup_externe.py")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Partitions purgées (--memoire) ou lots de paires scorés (--flou) en parallèle")
+    parser.add_argument("--flou", action="store_true",
+                        help="Purge floue : fautes de frappe, titres, ponctuation (voir dedup_flou.py)")
+    # Import local : dedup_flou réutilise les fonctions de ce module
+    from dedup_flou import ajouter_options
+    ajouter_options(parser)
+    instrumentation.ajouter_options(parser)
+    return parser.parse_args()
+
+
 def main():
-    print("=== 🏥 Nettoyage automatique du fichier healthcare_dataset.csv ===\n")
-    df = charger_fichier(FICHIER_ENTREE)
+    args = parse_args()
+    instrumentation.configurer(args)
+    print(f"=== 🏥 Nettoyage automatique du fichier {args.entree} ===\n")
+
+    if args.memoire:
+        if est_colonnaire(args.sortie):
+            print("❌ La purge hors mémoire écrit un CSV : choisir une sortie .csv")
+            sys.exit(1)
+        # Import local : dedup_externe réutilise le moteur par blocs de ce module
+        from dedup_externe import afficher, purger_hors_memoire
+        stats = purger_hors_memoire(args.entree, args.sortie, args.memoire, args.workers)
+        afficher(stats)
+        print(f"✅ Fichier final enregistré : {args.sortie}")
+        print(f"→ {stats['conservees']} lignes conservées sur {stats['lignes']} initiales.")
+        return
+    df = charger_fichier(args.entree)
 
     # Vérification colonnes nécessaires
     colonnes_requises = [
@@ -137,16 +334,32 @@ def main():
     manquantes = [c for c in colonnes_requises if c not in df.columns]
     if manquantes:
         print(f"❌ Colonnes manquantes : {manquantes}")
-        exit(1)
-
-    df_result = traiter_doublons(df)
+        sys.exit(1)
+
+    if args.comparer:
+        comparer_moteurs(df)
+        return
+
+    if args.flou:
+        from dedup_flou import afficher, purger_flou
+        with METRIQUES.etape("check_doublons", moteur="flou") as mesure:
+            df_result, stats = purger_flou(df, args.seuil_nom, args.seuil_score, args.fenetre, args.workers)
+            mesure.update(lignes=len(df), **{k: v for k, v in stats.items() if k not in ("lignes", "durees")})
+        afficher(stats)
+    elif args.ancien:
+        df_result = traiter_doublons(df)
+    else:
+        df_result = traiter_doublons_par_blocs(df)
 
     # Sauvegarde du résultat final
-    df_result.to_csv(FICHIER_SORTIE, index=False)
-    print(f"✅ Fichier final enregistré : {FICHIER_SORTIE}")
+    if est_colonnaire(args.sortie):
+        from format_colonnes import ecrire_table
+        ecrire_table(df_result, args.sortie)
+    else:
+        df_result.to_csv(args.sortie, index=False)
+    print(f"✅ Fichier final enregistré : {args.sortie}")
     print(f"→ {len(df_result)} lignes conservées sur {len(df)} initiales.")
     print("\n👋 Programme terminé avec succès.")
 
-
 if __name__ == "__main__":
     main()
@@ -1,6 +1,9 @@
 """
 Script : check_integrity.py
 But : Vérifier l'intégrité d'un fichier de données avant migration vers MongoDB
+      Par défaut le fichier est profilé en une seule passe par morceaux
+      (profiler) et le rapport est produit en JSON ; --detaille relance les
+      vérifications historiques qui chargent tout le fichier en mémoire.
 Auteur : GPT-5 (Assistant Python)
 """
 
@@ -8,9 +11,14 @@ import pandas as pd
 import numpy as np
 import os
 import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "script"))
+from formats import est_colonnaire  # noqa: E402
 
 # === CONFIGURATION ===
-FICHIER = "healthcare_dataset_purge.csv"  # Nom du fichier à tester (CSV ou XLSX)
+FICHIER = "healthcare_dataset_purge.csv"  # Nom du fichier à tester (CSV, XLSX, Parquet ou Arrow)
 # csv_file_path = '../data/healthcare_dataset_purge.csv'
 
 def charger_fichier(fichier):
@@ -24,8 +32,11 @@ def charger_fichier(fichier):
             df = pd.read_csv(fichier)
         elif fichier.endswith((".xls", ".xlsx")):
             df = pd.read_excel(fichier)
+        elif est_colonnaire(fichier):
+            from format_colonnes import lire_table  # pyarrow : fichiers en colonnes seulement
+            df = lire_table(fichier)
         else:
-            print("❌ Format non supporté. Utilise un fichier CSV ou Excel.")
+            print("❌ Format non supporté. Utilise un fichier CSV, Excel, Parquet ou Arrow.")
             sys.exit(1)
     except Exception as e:
         print(f"❌ Erreur lors du chargement du fichier : {e}")
@@ -94,11 +105,185 @@ def generer_recommandations(df):
     """)
 
 
+# === Profilage en une passe, par morceaux ===
+TAILLE_CHUNK = 100_000
+KMV_K = 4096  # Nombre de hachages conservés par colonne pour estimer la cardinalité
+MOTIF_ENTIER = r"[+-]?\d+"
+MOTIF_DECIMAL = r"[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?"
+MOTIF_DATE = r"\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?"
+TYPES = ["vide", "entier", "decimal", "date", "texte"]
+
+
+def lire_par_chunks(fichier, taille_chunk=TAILLE_CHUNK):
+    """Produit des DataFrames de taille bornée, toutes valeurs lues en texte."""
+    if fichier.endswith(".csv"):
+        yield from pd.read_csv(fichier, dtype=str, chunksize=taille_chunk)
+    elif est_colonnaire(fichier):
+        # Colonnes déjà typées : ramenées au texte pour un profil comparable à celui du CSV
+        from format_colonnes import lire_par_tranches, vers_texte
+        for tranche in lire_par_tranches(fichier, taille_chunk):
+            texte = vers_texte(tranche)
+            yield texte.mask(texte == "")
+    elif fichier.endswith((".xls", ".xlsx")):
+        # Excel ne se lit pas en flux : découpage après chargement
+        df = pd.read_excel(fichier, dtype=str)
+        for debut in range(0, len(df), taille_chunk):
+            yield df.iloc[debut:debut + taille_chunk]
+    else:
+        raise ValueError("Format non supporté. Utilise un fichier CSV, Excel, Parquet ou Arrow.")
+
+
+def _classer(valeurs):
+    """Classe chaque cellule non vide d'une colonne texte : entier, decimal, date ou texte."""
+    valeurs = valeurs.str.strip()
+    entier = valeurs.str.fullmatch(MOTIF_ENTIER)
+    decimal = ~entier & valeurs.str.fullmatch(MOTIF_DECIMAL)
+    date = ~entier & ~decimal & valeurs.str.fullmatch(MOTIF_DATE)
+    texte = ~(entier | decimal | date)
+    return {"entier": entier, "decimal": decimal, "date": date, "texte": texte}
+
+
+class ProfilColonne:
+    """Accumulateurs bornés d'une colonne : nuls, histogramme des types, min/max, cardinalité."""
+
+    def __init__(self):
+        self.types = dict.fromkeys(TYPES, 0)
+        self.min_num = self.max_num = None
+        self.min_txt = self.max_txt = None
+        self.hachages = np.empty(0, dtype=np.uint64)
+
+    def ajouter(self, serie):
+        nuls = serie.isna()
+        self.types["vide"] += int(nuls.sum())
+        valeurs = serie[~nuls]
+        if valeurs.empty:
+            return
+        classes = _classer(valeurs)
+        for nom, masque in classes.items():
+            self.types[nom] += int(masque.sum())
+
+        numeriques = pd.to_numeric(valeurs[classes["entier"] | classes["decimal"]], errors="coerce").dropna()
+        if not numeriques.empty:
+            self.min_num = numeriques.min() if self.min_num is None else min(self.min_num, numeriques.min())
+            self.max_num = numeriques.max() if self.max_num is None else max(self.max_num, numeriques.max())
+        autres = valeurs[classes["date"] | classes["texte"]]
+        if not autres.empty:
+            self.min_txt = autres.min() if self.min_txt is None else min(self.min_txt, autres.min())
+            self.max_txt = autres.max() if self.max_txt is None else max(self.max_txt, autres.max())
+
+        # K plus petits hachages distincts (estimateur KMV) : mémoire fixe par colonne
+        hachages = pd.util.hash_array(valeurs.to_numpy(dtype=object))
+        self.hachages = np.unique(np.concatenate([self.hachages, hachages]))[:KMV_K]
+
+    def cardinalite(self):
+        """Retourne (cardinalité, exacte?)."""
+        if len(self.hachages) < KMV_K:
+            return len(self.hachages), True
+        kieme = float(self.hachages[-1]) / float(np.iinfo(np.uint64).max)
+        return int((KMV_K - 1) / kieme), False
+
+    def rapport(self):
+        non_vides = {t: n for t, n in self.types.items() if t != "vide" and n}
+        dominant = max(non_vides, key=non_vides.get) if non_vides else None
+        if dominant in ("entier", "decimal"):
+            mini, maxi = self.min_num, self.max_num
+        else:
+            mini, maxi = self.min_txt, self.max_txt
+        cardinalite, exacte = self.cardinalite()
+        return {
+            "valeurs_manquantes": self.types["vide"],
+            "types": self.types,
+            "type_dominant": dominant,
+            "types_mixtes": len(non_vides) > 1,
+            "min": _scalaire(mini),
+            "max": _scalaire(maxi),
+            "cardinalite": cardinalite,
+            "cardinalite_exacte": exacte,
+        }
+
+
+def _scalaire(valeur):
+    """Convertit les scalaires numpy en types JSON natifs."""
+    return valeur.item() if isinstance(valeur, np.generic) else valeur
+
+
+def profiler(fichier, taille_chunk=TAILLE_CHUNK):
+    """
+    Profile le fichier en une seule passe par morceaux de taille_chunk lignes.
+    La mémoire dépend de la taille d'un morceau, du nombre de colonnes et de
+    8 octets par ligne pour le hachage des lignes (détection des doublons
+    exacts), pas du volume des données. Retourne un dict sérialisable en JSON.
+    """
+    return profiler_chunks(lire_par_chunks(fichier, taille_chunk), fichier)
+
+
+def profiler_chunks(chunks, source):
+    """Profile un flux de DataFrames texte (cellules manquantes à NaN) ; voir profiler."""
+    colonnes = None
+    profils = {}
+    hachages_lignes = []
+    nb_lignes = 0
+
+    for chunk in chunks:
+        if colonnes is None:
+            colonnes = list(chunk.columns)
+            profils = {col: ProfilColonne() for col in colonnes}
+        nb_lignes += len(chunk)
+        for col in colonnes:
+            profils[col].ajouter(chunk[col])
+        hachages_lignes.append(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+
+    hachages = np.concatenate(hachages_lignes) if hachages_lignes else np.empty(0, dtype=np.uint64)
+    hachages_lignes.clear()
+    doublons = int(len(hachages) - len(np.unique(hachages)))
+
+    colonnes = colonnes or []
+    rapports = {col: profils[col].rapport() for col in colonnes}
+    return {
+        "fichier": source,
+        "lignes": nb_lignes,
+        "colonnes": len(colonnes),
+        "valeurs_manquantes": sum(r["valeurs_manquantes"] for r in rapports.values()),
+        "doublons_exacts": doublons,
+        "colonnes_types_mixtes": [col for col, r in rapports.items() if r["types_mixtes"]],
+        "profil_colonnes": rapports,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Test d'intégrité des données avant migration MongoDB.")
+    parser.add_argument("fichier", nargs="?", default=FICHIER, help="Fichier CSV, Excel, Parquet ou Arrow à tester")
+    parser.add_argument("--chunk", type=int, default=TAILLE_CHUNK, help="Lignes lues par morceau")
+    parser.add_argument("--sortie", help="Écrire le rapport JSON dans ce fichier plutôt que sur la sortie standard")
+    parser.add_argument("--detaille", action="store_true",
+                        help="Vérifications historiques (chargement complet en mémoire, sortie texte)")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    if not os.path.exists(args.fichier):
+        print(f"❌ Erreur : Le fichier '{args.fichier}' est introuvable.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.detaille:
+        verifier_en_memoire(args.fichier)
+        return
+
+    rapport = profiler(args.fichier, args.chunk)
+    texte = json.dumps(rapport, ensure_ascii=False, indent=2, default=str)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte)
+    else:
+        print(texte)
+
+
+def verifier_en_memoire(fichier):
     print("=== 🧾 Test d'intégrité des données avant migration MongoDB ===")
 
-    df = charger_fichier(FICHIER)
-    print(f"\n✅ Fichier chargé avec succès : {FICHIER}")
+    df = charger_fichier(fichier)
+    print(f"\n✅ Fichier chargé avec succès : {fichier}")
     print(f"→ {df.shape[0]} lignes, {df.shape[1]} colonnes")
 
     verifier_colonnes(df)
@@ -109,6 +294,5 @@ def main():
 
     print("\n🎯 Vérification terminée !")
 
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,217 @@
+"""
+Script : dedup_externe.py
+But : Purge des doublons hors mémoire, pour les exports plus gros que la RAM.
+      1. Partitionnement : le fichier est lu par tranches et chaque ligne est
+         écrite sur disque dans la partition donnée par le hachage de sa clé
+         exacte normalisée (check_doublons.cles_blocage). Toutes les lignes
+         d'un même bloc tombent donc dans la même partition.
+      2. Purge : chaque partition est chargée seule et purgée par le moteur
+         par blocs (règle ±7 ans, fusion / suppression), dans un pool de
+         processus.
+      3. Fusion : les partitions purgées sont relues en flux et fusionnées
+         sur le numéro de ligne d'origine (tri externe) : le fichier produit
+         a le même ordre que la purge en mémoire.
+      Le nombre de partitions et la taille des tranches sont déduits du
+      budget mémoire de travail (--memoire, en Mo, en plus des ~100 Mo de
+      l'interpréteur avec pandas), partagé entre les workers. Un bloc
+      ne pouvant pas être coupé, une partition peut dépasser son budget si
+      une même clé est très fréquente : elle est signalée.
+      Entrées : CSV, JSON une ligne par document, .parquet / .arrow.
+      Sortie : CSV. Les valeurs sont recopiées en texte, sans retypage.
+
+Utilisation : python check_doublons.py --entree export.csv --memoire 512 --workers 4
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from check_doublons import CLES_TEXTE, FICHIER_ENTREE, FICHIER_SORTIE, cles_blocage, purger_par_blocs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "script"))
+from formats import est_colonnaire  # noqa: E402
+from instrumentation import METRIQUES  # noqa: E402
+
+# === CONFIGURATION ===
+MEMOIRE = 512            # Budget mémoire par défaut (Mo), tous workers confondus
+FACTEUR_MEMOIRE = 8      # Octets en mémoire (DataFrame texte, clés, copie purgée) par octet de CSV
+FACTEUR_LECTURE = 16     # Idem pour une tranche en cours de partitionnement (hachage, groupes, écriture)
+RATIO_COLONNES = 10      # Taille texte estimée d'un fichier .parquet / .arrow (compressé) par octet
+PARTITIONS_MAX = 4096
+COLONNE_LIGNE = "_ligne"  # Numéro de ligne d'origine, clé de la fusion finale
+
+
+def taille_texte(chemin):
+    """Taille estimée du fichier sous forme de texte, en octets."""
+    taille = os.path.getsize(chemin)
+    return taille * RATIO_COLONNES if est_colonnaire(chemin) else taille
+
+
+def octets_par_ligne(chemin, echantillon=1024 * 1024):
+    """Taille moyenne d'une ligne, estimée sur le début du fichier."""
+    if est_colonnaire(chemin):
+        return 200
+    with open(chemin, "rb") as f:
+        debut = f.read(echantillon)
+    return max(1, len(debut) // max(1, debut.count(b"\n")))
+
+
+def planifier(chemin, memoire, workers):
+    """
+    (partitions, lignes par tranche) pour que chaque worker tienne dans
+    memoire / workers Mo pendant la purge, et la lecture dans memoire Mo.
+    """
+    budget = memoire * 1024 * 1024
+    partitions = math.ceil(taille_texte(chemin) * FACTEUR_MEMOIRE * workers / budget)
+    lignes = budget // (FACTEUR_LECTURE * octets_par_ligne(chemin))
+    return min(max(1, partitions), PARTITIONS_MAX), max(1000, int(lignes))
+
+
+def lire_tranches(chemin, lignes):
+    """Tranches texte (toutes colonnes en chaînes, vides à '') du fichier d'entrée."""
+    if est_colonnaire(chemin):
+        from format_colonnes import lire_par_tranches, vers_texte  # pyarrow : fichiers en colonnes seulement
+        for tranche in lire_par_tranches(chemin, lignes):
+            yield vers_texte(tranche)
+    elif chemin.lower().endswith((".json", ".jsonl")):
+        from format_colonnes import vers_texte
+        for tranche in pd.read_json(chemin, lines=True, chunksize=lignes, dtype=False):
+            yield vers_texte(tranche)
+    else:
+        yield from pd.read_csv(chemin, dtype=str, keep_default_na=False, chunksize=lignes)
+
+
+def partitionner(chemin, dossier, partitions, lignes):
+    """
+    Répartit les lignes dans `partitions` fichiers CSV selon le hachage de la
+    clé exacte. Retourne (colonnes, chemins des partitions, lignes lues).
+    """
+    chemins = [os.path.join(dossier, f"partition_{i:04d}.csv") for i in range(partitions)]
+    colonnes, total = None, 0
+    for tranche in lire_tranches(chemin, lignes):
+        if colonnes is None:
+            colonnes = list(tranche.columns)
+        tranche = tranche.reset_index(drop=True)
+        cles, _ = cles_blocage(tranche)
+        numeros = pd.util.hash_pandas_object(cles[CLES_TEXTE + ["_billing_cents"]], index=False) % partitions
+        tranche.insert(0, COLONNE_LIGNE, range(total, total + len(tranche)))
+        for numero, groupe in tranche.groupby(numeros.to_numpy(), sort=False):
+            destination = chemins[numero]
+            groupe.to_csv(destination, mode="a", header=not os.path.exists(destination), index=False)
+        total += len(tranche)
+    return colonnes, [c for c in chemins if os.path.exists(c)], total
+
+
+def purger_partition(entree, sortie):
+    """Purge une partition (dans un processus du pool) ; retourne ses compteurs."""
+    # Les tranches sont écrites dans l'ordre : la partition est déjà triée sur le numéro de ligne
+    df = pd.read_csv(entree, dtype=str, keep_default_na=False)
+    resultat, compteurs = purger_par_blocs(df)
+    resultat.to_csv(sortie, index=False)
+    os.remove(entree)
+    return {**compteurs, "lignes": len(df), "conservees": len(resultat), "octets": os.path.getsize(sortie)}
+
+
+def _lignes_partition(chemin):
+    with open(chemin, newline="", encoding="utf-8") as f:
+        lecteur = csv.reader(f)
+        next(lecteur)
+        for ligne in lecteur:
+            yield int(ligne[0]), ligne[1:]
+
+
+def fusionner(chemins, colonnes, sortie, conserver_ordre=True):
+    """
+    Écrit les partitions purgées dans `sortie` en flux : fusion k-voies sur
+    le numéro de ligne d'origine, ou simple concaténation sans conserver_ordre.
+    """
+    flux = [_lignes_partition(c) for c in chemins]
+    lignes = heapq.merge(*flux, key=lambda l: l[0]) if conserver_ordre else itertools.chain(*flux)
+    with open(sortie, "w", newline="", encoding="utf-8") as f:
+        ecrivain = csv.writer(f, lineterminator="\n")
+        ecrivain.writerow(colonnes)
+        ecrivain.writerows(valeurs for _, valeurs in lignes)
+
+
+def purger_hors_memoire(entree, sortie, memoire=MEMOIRE, workers=1, dossier=None, conserver_ordre=True):
+    """
+    Purge `entree` vers `sortie` (CSV) sans charger le fichier entier.
+    Retourne les compteurs globaux (doublons, fusions, suppressions, lignes,
+    conservées, partitions) et les durées de chaque phase.
+    """
+    partitions, lignes_tranche = planifier(entree, memoire, workers)
+    budget_partition = memoire * 1024 * 1024 / workers / FACTEUR_MEMOIRE
+    temporaire = tempfile.mkdtemp(prefix="dedup_", dir=dossier)
+    stats = {"doublons": 0, "fusions": 0, "suppressions": 0, "lignes": 0, "conservees": 0,
+             "partitions": partitions, "lignes_par_tranche": lignes_tranche, "partitions_hors_budget": 0}
+    durees = {}
+    try:
+        with METRIQUES.etape("check_doublons", moteur="externe") as mesure:
+            debut = time.perf_counter()
+            colonnes, chemins, stats["lignes"] = partitionner(entree, temporaire, partitions, lignes_tranche)
+            durees["partitionnement"] = time.perf_counter() - debut
+            if colonnes is None:
+                raise ValueError(f"fichier vide : {entree}")
+
+            debut = time.perf_counter()
+            purges = [c.replace(".csv", "_purge.csv") for c in chemins]
+            stats["partitions_hors_budget"] = sum(os.path.getsize(c) > budget_partition for c in chemins)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for compteurs in pool.map(purger_partition, chemins, purges):
+                    for cle in ("doublons", "fusions", "suppressions", "conservees"):
+                        stats[cle] += compteurs[cle]
+            durees["purge"] = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            fusionner(purges, colonnes, sortie, conserver_ordre)
+            durees["fusion"] = time.perf_counter() - debut
+            mesure.update(lignes=stats["lignes"], **{k: v for k, v in stats.items() if k != "lignes"},
+                          **{f"duree_{k}": v for k, v in durees.items()})
+    finally:
+        shutil.rmtree(temporaire, ignore_errors=True)
+    return {**stats, "durees": durees}
+
+
+def afficher(stats):
+    print("\n=== Résumé du traitement (hors mémoire) ===")
+    print(f"🧩 Partitions : {stats['partitions']} ({stats['lignes_par_tranche']} lignes lues par tranche)")
+    if stats["partitions_hors_budget"]:
+        print(f"⚠️ {stats['partitions_hors_budget']} partition(s) au-delà du budget (clés très fréquentes)")
+    print(f"🔎 Doublons détectés : {stats['doublons']}")
+    print(f"🔗 Fusions effectuées : {stats['fusions']}")
+    print(f"🗑️ Suppressions effectuées : {stats['suppressions']}")
+    for phase, duree in stats["durees"].items():
+        print(f"⏱️ {phase:<16} {duree:>8.2f} s")
+    print("===========================================\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge des doublons hors mémoire (fichiers plus gros que la RAM).")
+    parser.add_argument("--entree", default=FICHIER_ENTREE, help="CSV, JSON lines, .parquet ou .arrow")
+    parser.add_argument("--sortie", default=FICHIER_SORTIE, help="CSV purgé")
+    parser.add_argument("--memoire", type=int, default=MEMOIRE, help="Budget mémoire total (Mo)")
+    parser.add_argument("--workers", type=int, default=1, help="Partitions purgées en parallèle")
+    parser.add_argument("--dossier", help="Dossier des partitions temporaires (défaut : dossier temporaire)")
+    parser.add_argument("--sans-ordre", action="store_true",
+                        help="Ne pas rétablir l'ordre d'origine (concaténation des partitions)")
+    args = parser.parse_args()
+
+    stats = purger_hors_memoire(args.entree, args.sortie, args.memoire, args.workers, args.dossier,
+                                not args.sans_ordre)
+    afficher(stats)
+    print(f"✅ Fichier final enregistré : {args.sortie}")
+    print(f"→ {stats['conservees']} lignes conservées sur {stats['lignes']} initiales.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Script : dedup_flou.py
+But : Purge floue des doublons : "Dr. Watson" / "Dr Watson" ou une faute de
+      frappe dans Name ne cachent plus un doublon.
+      1. Normalisation floue (casse, accents, ponctuation, titres) de Name,
+         Doctor et Hospital, calculée une fois par valeur distincte.
+      2. Blocage, sans comparaison O(n²) :
+         - blocs phonétiques : Soundex de chaque mot de Name + Date of
+           Admission, toutes les paires du bloc ;
+         - voisinage trié : lignes triées par (Date of Admission, Hospital
+           normalisé, Name normalisé), chaque ligne comparée aux FENETRE - 1
+           suivantes de la même date.
+      3. Filtres exacts vectorisés sur les paires candidates : Gender, Blood
+         Type, Billing Amount au centime, Date of Admission, âge à ±7 ans.
+      4. Score : similarité de Dice sur les bigrammes de Name, Doctor et
+         Hospital, calculée par jointures pandas (vectorisée) dans un pool
+         de processus. Une paire est retenue si Name atteint --seuil-nom et
+         la moyenne pondérée --seuil-score.
+      5. Règle de check_doublons.py : appariement dans l'ordre du fichier,
+         suppression des deux lignes si Medical Condition diffère, sinon
+         fusion (âge moyen arrondi au supérieur).
+      Les ratios de réduction (paires naïves → candidates → filtrées →
+      retenues) sont affichés pour suivre le coût de chaque étape.
+"""
+
+import argparse
+import math
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from check_doublons import ECART_AGE_MAX, FICHIER_ENTREE, FICHIER_SORTIE, charger_fichier, normaliser_colonne
+
+# === CONFIGURATION ===
+SEUIL_NOM = 0.70          # Similarité minimale de Name (une transposition dans un nom court : ~0.75)
+SEUIL_SCORE = 0.80        # Similarité moyenne pondérée minimale
+POIDS = {"Name": 0.6, "Doctor": 0.2, "Hospital": 0.2}
+FENETRE = 10              # Taille de la fenêtre du voisinage trié
+TAILLE_BLOC_MAX = 200     # Au-delà, un bloc phonétique n'est parcouru que par le voisinage trié
+TAILLE_LOT_PAIRES = 100_000
+TITRES = {"dr", "mr", "mrs", "ms", "miss", "prof", "jr", "sr", "md", "phd"}
+CODES_SOUNDEX = {**dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+                 "l": "4", **dict.fromkeys("mn", "5"), "r": "6"}
+
+
+# === Normalisation et phonétique ===
+def normaliser_flou(valeur):
+    """'Dr. Émile  WATSON' → 'emile watson' : casse, accents, ponctuation et titres retirés."""
+    if not isinstance(valeur, str):
+        return ""
+    texte = unicodedata.normalize("NFKD", valeur).encode("ascii", "ignore").decode("ascii").lower()
+    mots = re.sub(r"[^a-z0-9 ]+", " ", texte).split()
+    return " ".join(mot for mot in mots if mot not in TITRES)
+
+
+def soundex(mot):
+    """Code Soundex américain ('robert' → 'R163')."""
+    if not mot:
+        return ""
+    code, precedent = mot[0].upper(), CODES_SOUNDEX.get(mot[0], "")
+    for lettre in mot[1:]:
+        chiffre = CODES_SOUNDEX.get(lettre, "")
+        if chiffre and chiffre != precedent:
+            code += chiffre
+        if lettre not in "hw":
+            precedent = chiffre
+    return (code + "000")[:4]
+
+
+def _par_valeur(serie, fonction):
+    """Applique `fonction` une seule fois par valeur distincte."""
+    codes, valeurs = pd.factorize(serie, use_na_sentinel=False)
+    return pd.Series(np.array([fonction(v) for v in valeurs], dtype=object)[codes], index=serie.index)
+
+
+def preparer(df):
+    """
+    Colonnes de travail : champs normalisés, code phonétique, âge et montant
+    numériques. Les champs comparés à l'égalité ou triés sont aussi codés en
+    entiers (suffixe _code, dans l'ordre alphabétique) pour des comparaisons
+    vectorisées rapides.
+    """
+    travail = pd.DataFrame(index=df.index)
+    for champ in POIDS:
+        travail[champ] = _par_valeur(df[champ], normaliser_flou)
+    travail["phonetique"] = _par_valeur(travail["Name"], lambda nom: " ".join(soundex(m) for m in nom.split()))
+    for champ in ("Gender", "Blood Type", "Date of Admission"):
+        travail[champ] = normaliser_colonne(df[champ])
+    for champ in ("Name", "Hospital", "phonetique", "Gender", "Blood Type", "Date of Admission"):
+        travail[f"{champ}_code"] = pd.factorize(travail[champ], sort=True)[0]
+    travail["age"] = pd.to_numeric(df["Age"], errors="coerce")
+    travail["centimes"] = pd.to_numeric(df["Billing Amount"], errors="coerce").mul(100).round()
+    return travail
+
+
+# === Blocage ===
+def paires_blocs(travail, taille_max=TAILLE_BLOC_MAX):
+    """Toutes les paires (i < j) des blocs (phonétique de Name, date d'admission) de taille raisonnable."""
+    groupes = travail.groupby(["phonetique_code", "Date of Admission_code"], sort=False).ngroup().to_numpy()
+    ordre = np.argsort(groupes, kind="stable")
+    tailles = np.bincount(groupes)
+    debuts = np.concatenate([[0], np.cumsum(tailles)[:-1]])
+    gauches, droites = [], []
+    # Tous les blocs d'une même taille d'un coup : une matrice (blocs × taille) de positions
+    for taille in np.unique(tailles[(tailles >= 2) & (tailles <= taille_max)]):
+        positions = ordre[debuts[tailles == taille][:, None] + np.arange(taille)]
+        i, j = np.triu_indices(taille, k=1)
+        gauches.append(positions[:, i].ravel())
+        droites.append(positions[:, j].ravel())
+    if not gauches:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(gauches), np.concatenate(droites)
+
+
+def paires_voisinage(travail, fenetre=FENETRE):
+    """Paires des lignes distantes de moins de `fenetre` dans l'ordre (date, hôpital, nom), même date."""
+    ordre = np.lexsort((travail["Name_code"].to_numpy(), travail["Hospital_code"].to_numpy(),
+                        travail["Date of Admission_code"].to_numpy()))
+    dates = travail["Date of Admission_code"].to_numpy()[ordre]
+    gauches, droites = [], []
+    for decalage in range(1, fenetre):
+        meme_date = dates[:-decalage] == dates[decalage:]
+        gauches.append(ordre[:-decalage][meme_date])
+        droites.append(ordre[decalage:][meme_date])
+    if not gauches:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(gauches), np.concatenate(droites)
+
+
+def candidats(travail, fenetre=FENETRE):
+    """Union dédoublonnée des paires des deux blocages, (i < j) en positions ; et le détail par blocage."""
+    blocs = paires_blocs(travail)
+    voisinage = paires_voisinage(travail, fenetre)
+    i = np.concatenate([blocs[0], voisinage[0]])
+    j = np.concatenate([blocs[1], voisinage[1]])
+    n = len(travail)
+    paires = np.sort(np.minimum(i, j).astype(np.int64) * n + np.maximum(i, j))  # Une clé entière par paire
+    if len(paires):
+        paires = paires[np.concatenate([[True], paires[1:] != paires[:-1]])]
+    return paires // n, paires % n, {"blocs_phonetiques": len(blocs[0]), "voisinage_trie": len(voisinage[0])}
+
+
+def filtrer(travail, i, j):
+    """Garde les paires qui respectent les critères exacts de la règle (genre, groupe, montant, date, âge)."""
+    garde = np.ones(len(i), dtype=bool)
+    for champ in ("Gender", "Blood Type", "Date of Admission"):
+        valeurs = travail[f"{champ}_code"].to_numpy()
+        garde &= valeurs[i] == valeurs[j]
+    centimes = travail["centimes"].to_numpy()
+    ages = travail["age"].to_numpy()
+    garde &= centimes[i] == centimes[j]
+    garde &= np.abs(ages[i] - ages[j]) <= ECART_AGE_MAX
+    return i[garde], j[garde]
+
+
+# === Similarité ===
+def _bigrammes(valeurs):
+    """(identifiant de valeur, bigramme, nombre) et nombre total de bigrammes par valeur."""
+    lignes = []
+    for k, valeur in enumerate(valeurs):
+        texte = f" {valeur} "
+        lignes.extend((k, texte[p:p + 2]) for p in range(len(texte) - 1))
+    grammes = pd.DataFrame(lignes, columns=["id", "gramme"]).groupby(["id", "gramme"]).size()
+    return grammes.rename("n").reset_index(), np.array([len(valeur) + 1 for valeur in valeurs])
+
+
+def similarite_dice(a, b):
+    """
+    Similarité de Dice sur les bigrammes (multiensembles) de a[k] et b[k],
+    vectorisée : une jointure sur les bigrammes partagés par paire.
+    """
+    a, b = np.asarray(a, dtype=object), np.asarray(b, dtype=object)
+    scores = (a == b).astype(float)
+    differents = np.flatnonzero(a != b)
+    if len(differents) == 0:
+        return scores
+    codes, valeurs = pd.factorize(np.concatenate([a[differents], b[differents]]))
+    ids_a, ids_b = codes[:len(differents)], codes[len(differents):]
+    grammes, totaux = _bigrammes(valeurs)
+    paires = pd.DataFrame({"paire": np.arange(len(differents)), "id_a": ids_a, "id_b": ids_b})
+    communs = (paires.merge(grammes.rename(columns={"id": "id_a", "n": "n_a"}), on="id_a")
+               .merge(grammes.rename(columns={"id": "id_b", "n": "n_b"}), on=["id_b", "gramme"]))
+    intersection = (np.minimum(communs["n_a"], communs["n_b"]).groupby(communs["paire"]).sum()
+                    .reindex(range(len(differents)), fill_value=0).to_numpy())
+    scores[differents] = 2 * intersection / (totaux[ids_a] + totaux[ids_b])
+    return scores
+
+
+def scorer_lot(champs_a, champs_b):
+    """Similarités par champ d'un lot de paires (exécuté dans un processus du pool)."""
+    return {champ: similarite_dice(champs_a[champ], champs_b[champ]) for champ in champs_a}
+
+
+def scorer(travail, i, j, workers=1, taille_lot=TAILLE_LOT_PAIRES):
+    """Similarité de chaque champ de POIDS pour les paires (i, j), lot par lot dans un pool de processus."""
+    valeurs = {champ: travail[champ].to_numpy() for champ in POIDS}
+    lots = [(debut, min(debut + taille_lot, len(i))) for debut in range(0, len(i), taille_lot)]
+    arguments_a = [{c: v[i[d:f]] for c, v in valeurs.items()} for d, f in lots]
+    arguments_b = [{c: v[j[d:f]] for c, v in valeurs.items()} for d, f in lots]
+    if workers > 1 and len(lots) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultats = list(pool.map(scorer_lot, arguments_a, arguments_b))
+    else:
+        resultats = [scorer_lot(a, b) for a, b in zip(arguments_a, arguments_b)]
+    return {champ: np.concatenate([r[champ] for r in resultats]) if resultats else np.empty(0)
+            for champ in POIDS}
+
+
+# === Purge ===
+def apparier(i, j):
+    """Paires retenues appariées dans l'ordre du fichier : chaque ligne sert au plus une fois."""
+    utilisees, couples = set(), []
+    for p1, p2 in sorted(zip(i.tolist(), j.tolist())):
+        if p1 not in utilisees and p2 not in utilisees:
+            couples.append((p1, p2))
+            utilisees.update((p1, p2))
+    return couples
+
+
+def purger_flou(df, seuil_nom=SEUIL_NOM, seuil_score=SEUIL_SCORE, fenetre=FENETRE, workers=1):
+    """
+    Purge floue de `df`. Retourne (DataFrame purgé, statistiques) ; les
+    statistiques comprennent le nombre de paires à chaque étape, les ratios
+    de réduction et la durée de chaque phase.
+    """
+    df = df.reset_index(drop=True)
+    durees, debut = {}, time.perf_counter()
+    travail = preparer(df)
+    durees["normalisation"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    i, j, par_blocage = candidats(travail, fenetre)
+    durees["blocage"] = time.perf_counter() - debut
+    nb_candidats = len(i)
+
+    debut = time.perf_counter()
+    i, j = filtrer(travail, i, j)
+    durees["filtres"] = time.perf_counter() - debut
+    nb_filtrees = len(i)
+
+    debut = time.perf_counter()
+    similarites = scorer(travail, i, j, workers)
+    score = sum(POIDS[champ] * similarites[champ] for champ in POIDS) / sum(POIDS.values())
+    retenues = (similarites["Name"] >= seuil_nom) & (score >= seuil_score)
+    durees["score"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    conditions = normaliser_colonne(df["Medical Condition"]).to_numpy()
+    textes = [normaliser_colonne(df[champ]).to_numpy() for champ in POIDS]
+    ages = travail["age"].to_numpy()
+    a_supprimer, ages_fusionnes = [], {}
+    exactes = 0
+    for p1, p2 in apparier(i[retenues], j[retenues]):
+        exactes += all(valeurs[p1] == valeurs[p2] for valeurs in textes)  # Doublon que la purge exacte voit aussi
+        if conditions[p1] != conditions[p2]:
+            a_supprimer.extend([p1, p2])
+        else:
+            ages_fusionnes[p1] = int(math.ceil(np.mean([ages[p1], ages[p2]])))
+            a_supprimer.append(p2)
+    resultat = df.copy()
+    if ages_fusionnes:
+        resultat["Age"] = resultat["Age"].astype(object)
+        resultat.loc[list(ages_fusionnes), "Age"] = list(ages_fusionnes.values())
+    resultat = resultat.drop(index=a_supprimer)
+    durees["purge"] = time.perf_counter() - debut
+
+    naives = len(df) * (len(df) - 1) // 2
+    doublons = len(ages_fusionnes) + (len(a_supprimer) - len(ages_fusionnes)) // 2
+    stats = {
+        "lignes": len(df), "conservees": len(resultat),
+        "paires_naives": naives, "paires_candidates": nb_candidats, **par_blocage,
+        "paires_filtrees": nb_filtrees, "paires_retenues": int(retenues.sum()),
+        "reduction_blocage": 1 - nb_candidats / naives if naives else 0.0,
+        "reduction_filtres": 1 - nb_filtrees / nb_candidats if nb_candidats else 0.0,
+        "doublons": doublons, "fusions": len(ages_fusionnes), "suppressions": doublons - len(ages_fusionnes),
+        "doublons_flous": doublons - exactes, "durees": durees,
+    }
+    return resultat, stats
+
+
+def afficher(stats):
+    print("\n=== Résumé du traitement (purge floue) ===")
+    print(f"🧮 Paires naïves               : {stats['paires_naives']:>16,}")
+    print(f"🧱 Paires candidates (blocage) : {stats['paires_candidates']:>16,}  "
+          f"(-{stats['reduction_blocage']:.6%} ; phonétique {stats['blocs_phonetiques']:,}, "
+          f"voisinage {stats['voisinage_trie']:,})")
+    print(f"🔬 Après filtres exacts        : {stats['paires_filtrees']:>16,}  (-{stats['reduction_filtres']:.1%})")
+    print(f"🎯 Retenues (seuils)           : {stats['paires_retenues']:>16,}")
+    print(f"🔎 Doublons détectés : {stats['doublons']} (dont {stats['doublons_flous']} non exacts)")
+    print(f"🔗 Fusions effectuées : {stats['fusions']}")
+    print(f"🗑️ Suppressions effectuées : {stats['suppressions']}")
+    for phase, duree in stats["durees"].items():
+        print(f"⏱️ {phase:<14} {duree:>8.2f} s")
+    print("==========================================\n")
+
+
+def ajouter_options(parser):
+    """Seuils et parallélisme de la purge floue (partagés avec check_doublons.py --flou)."""
+    parser.add_argument("--seuil-nom", type=float, default=SEUIL_NOM, help="Similarité minimale de Name (0-1)")
+    parser.add_argument("--seuil-score", type=float, default=SEUIL_SCORE,
+                        help="Similarité moyenne pondérée minimale de Name, Doctor, Hospital (0-1)")
+    parser.add_argument("--fenetre", type=int, default=FENETRE, help="Fenêtre du voisinage trié")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge floue des doublons (blocage phonétique et voisinage trié).")
+    parser.add_argument("--entree", default=FICHIER_ENTREE)
+    parser.add_argument("--sortie", default=FICHIER_SORTIE)
+    parser.add_argument("--workers", type=int, default=1, help="Processus de calcul des similarités")
+    ajouter_options(parser)
+    args = parser.parse_args()
+
+    df = charger_fichier(args.entree)
+    resultat, stats = purger_flou(df, args.seuil_nom, args.seuil_score, args.fenetre, args.workers)
+    afficher(stats)
+    resultat.to_csv(args.sortie, index=False)
+    print(f"✅ Fichier final enregistré : {args.sortie}")
+    print(f"→ {len(resultat)} lignes conservées sur {len(df)} initiales.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Script : generer_donnees.py
+But : Générer un dataset santé synthétique reproductible (graine fixe) avec
+      les 15 colonnes de healthcare_dataset.csv
+      (data/schema-FirstTry-medic2-standardJSON.json), de 10k à 10M lignes.
+      Des doublons sont injectés à un taux donné selon la règle de
+      check_doublons.py : même Name (casse modifiée), Gender, Blood Type,
+      Doctor, Hospital, Billing Amount et Date of Admission, âge à ±7 ans.
+      Une part des doublons change de Medical Condition (cas de suppression
+      des deux lignes), les autres sont des cas de fusion.
+      Avec --taux-fautes, une part des doublons reçoit en plus une faute de
+      frappe dans Name ou un titre dans Doctor ("Dr. ") : seule la purge
+      floue (dedup_flou.py) peut les retrouver.
+      Les lignes sont générées et écrites par lots : la mémoire ne dépend pas
+      de la taille demandée.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+FICHIER_SORTIE = "healthcare_dataset.csv"
+GRAINE = 42
+TAUX_DOUBLONS = 0.05      # Part des lignes produites qui sont des doublons injectés
+TAUX_SUPPRESSION = 0.3    # Part des doublons dont la Medical Condition diffère
+TAUX_FAUTES = 0.0         # Part des doublons altérés (faute de frappe / titre) : invisibles à la purge exacte
+TAILLE_LOT = 200_000
+ECHELLES = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000, '10M': 10_000_000}
+
+COLONNES = [
+    "Name", "Age", "Gender", "Blood Type", "Medical Condition", "Date of Admission", "Doctor",
+    "Hospital", "Insurance Provider", "Billing Amount", "Room Number", "Admission Type",
+    "Discharge Date", "Medication", "Test Results",
+]
+
+PRENOMS = np.array([
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Christopher", "Lisa", "Daniel", "Nancy", "Matthew", "Betty", "Anthony", "Sandra", "Mark", "Margaret",
+    "Donald", "Ashley", "Steven", "Kimberly", "Andrew", "Emily", "Paul", "Donna", "Joshua", "Michelle",
+])
+NOMS = np.array([
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+    "Walker", "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
+])
+SUFFIXES_HOPITAL = np.array(["and Sons", "LLC", "Ltd", "Group", "PLC", "Inc", "and Partners", "Hospital"])
+GENRES = np.array(["Male", "Female"])
+GROUPES_SANGUINS = np.array(["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"])
+CONDITIONS = np.array(["Cancer", "Obesity", "Diabetes", "Asthma", "Hypertension", "Arthritis"])
+ASSURANCES = np.array(["Aetna", "Blue Cross", "Cigna", "UnitedHealthcare", "Medicare"])
+ADMISSIONS = np.array(["Urgent", "Emergency", "Elective"])
+MEDICAMENTS = np.array(["Paracetamol", "Ibuprofen", "Aspirin", "Penicillin", "Lipitor"])
+RESULTATS = np.array(["Normal", "Abnormal", "Inconclusive"])
+DEBUT_ADMISSIONS = np.datetime64("2019-05-08")
+JOURS_ADMISSIONS = 5 * 365
+
+
+def _casse_aleatoire(noms, rng):
+    """Casse perturbée lettre par lettre ('Bobby JacksOn'), comme dans le dataset d'origine."""
+    return np.array(["".join(c.upper() if h else c.lower() for c, h in zip(nom, rng.random(len(nom)) < 0.5))
+                     for nom in noms], dtype=object)
+
+
+def generer_lignes(n, rng, nb_hopitaux=5000, nb_medecins=20000):
+    """`n` lignes originales (sans doublon volontaire), en DataFrame texte."""
+    prenoms = rng.choice(PRENOMS, n)
+    noms = rng.choice(NOMS, n)
+    medecins = (pd.Series(rng.choice(PRENOMS, nb_medecins)) + " " + rng.choice(NOMS, nb_medecins)).to_numpy()
+    hopitaux = (pd.Series(rng.choice(NOMS, nb_hopitaux)) + " "
+                + rng.choice(SUFFIXES_HOPITAL, nb_hopitaux)).to_numpy()
+    admission = DEBUT_ADMISSIONS + rng.integers(0, JOURS_ADMISSIONS, n).astype("timedelta64[D]")
+    sortie = admission + rng.integers(1, 31, n).astype("timedelta64[D]")
+    return pd.DataFrame({
+        "Name": pd.Series(prenoms) + " " + noms,
+        "Age": rng.integers(13, 90, n),
+        "Gender": rng.choice(GENRES, n),
+        "Blood Type": rng.choice(GROUPES_SANGUINS, n),
+        "Medical Condition": rng.choice(CONDITIONS, n),
+        "Date of Admission": np.datetime_as_string(admission, unit="D"),
+        "Doctor": rng.choice(medecins, n),
+        "Hospital": rng.choice(hopitaux, n),
+        "Insurance Provider": rng.choice(ASSURANCES, n),
+        "Billing Amount": np.round(rng.uniform(1000, 50000, n), 2),
+        "Room Number": rng.integers(101, 501, n),
+        "Admission Type": rng.choice(ADMISSIONS, n),
+        "Discharge Date": np.datetime_as_string(sortie, unit="D"),
+        "Medication": rng.choice(MEDICAMENTS, n),
+        "Test Results": rng.choice(RESULTATS, n),
+    }, columns=COLONNES)
+
+
+def _faute_de_frappe(texte, rng):
+    """Une substitution, suppression ou transposition de lettre, hors première lettre."""
+    if len(texte) < 4:
+        return texte
+    i = int(rng.integers(1, len(texte) - 1))
+    operation = rng.integers(0, 3)
+    if operation == 0:
+        return texte[:i] + chr(ord('a') + int(rng.integers(0, 26))) + texte[i + 1:]
+    if operation == 1:
+        return texte[:i] + texte[i + 1:]
+    return texte[:i] + texte[i + 1] + texte[i] + texte[i + 2:]
+
+
+def alterer(copies, taux_fautes, rng):
+    """
+    Altère une part `taux_fautes` des copies (faute dans Name ou titre dans
+    Doctor). Retourne le masque des copies altérées.
+    """
+    alterees = rng.random(len(copies)) < taux_fautes
+    cibles = np.flatnonzero(alterees)
+    dans_nom = rng.random(len(cibles)) < 0.5
+    noms = copies["Name"].to_numpy().copy()
+    medecins = copies["Doctor"].to_numpy().copy()
+    for k, nom in zip(cibles, dans_nom):
+        if nom:
+            altere = _faute_de_frappe(noms[k], rng)
+            # Lettre remplacée par elle-même ou transposition de deux lettres identiques : doublon exact
+            alterees[k] = altere.lower() != noms[k].lower()
+            noms[k] = altere
+        else:
+            medecins[k] = "Dr. " + medecins[k]
+    copies["Name"], copies["Doctor"] = noms, medecins
+    return alterees
+
+
+def injecter_doublons(df, nb, taux_suppression, rng, taux_fautes=0.0):
+    """
+    Ajoute `nb` doublons de lignes distinctes (une ligne n'est dupliquée
+    qu'une fois) et mélange le lot. Retourne (lot, fusions attendues,
+    suppressions attendues, fusions altérées, suppressions altérées) : les
+    deux derniers sont les doublons que seule une purge floue retrouve.
+    """
+    nb = min(nb, len(df))
+    if nb == 0:
+        return df, 0, 0, 0, 0
+    sources = rng.choice(len(df), nb, replace=False)
+    copies = df.iloc[sources].copy()
+    copies["Name"] = _casse_aleatoire(copies["Name"].to_numpy(), rng)
+    copies["Age"] = np.clip(copies["Age"].to_numpy() + rng.integers(-7, 8, nb), 0, None)
+    suppressions = rng.random(nb) < taux_suppression
+    decalage = rng.integers(1, len(CONDITIONS), nb)  # décalage non nul : toujours une autre condition
+    rangs = copies["Medical Condition"].map({c: i for i, c in enumerate(CONDITIONS)}).to_numpy()
+    copies.loc[suppressions, "Medical Condition"] = CONDITIONS[(rangs + decalage) % len(CONDITIONS)][suppressions]
+    # Sans altération, aucun tirage supplémentaire : les fichiers restent identiques à graine égale
+    alterees = alterer(copies, taux_fautes, rng) if taux_fautes > 0 else np.zeros(nb, dtype=bool)
+    lot = pd.concat([df, copies], ignore_index=True)
+    lot = lot.iloc[rng.permutation(len(lot))].reset_index(drop=True)
+    return (lot, int((~suppressions).sum()), int(suppressions.sum()),
+            int((~suppressions & alterees).sum()), int((suppressions & alterees).sum()))
+
+
+def generer(sortie, lignes, graine=GRAINE, taux_doublons=TAUX_DOUBLONS, taux_suppression=TAUX_SUPPRESSION,
+            taille_lot=TAILLE_LOT, taux_fautes=TAUX_FAUTES):
+    """
+    Écrit `lignes` lignes (doublons compris) dans `sortie` et retourne les
+    compteurs attendus : lignes, doublons, fusions, suppressions, doublons
+    altérés, et les lignes qu'une purge exacte puis une purge floue doivent
+    conserver.
+    """
+    rng = np.random.default_rng(graine)
+    stats = {"lignes": 0, "doublons": 0, "fusions": 0, "suppressions": 0,
+             "fusions_alterees": 0, "suppressions_alterees": 0}
+    premier = True
+    while stats["lignes"] < lignes:
+        taille = min(taille_lot, lignes - stats["lignes"])
+        doublons = min(int(round(taille * taux_doublons)), taille // 2)
+        lot, fusions, suppressions, fusions_alterees, suppressions_alterees = injecter_doublons(
+            generer_lignes(taille - doublons, rng), doublons, taux_suppression, rng, taux_fautes)
+        lot.to_csv(sortie, mode="w" if premier else "a", header=premier, index=False)
+        premier = False
+        stats["lignes"] += len(lot)
+        stats["fusions"] += fusions
+        stats["suppressions"] += suppressions
+        stats["doublons"] += fusions + suppressions
+        stats["fusions_alterees"] += fusions_alterees
+        stats["suppressions_alterees"] += suppressions_alterees
+    stats["lignes_attendues_apres_purge"] = (stats["lignes"] - (stats["fusions"] - stats["fusions_alterees"])
+                                             - 2 * (stats["suppressions"] - stats["suppressions_alterees"]))
+    stats["lignes_attendues_apres_purge_floue"] = stats["lignes"] - stats["fusions"] - 2 * stats["suppressions"]
+    return stats
+
+
+def _echelle(valeur):
+    return ECHELLES.get(valeur) or int(valeur)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générateur de dataset santé synthétique.")
+    parser.add_argument("--lignes", type=_echelle, default=ECHELLES['100k'],
+                        help=f"Nombre de lignes ou échelle ({', '.join(ECHELLES)})")
+    parser.add_argument("--sortie", default=FICHIER_SORTIE)
+    parser.add_argument("--graine", type=int, default=GRAINE)
+    parser.add_argument("--taux-doublons", type=float, default=TAUX_DOUBLONS)
+    parser.add_argument("--taux-suppression", type=float, default=TAUX_SUPPRESSION)
+    parser.add_argument("--taille-lot", type=int, default=TAILLE_LOT)
+    parser.add_argument("--taux-fautes", type=float, default=TAUX_FAUTES,
+                        help="Part des doublons avec une faute dans Name ou un titre dans Doctor")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    stats = generer(args.sortie, args.lignes, args.graine, args.taux_doublons, args.taux_suppression,
+                    args.taille_lot, args.taux_fautes)
+    print(f"✅ {args.sortie} : {stats['lignes']} lignes en {time.perf_counter() - debut:.1f} s")
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
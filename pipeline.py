@@ -0,0 +1,140 @@
+"""
+Script : pipeline.py
+But : Enchaîner purge des doublons → contrôle d'intégrité → chargement MongoDB
+      en ne lisant healthcare_dataset.csv qu'une seule fois.
+      Les trois étapes travaillent sur le même DataFrame en mémoire ; le
+      fichier purgé intermédiaire n'est écrit que sur demande (--ecrire-purge).
+      Chaque étape est chronométrée et mesurée (débit, pic mémoire) par
+      instrumentation.py : --metriques / --metriques-port.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from check_doublons import FICHIER_ENTREE, traiter_doublons_par_blocs
+from check_integrity import TAILLE_CHUNK, profiler_chunks
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "script"))
+from migration import MONGO_URI, TAILLE_LOT, charger, convertir_document, ouvrir_collection  # noqa: E402
+from indexes import creer_indexes  # noqa: E402
+from cache_rapports import incrementer_version  # noqa: E402
+from formats import est_colonnaire  # noqa: E402
+import instrumentation  # noqa: E402
+from instrumentation import METRIQUES  # noqa: E402
+
+
+@contextmanager
+def etape(nom, durees):
+    """
+    Chronomètre une étape et enregistre sa durée dans `durees`. Le dict
+    produit est celui de METRIQUES.etape ('lignes' pour le débit).
+    """
+    print(f"\n▶️ {nom}")
+    debut = time.perf_counter()
+    try:
+        with METRIQUES.etape(nom, source='pipeline') as mesure:
+            yield mesure
+    finally:
+        durees[nom] = time.perf_counter() - debut
+        print(f"⏱️ {nom} : {durees[nom]:.2f} s")
+
+
+def lire_csv(fichier):
+    """
+    Lecture unique du CSV, tout en texte et cellules vides à '' : exactement
+    ce que csv.DictReader fournit à migration.py. Un fichier en colonnes
+    (.parquet / .arrow) est ramené à la même représentation texte.
+    """
+    if est_colonnaire(fichier):
+        from format_colonnes import lire_table, vers_texte  # pyarrow : fichiers en colonnes seulement
+        return vers_texte(lire_table(fichier))
+    return pd.read_csv(fichier, dtype=str, keep_default_na=False)
+
+
+def decouper(df, taille):
+    """Tranches successives du DataFrame, sans copie."""
+    for debut in range(0, len(df), taille):
+        yield df.iloc[debut:debut + taille]
+
+
+def lots_documents(df, taille_lot):
+    """Convertit le DataFrame purgé en lots de documents typés, tranche par tranche."""
+    for tranche in decouper(df, taille_lot):
+        yield [convertir_document(row) for row in tranche.to_dict("records")]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Purge, contrôle et chargement en une seule lecture.")
+    parser.add_argument("--entree", default=FICHIER_ENTREE, help="CSV source (ou .parquet / .arrow)")
+    parser.add_argument("--ecrire-purge", metavar="FICHIER", help="Écrire aussi le fichier purgé intermédiaire (CSV, .parquet ou .arrow)")
+    parser.add_argument("--rapport", metavar="FICHIER", help="Écrire le rapport d'intégrité JSON")
+    parser.add_argument("--uri", default=MONGO_URI, help="URI MongoDB")
+    parser.add_argument("--batch-size", type=int, default=TAILLE_LOT, help="Documents par lot")
+    parser.add_argument("--sans-chargement", action="store_true", help="S'arrêter après le contrôle d'intégrité")
+    instrumentation.ajouter_options(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    instrumentation.configurer(args)
+    if not os.path.exists(args.entree):
+        print(f"❌ Fichier introuvable : {args.entree}")
+        sys.exit(1)
+
+    durees = {}
+    print(f"=== 🏥 Pipeline purge → contrôle → chargement : {args.entree} ===")
+
+    with etape("Lecture", durees) as mesure:
+        df = lire_csv(args.entree)
+        mesure['lignes'] = len(df)
+        print(f"✅ {len(df)} lignes, {len(df.columns)} colonnes")
+
+    with etape("Purge des doublons", durees) as mesure:
+        mesure['lignes'] = len(df)
+        # Âges fusionnés remis en texte pour rester homogène avec le reste du DataFrame
+        df = traiter_doublons_par_blocs(df).astype(str)
+        if args.ecrire_purge:
+            if est_colonnaire(args.ecrire_purge):
+                from format_colonnes import ecrire_table
+                ecrire_table(df, args.ecrire_purge)
+            else:
+                df.to_csv(args.ecrire_purge, index=False)
+            print(f"💾 Fichier purgé enregistré : {args.ecrire_purge}")
+
+    with etape("Contrôle d'intégrité", durees) as mesure:
+        mesure['lignes'] = len(df)
+        chunks = (tranche.mask(tranche == "") for tranche in decouper(df, TAILLE_CHUNK))
+        rapport = profiler_chunks(chunks, args.entree)
+        print(f"🔍 Valeurs manquantes : {rapport['valeurs_manquantes']}")
+        print(f"🧬 Doublons exacts : {rapport['doublons_exacts']}")
+        print(f"🧩 Colonnes à types mixtes : {rapport['colonnes_types_mixtes'] or 'aucune'}")
+        if args.rapport:
+            with open(args.rapport, "w", encoding="utf-8") as f:
+                json.dump(rapport, f, ensure_ascii=False, indent=2, default=str)
+
+    if not args.sans_chargement:
+        with etape("Chargement MongoDB", durees) as mesure:
+            collection = ouvrir_collection(args.uri)
+            stats = charger(collection, lots_documents(df, args.batch_size))
+            mesure.update(lignes=stats['inseres'], lots=stats['lots'], taille_lot=args.batch_size)
+            creer_indexes(collection)
+            incrementer_version(collection.database, collection.name)
+            print(f"→ {stats['inseres']} documents insérés ({stats['docs_par_seconde']:.0f} docs/s)")
+            if stats['echecs']:
+                print(f"⚠️ {stats['echecs']} documents en échec dans {stats['lots_en_echec']} lots")
+
+    print("\n=== ⏱️ Durée par étape ===")
+    for nom, duree in durees.items():
+        print(f"{nom:<25} {duree:>8.2f} s")
+    print(f"{'Total':<25} {sum(durees.values()):>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,28 @@
 from pymongo import MongoClient
 import pandas as pd
 
-# Connexion MongoDB
-client = MongoClient('mongodb://localhost:27017')
-db = client['FirstTry']
-collection = db['medic2']
+from indexes import hint_si_present
 
 # Pipeline avec arrondi de l’âge moyen
+# Age est stocké en entier depuis la migration typée : pas de conversion pour ces documents.
+# Un import --sans-typage le laisse en texte : seul ce cas passe par $convert (illisible → null, ignoré)
+AGE = {
+    '$cond': [
+        { '$isNumber': "$Age" },
+        "$Age",
+        { '$convert': { 'input': "$Age", 'to': 'int', 'onError': None, 'onNull': None } }
+    ]
+}
+
 pipeline = [
     {
-        '$match': {
-            'Age': { '$exists': True, '$ne': None, '$ne': '' }
+        '$set': {
+            'Age': AGE
         }
     },
     {
-        '$project': {
-            'Medical Condition': 1,
-            'Age': { '$toInt': "$Age" }
+        '$match': {
+            'Age': { '$type': 'number' }
         }
     },
     {
@@ -37,20 +43,36 @@ pipeline = [
     }
 ]
 
-# Exécution
-results = list(collection.aggregate(pipeline))
+# Index passé en hint à aggregate s'il existe : parcours couvert de 'condition_age' (voir indexes.py)
+index = 'condition_age'
+
+
+def formater(results):
+    """Tableau affiché par le rapport, à partir des documents de l'agrégation."""
+    if not results:
+        return "❗ Aucun patient avec un âge renseigné."
+    # Chargement pandas
+    df = pd.DataFrame(results)
+    df.rename(columns={
+        '_id': 'Pathologie',
+        'ageMoyen': 'Âge Moyen',
+        'nbPatients': 'Nombre de Patients'
+    }, inplace=True)
+
+    # Conversion de l’âge moyen en entier (au cas où)
+    df['Âge Moyen'] = df['Âge Moyen'].astype(int)
+
+    return "\n📊 Âge moyen (arrondi) des patients selon les pathologies\n\n" + df.to_string(index=False)
+
+
+def main():
+    # Connexion MongoDB
+    client = MongoClient('mongodb://localhost:27017')
+    collection = client['FirstTry']['medic2']
 
-# Chargement pandas
-df = pd.DataFrame(results)
-df.rename(columns={
-    '_id': 'Pathologie',
-    'ageMoyen': 'Âge Moyen',
-    'nbPatients': 'Nombre de Patients'
-}, inplace=True)
+    # Exécution
+    print(formater(list(collection.aggregate(pipeline, **hint_si_present(collection, index)))))
 
-# Conversion de l’âge moyen en entier (au cas où)
-df['Âge Moyen'] = df['Âge Moyen'].astype(int)
 
-# Affichage
-print("\n📊 Âge moyen (arrondi) des patients selon les pathologies\n")
-print(df.to_string(index=False))
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,9 @@
+import argparse
+
 from pymongo import MongoClient
 import pandas as pd
 
-# Connexion MongoDB
-client = MongoClient('mongodb://localhost:27017')
-db = client['FirstTry']
-collection = db['medic2']
+from indexes import hint_si_present
 
 # Pipeline pour histogramme + pourcentages (fourni par toi)
 pipeline = [
@@ -52,19 +51,61 @@ pipeline = [
     }
 ]
 
-# Exécution
-results = list(collection.aggregate(pipeline))
 
-# Création d'un DataFrame pandas
-df = pd.DataFrame(results)
+# Index passé en hint à aggregate s'il existe : parcours couvert de 'blood_type' (voir indexes.py)
+index = 'blood_type'
+
+
+# Même histogramme lu dans le résumé resume_blood_type (quelques documents, voir resumes.py)
+COLLECTION_RESUME = 'resume_blood_type'
+pipeline_resume = [
+    {
+        '$match': { 'count': { '$gt': 0 } }
+    },
+    {
+        '$group': {
+            '_id': None,
+            'total': { '$sum': '$count' },
+            'data': { '$push': { 'Blood Type': '$_id', 'count': '$count' } }
+        }
+    }
+] + pipeline[-2:]  # mêmes $unwind / $project que le pipeline complet
+
+
+def formater(results):
+    """Tableau affiché par le rapport, à partir des documents de l'agrégation."""
+    if not results:
+        return "❗ Aucun groupe sanguin trouvé dans la base de données."
+    # Création d'un DataFrame pandas
+    df = pd.DataFrame(results)
+
+    # Formatage
+    df.rename(columns={'count': 'Nombre de Patients', 'percentage': 'Pourcentage'}, inplace=True)
+    df['Pourcentage'] = df['Pourcentage'].map("{:.2f}%".format)
+
+    # Tri optionnel (du plus fréquent au moins)
+    df = df.sort_values(by='Nombre de Patients', ascending=False)
+
+    return ("\n🧬 Histogramme des Groupes Sanguins (calcul via MongoDB + sortie via pandas)\n\n"
+            + df.to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Histogramme des groupes sanguins.")
+    parser.add_argument("--resumes", action="store_true", help="Lire le résumé pré-agrégé au lieu de medic2")
+    args = parser.parse_args()
+
+    # Connexion MongoDB
+    client = MongoClient('mongodb://localhost:27017')
+    db = client['FirstTry']
 
-# Formatage
-df.rename(columns={'count': 'Nombre de Patients', 'percentage': 'Pourcentage'}, inplace=True)
-df['Pourcentage'] = df['Pourcentage'].map("{:.2f}%".format)
+    # Exécution
+    if args.resumes:
+        results = db[COLLECTION_RESUME].aggregate(pipeline_resume)
+    else:
+        results = db['medic2'].aggregate(pipeline, **hint_si_present(db['medic2'], index))
+    print(formater(list(results)))
 
-# Tri optionnel (du plus fréquent au moins)
-df = df.sort_values(by='Nombre de Patients', ascending=False)
 
-# Affichage final
-print("\n🧬 Histogramme des Groupes Sanguins (calcul via MongoDB + sortie via pandas)\n")
-print(df.to_string(index=False))
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,53 @@
-from pymongo import MongoClient
+from datetime import datetime
 
-# Connexion MongoDB
-client = MongoClient("mongodb://localhost:27017")
-db = client["FirstTry"]
-collection = db["medic2"]
+from depot_patients import ouvrir_depot
+
+# Connexion MongoDB : écritures groupées par lots, ciblées sur _id (depot_patients.py)
+depot = ouvrir_depot("mongodb://localhost:27017")
 
 # ----------- CREATE -----------
 print("\n📌 CREATE - Insertion d'un document")
 new_patient = {
     "Name": "John Doe",
-    "Age": "45",
+    "Age": 45,
     "Gender": "Male",
     "Medical Condition": "Asthma",
     "Blood Type": "O+",
     "Doctor": "Dr. Watson",
-    "Date of Admission": "2023-01-10",
-    "Discharge Date": "2023-01-15",
+    "Date of Admission": datetime(2023, 1, 10),
+    "Discharge Date": datetime(2023, 1, 15),
     "Medication": "Ventolin",
     "Test Results": "Normal",
     "Hospital": "LLC Smith",
     "Room Number": "B12",
     "Admission Type": "Urgence",
-    "Billing Amount": "1500",
-    "Insurance Provider": "ACME Health"
+    "Billing Amount": 1500.0,
+    "Insurance Provider": "ACME Health",
+    "Length of Stay": 5
 }
-insert_result = collection.insert_one(new_patient)
-print(f"✅ Document inséré avec _id : {insert_result.inserted_id}")
+with depot:  # Envoi du lot (bulk_write) à la sortie du bloc
+    patient_id = depot.creer(new_patient)
+if depot.erreurs:
+    print(f"❌ {depot.stats['crees']} document inséré, {len(depot.erreurs)} écriture(s) refusée(s) :")
+    for erreur in depot.erreurs:
+        print(f"   → _id {erreur['_id']} : code {erreur['code']}, {erreur['message']}")
+else:
+    print(f"✅ Document inséré avec _id : {patient_id}")
 
 # ----------- READ -----------
 print("\n📌 READ - Rechercher tous les patients ayant 'Asthma'")
-asthma_patients = collection.find({"Medical Condition": "Asthma"})
+asthma_patients = depot.trouver({"Medical Condition": "Asthma"}, champs=["Name", "Age"])
 for patient in asthma_patients:
     print(f"- {patient['Name']} ({patient['Age']} ans)")
 
 # ----------- UPDATE -----------
 print("\n📌 UPDATE - Mettre à jour le médecin de 'John Doe'")
-update_result = collection.update_one(
-    {"Name": "John Doe"},
-    {"$set": {"Doctor": "Dr. House"}}
-)
-print(f"✅ {update_result.modified_count} document modifié.")
+with depot:
+    depot.modifier(patient_id, {"Doctor": "Dr. House"})
+print(f"✅ {depot.stats['modifies']} document modifié.")
 
 # ----------- DELETE -----------
 print("\n📌 DELETE - Supprimer le patient 'John Doe'")
-delete_result = collection.delete_one({"Name": "John Doe"})
-print(f"🗑️ {delete_result.deleted_count} document supprimé.")
+with depot:
+    depot.supprimer(patient_id)
+print(f"🗑️ {depot.stats['supprimes']} document supprimé.")
@@ -1,35 +1,38 @@
 from pymongo import MongoClient
 
-# Connexion MongoDB
-client = MongoClient('mongodb://localhost:27017')
-db = client['FirstTry']
-collection = db['medic2']
-
 # Pipeline d'agrégation pour la durée moyenne de séjour
+# 'Length of Stay' est précalculé à l'import (jours entre admission et sortie)
 pipeline = [
-    {
-        '$project': {
-            'stayDuration': {
-                '$dateDiff': {
-                    'startDate': { '$toDate': "$Date of Admission" },
-                    'endDate': { '$toDate': "$Discharge Date" },
-                    'unit': "day"
-                }
-            }
-        }
-    },
     {
         '$group': {
             '_id': None,
-            'averageStay': { '$avg': "$stayDuration" }
+            'averageStay': { '$avg': "$Length of Stay" }
         }
     }
 ]
 
-# Exécution
-result = collection.aggregate(pipeline)
 
-# Affichage
-print("\n🏥 Durée moyenne de séjour à l’hôpital :\n")
-for doc in result:
-    print(f"📅 {round(doc['averageStay'], 2)} jours")
+def formater(result):
+    """Texte affiché par le rapport, à partir des documents de l'agrégation."""
+    lignes = ["\n🏥 Durée moyenne de séjour à l’hôpital :\n"]
+    for doc in result:
+        if doc['averageStay'] is None:
+            lignes.append("❗ Aucune durée de séjour renseignée.")
+        else:
+            lignes.append(f"📅 {round(doc['averageStay'], 2)} jours")
+    if not result:
+        lignes.append("❗ Aucun patient dans la base de données.")
+    return "\n".join(lignes)
+
+
+def main():
+    # Connexion MongoDB
+    client = MongoClient('mongodb://localhost:27017')
+    collection = client['FirstTry']['medic2']
+
+    # Exécution
+    print(formater(list(collection.aggregate(pipeline))))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,55 @@
+import argparse
+
 from pymongo import MongoClient
 
-# Connexion à MongoDB
-client = MongoClient('mongodb://localhost:27017')
+from requetes import COLLATION, pipeline_filtre
 
-# Sélection de la base de données et de la collection
-db = client['FirstTry']
-collection = db['medic2']
 
-# Pipeline d'agrégation
-pipeline = [
-    {
-        '$match': {
-            'Medical Condition': 'Cancer'
-        }
-    },
-    {
-        '$group': {
-            '_id': '$Medication',
-            'count': {'$sum': 1}
+def pipeline_medicaments(condition='Cancer'):
+    """Pipeline d'agrégation : nombre de cas par médicament pour une condition."""
+    return pipeline_filtre([
+        {
+            '$group': {
+                '_id': '$Medication',
+                'count': {'$sum': 1}
+            }
         }
-    }
-]
+    ], condition=condition)
+
+
+# Pipeline d'agrégation, exécuté avec la collation insensible à la casse
+# ('cancer' = 'Cancer', index ci_condition_medication_resultats)
+pipeline = pipeline_medicaments('Cancer')
+collation = COLLATION
+
+
+def formater(results, condition='Cancer'):
+    """Tableau affiché par le rapport, à partir des documents de l'agrégation."""
+    lignes = [
+        f"\n📊 Médicaments associés à la condition '{condition}':\n",
+        "{:<30}{}".format("Médicament", "Nombre de cas"),
+        "-" * 45,
+    ]
+    for doc in results:
+        medication = doc['_id'] if doc['_id'] else "Inconnu"
+        count = doc['count']
+        lignes.append("{:<30}{}".format(medication, count))
+    return "\n".join(lignes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Médicaments par condition médicale.")
+    parser.add_argument("--condition", default='Cancer', help="Condition (insensible à la casse)")
+    args = parser.parse_args()
+
+    # Connexion MongoDB
+    client = MongoClient('mongodb://localhost:27017')
+    collection = client['FirstTry']['medic2']
 
-# Exécution de la requête d'agrégation
-results = collection.aggregate(pipeline)
+    # Exécution
+    results = collection.aggregate(pipeline_medicaments(args.condition), collation=collation)
+    print(formater(list(results), args.condition))
 
-# Affichage formaté des résultats
-print("\n📊 Médicaments associés à la condition 'Cancer':\n")
-print("{:<30}{}".format("Médicament", "Nombre de cas"))
-print("-" * 45)
 
-for doc in results:
-    medication = doc['_id'] if doc['_id'] else "Inconnu"
-    count = doc['count']
-    print("{:<30}{}".format(medication, count))
+if __name__ == "__main__":
+    main()
@@ -1,105 +1,60 @@
+import argparse
+
 from pymongo import MongoClient
 
-# Connexion MongoDB
-client = MongoClient('mongodb://localhost:27017')
-db = client['FirstTry']
-collection = db['medic2']
+from repartition_resultats import pipeline_repartition
+from requetes import COLLATION
+
+
+def pipeline_resultats(condition='Cancer'):
+    """
+    Pipeline d'agrégation : un compteur $sum conditionnel par résultat dans un seul
+    $group (voir repartition_resultats.py), au lieu de $push puis $size/$filter
+    """
+    return pipeline_repartition(condition=condition, champ_resultat='Test Results',
+                                valeurs=['Abnormal', 'Inconclusive', 'Normal'])
+
+
+# Exécuté avec la collation insensible à la casse (index ci_condition_medication_resultats)
+pipeline = pipeline_resultats('Cancer')
+collation = COLLATION
+
+
+def formater(results, condition='Cancer'):
+    """Tableau affiché par le rapport, à partir des documents de l'agrégation."""
+    lignes = [
+        f"\n📊 Analyse des résultats de tests pour la condition '{condition}':\n",
+        "{:<30}{:<15}{:<18}{:<20}{:<15}".format(
+            "Médicament", "Tests", "% Anormal", "% Inconclusive", "% Normal"
+        ),
+        "-" * 100,
+    ]
+    for doc in results:
+        medication = doc['_id'] if doc['_id'] else "Inconnu"
+        total = doc['totalTests']
+        abnormal = round(doc['abnormalPercent'], 2)
+        inconclusive = round(doc['inconclusivePercent'], 2)
+        normal = round(doc['normalPercent'], 2)
+
+        lignes.append("{:<30}{:<15}{:<18}{:<20}{:<15}".format(
+            medication, total, f"{abnormal}%", f"{inconclusive}%", f"{normal}%"
+        ))
+    return "\n".join(lignes)
+
 
-# Pipeline d'agrégation
-pipeline = [
-    {
-        '$match': {
-            'Medical Condition': 'Cancer'  # sensible à la casse
-        }
-    },
-    {
-        '$group': {
-            '_id': '$Medication',
-            'testResults': {'$push': '$Test Results'}
-        }
-    },
-    {
-        '$project': {
-            '_id': 1,
-            'totalTests': {'$size': '$testResults'},
-            'abnormalPercent': {
-                '$multiply': [
-                    {
-                        '$divide': [
-                            {
-                                '$size': {
-                                    '$filter': {
-                                        'input': '$testResults',
-                                        'as': 'result',
-                                        'cond': {'$eq': ['$$result', 'Abnormal']}
-                                    }
-                                }
-                            },
-                            {'$size': '$testResults'}
-                        ]
-                    },
-                    100
-                ]
-            },
-            'inconclusivePercent': {
-                '$multiply': [
-                    {
-                        '$divide': [
-                            {
-                                '$size': {
-                                    '$filter': {
-                                        'input': '$testResults',
-                                        'as': 'result',
-                                        'cond': {'$eq': ['$$result', 'Inconclusive']}
-                                    }
-                                }
-                            },
-                            {'$size': '$testResults'}
-                        ]
-                    },
-                    100
-                ]
-            },
-            'normalPercent': {
-                '$multiply': [
-                    {
-                        '$divide': [
-                            {
-                                '$size': {
-                                    '$filter': {
-                                        'input': '$testResults',
-                                        'as': 'result',
-                                        'cond': {'$eq': ['$$result', 'Normal']}
-                                    }
-                                }
-                            },
-                            {'$size': '$testResults'}
-                        ]
-                    },
-                    100
-                ]
-            }
-        }
-    }
-]
+def main():
+    parser = argparse.ArgumentParser(description="Résultats de tests par médicament pour une condition.")
+    parser.add_argument("--condition", default='Cancer', help="Condition (insensible à la casse)")
+    args = parser.parse_args()
 
-# Exécution de l'agrégation
-results = collection.aggregate(pipeline)
+    # Connexion MongoDB
+    client = MongoClient('mongodb://localhost:27017')
+    collection = client['FirstTry']['medic2']
 
-# Affichage formaté
-print("\n📊 Analyse des résultats de tests pour la condition 'Cancer':\n")
-print("{:<30}{:<15}{:<18}{:<20}{:<15}".format(
-    "Médicament", "Tests", "% Anormal", "% Inconclusive", "% Normal"
-))
-print("-" * 100)
+    # Exécution
+    results = collection.aggregate(pipeline_resultats(args.condition), collation=collation)
+    print(formater(list(results), args.condition))
 
-for doc in results:
-    medication = doc['_id'] if doc['_id'] else "Inconnu"
-    total = doc['totalTests']
-    abnormal = round(doc['abnormalPercent'], 2)
-    inconclusive = round(doc['inconclusivePercent'], 2)
-    normal = round(doc['normalPercent'], 2)
 
-    print("{:<30}{:<15}{:<18}{:<20}{:<15}".format(
-        medication, total, f"{abnormal}%", f"{inconclusive}%", f"{normal}%"
-    ))
+if __name__ == "__main__":
+    main()
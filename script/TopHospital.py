@@ -1,9 +1,8 @@
+import argparse
+
 from pymongo import MongoClient
 
-# Connexion MongoDB
-client = MongoClient('mongodb://localhost:27017')
-db = client['FirstTry']
-collection = db['medic2']
+from indexes import hint_si_present
 
 # Pipeline : Grouper par hôpital et compter les admissions
 pipeline = [
@@ -21,13 +20,51 @@ pipeline = [
     }
 ]
 
-# Exécution
-result = list(collection.aggregate(pipeline))
 
-# Affichage du résultat
-if result:
-    top_hospital = result[0]['_id']
-    count = result[0]['admissionCount']
-    print(f"\n🏥 Hôpital avec le plus d'admissions : {top_hospital} ({count} admissions)")
-else:
-    print("❗ Aucun hôpital trouvé dans la base de données.")
+# Index passé en hint à aggregate s'il existe : parcours couvert de 'hospital' (voir indexes.py)
+index = 'hospital'
+
+
+# Même résultat lu dans le résumé resume_hospital (voir resumes.py)
+COLLECTION_RESUME = 'resume_hospital'
+pipeline_resume = [
+    {
+        '$sort': { 'count': -1 }
+    },
+    {
+        '$limit': 1
+    },
+    {
+        '$project': { 'admissionCount': '$count' }
+    }
+]
+
+
+def formater(result):
+    """Ligne affichée par le rapport, à partir des documents de l'agrégation."""
+    if result:
+        top_hospital = result[0]['_id']
+        count = result[0]['admissionCount']
+        return f"\n🏥 Hôpital avec le plus d'admissions : {top_hospital} ({count} admissions)"
+    return "❗ Aucun hôpital trouvé dans la base de données."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hôpital avec le plus d'admissions.")
+    parser.add_argument("--resumes", action="store_true", help="Lire le résumé pré-agrégé au lieu de medic2")
+    args = parser.parse_args()
+
+    # Connexion MongoDB
+    client = MongoClient('mongodb://localhost:27017')
+    db = client['FirstTry']
+
+    # Exécution
+    if args.resumes:
+        results = db[COLLECTION_RESUME].aggregate(pipeline_resume)
+    else:
+        results = db['medic2'].aggregate(pipeline, **hint_si_present(db['medic2'], index))
+    print(formater(list(results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Script : analyse_locale.py
+But : Exécuter les rapports du registre (rapports.RAPPORTS) sans MongoDB,
+      directement sur le CSV purgé ou un fichier colonnes (Parquet), par des
+      groupby pandas / NumPy vectorisés.
+      Chaque rapport local retourne les mêmes documents que le pipeline
+      Mongo correspondant : les fonctions formater() des scripts sont
+      réutilisées telles quelles.
+      Le typage reprend celui de l'import (format_colonnes.typer_dataframe,
+      version colonne de migration.convertir_document) : Age entier, durée
+      de séjour en jours, champs catégoriels normalisés.
+
+      --verifier compare chaque rapport avec son pipeline sur medic2 (chargé
+      depuis le même fichier) ; --benchmark compare le temps en mémoire et
+      le temps dans la base.
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from format_colonnes import est_colonnaire, lire_table, typer_dataframe
+from migration import CHAMP_DUREE_SEJOUR, csv_file_path
+from rapports import BASE, COLLECTION, MONGO_URI, RAPPORTS, executer_rapport
+from repartition_resultats import RESULTATS_TESTS, champ_pourcentage
+
+
+# === Lecture et typage ===
+def lire_fichier(chemin):
+    """CSV (toutes colonnes en texte) ou fichier en colonnes (Parquet / Arrow), selon l'extension."""
+    if est_colonnaire(chemin):
+        return lire_table(chemin)
+    return pd.read_csv(chemin, dtype=str, keep_default_na=False)
+
+
+def charger(chemin):
+    return typer_dataframe(lire_fichier(chemin))
+
+
+def _colonne(df, champ):
+    """Colonne `champ`, ou que des None si elle est absente (champ manquant côté Mongo)."""
+    return df[champ] if champ in df else pd.Series(None, index=df.index, dtype=object)
+
+
+def _groupes(serie):
+    """Valeurs de regroupement : '' et NaN restent des groupes, comme un _id vide / null dans $group."""
+    return serie.astype(object).where(serie.notna(), None)
+
+
+# === Rapports en mémoire (mêmes documents que les pipelines) ===
+def age_par_condition(df):
+    ages = pd.DataFrame({'condition': _groupes(_colonne(df, 'Medical Condition')),
+                         'age': pd.to_numeric(_colonne(df, 'Age'), errors='coerce')}).dropna(subset=['age'])
+    stats = ages.groupby('condition', dropna=False)['age'].agg(moyenne='mean', nb='size')
+    stats = stats.assign(ageMoyen=np.round(stats['moyenne'], 0)).sort_values('ageMoyen', ascending=False)
+    return [{'_id': condition, 'ageMoyen': float(age), 'nbPatients': int(nb)}
+            for condition, age, nb in zip(stats.index, stats['ageMoyen'], stats['nb'])]
+
+
+def histogramme_groupes_sanguins(df):
+    comptes = _groupes(_colonne(df, 'Blood Type')).value_counts(dropna=False)
+    total = int(comptes.sum())
+    return [{'Blood Type': groupe, 'count': int(n), 'percentage': n / total * 100}
+            for groupe, n in comptes.items()]
+
+
+def hopital_principal(df):
+    comptes = _groupes(_colonne(df, 'Hospital')).value_counts(dropna=False)
+    if comptes.empty:
+        return []
+    return [{'_id': comptes.index[0], 'admissionCount': int(comptes.iloc[0])}]
+
+
+def _filtre_condition(df, condition):
+    """Égalité insensible à la casse, comme la collation de force 2 des rapports."""
+    conditions = _colonne(df, 'Medical Condition')
+    chaines = conditions.map(lambda v: isinstance(v, str))
+    return df[chaines & (conditions.where(chaines, '').str.casefold() == condition.casefold())]
+
+
+def medicaments_par_condition(df, condition='Cancer'):
+    comptes = _groupes(_colonne(_filtre_condition(df, condition), 'Medication')).value_counts(dropna=False)
+    return [{'_id': medicament, 'count': int(n)} for medicament, n in comptes.items()]
+
+
+def repartition(df, condition='Cancer', champ_resultat='Test Results', valeurs=RESULTATS_TESTS,
+                champ_groupe='Medication'):
+    """Équivalent de repartition_resultats.pipeline_repartition : une ligne par groupe."""
+    filtre = _filtre_condition(df, condition)
+    tableau = pd.DataFrame({'groupe': _groupes(_colonne(filtre, champ_groupe)),
+                            'resultat': _colonne(filtre, champ_resultat)})
+    totaux = tableau.groupby('groupe', dropna=False).size()
+    comptes = {valeur: tableau[tableau['resultat'] == valeur].groupby('groupe', dropna=False).size()
+               for valeur in valeurs}
+    documents = []
+    for groupe, total in totaux.items():
+        doc = {'_id': groupe, 'totalTests': int(total)}
+        for valeur in valeurs:
+            doc[champ_pourcentage(valeur)] = float(comptes[valeur].get(groupe, 0) / total * 100)
+        documents.append(doc)
+    return documents
+
+
+def duree_moyenne_sejour(df):
+    """
+    Comme $group sur _id None : aucun document sans ligne, et averageStay
+    None ($avg sans valeur numérique) si aucune durée n'est lisible.
+    """
+    if df.empty:
+        return []
+    durees = pd.to_numeric(_colonne(df, CHAMP_DUREE_SEJOUR), errors='coerce').dropna()
+    return [{'_id': None, 'averageStay': float(durees.mean()) if len(durees) else None}]
+
+
+# Registre local : même nom que dans rapports.RAPPORTS
+RAPPORTS_LOCAUX = {
+    'AgeByDesease': age_par_condition,
+    'ByBlood': histogramme_groupes_sanguins,
+    'TopHospital': hopital_principal,
+    'MedicationByCancer': medicaments_par_condition,
+    'MedicationByCancerAndResults': repartition,
+    'DureeMoyenneSejourHopital': duree_moyenne_sejour,
+}
+
+
+def executer_local(df, nom):
+    """Exécute un rapport en mémoire ; retourne {nom, resultats, texte, latence}."""
+    debut = time.perf_counter()
+    resultats = RAPPORTS_LOCAUX[nom](df)
+    latence = time.perf_counter() - debut
+    return {'nom': nom, 'resultats': resultats, 'texte': RAPPORTS[nom].formater(resultats), 'latence': latence}
+
+
+# === Parité avec MongoDB ===
+def _egaux(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        if a is None or b is None:
+            return a is b
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def comparer_documents(locaux, mongo, nom=None):
+    """
+    Écarts entre deux listes de documents, sans tenir compte de leur ordre
+    (les égalités de tri n'ont pas d'ordre garanti côté Mongo). Pour
+    TopHospital, seul le nombre d'admissions est comparé : deux hôpitaux
+    à égalité sont tous deux valables.
+    """
+    if nom == 'TopHospital':
+        locaux = [{'admissionCount': d['admissionCount']} for d in locaux]
+        mongo = [{'admissionCount': d['admissionCount']} for d in mongo]
+
+    def cle(doc):
+        return repr(sorted((k, v) for k, v in doc.items() if not isinstance(v, float)))
+
+    locaux, mongo = sorted(locaux, key=cle), sorted(mongo, key=cle)
+    if len(locaux) != len(mongo):
+        return [f"{len(locaux)} documents en local, {len(mongo)} dans MongoDB"]
+    ecarts = []
+    for l, m in zip(locaux, mongo):
+        for champ in set(l) | set(m):
+            if not _egaux(l.get(champ), m.get(champ)):
+                ecarts.append(f"{champ} : local {l.get(champ)!r}, MongoDB {m.get(champ)!r}")
+    return ecarts
+
+
+def verifier_parite(df, collection, noms=None):
+    """Retourne {nom: [écarts]} entre le moteur local et les pipelines MongoDB."""
+    ecarts = {}
+    for nom in noms or RAPPORTS_LOCAUX:
+        mongo = executer_rapport(collection, nom)
+        if mongo['erreur']:
+            ecarts[nom] = [f"erreur MongoDB : {mongo['erreur']}"]
+        else:
+            ecarts[nom] = comparer_documents(RAPPORTS_LOCAUX[nom](df), mongo['resultats'], nom)
+    return ecarts
+
+
+def benchmark(df, collection, noms=None, repetitions=5):
+    """Meilleure latence de chaque rapport en mémoire et dans la base."""
+    mesures = {}
+    for nom in noms or RAPPORTS_LOCAUX:
+        local = min(executer_local(df, nom)['latence'] for _ in range(repetitions))
+        base = min(executer_rapport(collection, nom)['latence'] for _ in range(repetitions))
+        mesures[nom] = {'local': local, 'mongo': base}
+    return mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rapports en mémoire sur un fichier local (sans MongoDB).")
+    parser.add_argument("rapports", nargs="*", metavar="RAPPORT",
+                        help=f"Rapports à lancer parmi {', '.join(RAPPORTS_LOCAUX)} (tous par défaut)")
+    parser.add_argument("--fichier", default=csv_file_path, help="CSV purgé ou fichier .parquet / .arrow")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--verifier", action="store_true", help="Comparer avec les pipelines MongoDB")
+    parser.add_argument("--benchmark", action="store_true", help="Temps en mémoire vs dans la base")
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+    inconnus = [nom for nom in args.rapports if nom not in RAPPORTS_LOCAUX]
+    if inconnus:
+        parser.error(f"rapport(s) inconnu(s) : {', '.join(inconnus)}")
+    noms = args.rapports or list(RAPPORTS_LOCAUX)
+
+    debut = time.perf_counter()
+    df = charger(args.fichier)
+    chargement = time.perf_counter() - debut
+
+    if args.verifier or args.benchmark:
+        from pymongo import MongoClient
+        collection = MongoClient(args.uri)[BASE][COLLECTION]
+
+    if args.verifier:
+        ecarts = verifier_parite(df, collection, noms)
+        for nom, liste in ecarts.items():
+            print(f"{'✅' if not liste else '❌'} {nom}")
+            for ecart in liste[:5]:
+                print(f"   → {ecart}")
+        if any(ecarts.values()):
+            sys.exit(1)
+        return
+
+    if args.benchmark:
+        mesures = benchmark(df, collection, noms, args.repetitions)
+        print(f"\n⏱️ {len(df)} lignes, chargement du fichier {chargement * 1000:.1f} ms "
+              f"(meilleur de {args.repetitions})\n")
+        print("{:<32}{:>14}{:>14}{:>12}".format("Rapport", "Local (ms)", "MongoDB (ms)", "Plus rapide"))
+        print("-" * 72)
+        for nom, m in mesures.items():
+            gagnant = "local" if m['local'] < m['mongo'] else "MongoDB"
+            print("{:<32}{:>14.2f}{:>14.2f}{:>12}".format(nom, m['local'] * 1000, m['mongo'] * 1000, gagnant))
+        return
+
+    for nom in noms:
+        print(executer_local(df, nom)['texte'])
+    print(f"\n⏱️ {len(df)} lignes chargées en {chargement * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Script : bench_depot.py
+But : Comparer le débit des écritures document par document (motif de
+      l'ancien CrudTry1.py : insert_one, puis update_one / delete_one
+      filtrés sur Name) et des écritures groupées de depot_patients.py
+      (bulk_write sur _id), pour la création, la modification et la
+      suppression de N patients.
+      Un troisième mode, document par document mais filtré sur _id, sépare
+      le coût des parcours de collection de celui des allers-retours.
+      Chaque mode tourne dans une base jetable, supprimée à la fin.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
+
+from depot_patients import TAILLE_LOT, DepotPatients, identifiant
+from migration import COLLECTION, MONGO_URI
+
+# === CONFIGURATION ===
+BASE_BENCH = 'FirstTry_bench_depot'  # Base jetable : FirstTry n'est jamais touchée
+PATIENTS = 2000
+GRAINE = 42
+MODES = ['unitaire_nom', 'unitaire_id', 'groupe']
+
+
+def patients(nombre, graine=GRAINE):
+    """`nombre` patients synthétiques distincts (même graine = mêmes patients)."""
+    rng = random.Random(graine)
+    docs = []
+    for i in range(nombre):
+        admission = datetime(2020, 1, 1) + timedelta(days=rng.randrange(1500))
+        sejour = rng.randrange(1, 30)
+        docs.append({
+            'Name': f"Patient {i:07d}", 'Age': rng.randrange(18, 90), 'Gender': rng.choice(['Male', 'Female']),
+            'Medical Condition': rng.choice(['Asthma', 'Cancer', 'Diabetes', 'Obesity']),
+            'Blood Type': rng.choice(['A+', 'A-', 'B+', 'O+', 'O-', 'AB+']), 'Doctor': f"Dr. {rng.randrange(500)}",
+            'Date of Admission': admission, 'Discharge Date': admission + timedelta(days=sejour),
+            'Medication': rng.choice(['Aspirin', 'Ibuprofen', 'Lipitor']), 'Test Results': 'Normal',
+            'Hospital': f"Hospital {rng.randrange(100)}", 'Billing Amount': round(rng.uniform(100, 50000), 2),
+            'Length of Stay': sejour,
+        })
+    return docs
+
+
+def ecrire_unitaire(collection, docs, cle):
+    """Une opération et un aller-retour par patient ; `cle` = 'Name' (ancien CRUD) ou '_id'."""
+    def creer():
+        for doc in docs:
+            collection.insert_one({**doc, '_id': identifiant(doc)})
+
+    def modifier():
+        for doc in docs:
+            collection.update_one({cle: doc[cle] if cle == 'Name' else identifiant(doc)},
+                                  {'$set': {'Doctor': 'Dr. House'}})
+
+    def supprimer():
+        for doc in docs:
+            collection.delete_one({cle: doc[cle] if cle == 'Name' else identifiant(doc)})
+    return creer, modifier, supprimer
+
+
+def ecrire_groupe(collection, docs, taille_lot, w, journal):
+    """Mêmes opérations par lots de bulk_write (DepotPatients, sans résumés)."""
+    depot = DepotPatients(collection, w=w, journal=journal, taille_lot=taille_lot, maj_resumes=False)
+
+    def creer():
+        with depot:
+            for doc in docs:
+                depot.creer(doc)
+
+    def modifier():
+        with depot:
+            for doc in docs:
+                depot.modifier(doc, {'Doctor': 'Dr. House'})
+
+    def supprimer():
+        with depot:
+            for doc in docs:
+                depot.supprimer(doc)
+    return creer, modifier, supprimer
+
+
+def mesurer(client, mode, docs, taille_lot, w, journal):
+    """Durée (s) de chaque phase pour un mode ; la collection est vide au départ et à la fin."""
+    collection = client[BASE_BENCH][COLLECTION].with_options(write_concern=WriteConcern(w=w, j=journal))
+    collection.drop()
+    if mode == 'groupe':
+        phases = ecrire_groupe(collection, docs, taille_lot, w, journal)
+    else:
+        phases = ecrire_unitaire(collection, docs, 'Name' if mode == 'unitaire_nom' else '_id')
+    durees = {}
+    for nom, phase in zip(('creation', 'modification', 'suppression'), phases):
+        debut = time.perf_counter()
+        phase()
+        durees[nom] = time.perf_counter() - debut
+    restants = collection.count_documents({})
+    if restants:
+        print(f"⚠️ {mode} : {restants} documents restants après suppression")
+    return durees
+
+
+def _write_concern(valeur):
+    return int(valeur) if valeur.isdigit() else valeur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit des écritures unitaires et groupées (depot_patients.py).")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--patients", type=int, default=PATIENTS)
+    parser.add_argument("--taille-lot", type=int, default=TAILLE_LOT, help="Opérations par bulk_write")
+    parser.add_argument("--w", type=_write_concern, default=1, help="Write concern w (0, 1, majority...)")
+    parser.add_argument("--journal", action="store_true", help="Attendre l'écriture du journal (j=true)")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri, retryWrites=True)
+    docs = patients(args.patients)
+    journal = args.journal or None
+    resultats = {}
+    try:
+        for mode in args.modes:
+            resultats[mode] = mesurer(client, mode, docs, args.taille_lot, args.w, journal)
+    finally:
+        client.drop_database(BASE_BENCH)
+
+    print(f"\n=== ✍️ {args.patients} patients, w={args.w}{', j=true' if journal else ''}, "
+          f"lots de {args.taille_lot} ===")
+    print("{:<16}{:>16}{:>16}{:>16}".format("Mode", "Création", "Modification", "Suppression"))
+    print("-" * 64)
+    for mode, durees in resultats.items():
+        print("{:<16}".format(mode) + "".join(
+            "{:>16}".format(f"{args.patients / d:.0f} docs/s" if d > 0 else "-") for d in durees.values()))
+    if 'groupe' in resultats:
+        for mode in resultats:
+            if mode != 'groupe':
+                gains = [resultats[mode][p] / resultats['groupe'][p] for p in resultats['groupe']
+                         if resultats['groupe'][p] > 0]
+                print(f"🚀 groupe vs {mode} : x{min(gains):.1f} à x{max(gains):.1f}")
+
+
+if __name__ == "__main__":
+    main()
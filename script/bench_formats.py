@@ -0,0 +1,101 @@
+"""
+Script : bench_formats.py
+But : Comparer CSV, JSON (une ligne par document), Parquet et Arrow comme
+      format d'échange entre les étapes : taille du fichier, temps
+      d'écriture et temps de chargement jusqu'à un DataFrame typé (le CSV et
+      le JSON doivent être réanalysés et retypés, pas les formats en
+      colonnes). Le fichier source est répété jusqu'à --lignes lignes
+      (1 million par défaut).
+      Nécessite pyarrow.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from format_colonnes import COMPRESSION, lire_table, preparer_colonnes, typer_dataframe, vers_texte
+from migration import csv_file_path
+
+LIGNES = 1_000_000
+COLONNES_RAPPORT = ['Medical Condition', 'Medication', 'Test Results']  # Lecture partielle typique d'un rapport
+
+
+def agrandir(df, lignes):
+    """Répète le DataFrame jusqu'à `lignes` lignes."""
+    repetitions = -(-lignes // len(df))
+    return pd.concat([df] * repetitions, ignore_index=True).iloc[:lignes]
+
+
+def chronometrer(fonction, repetitions):
+    meilleure = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleure = min(meilleure, time.perf_counter() - debut)
+    return meilleure
+
+
+def mesurer(df_texte, dossier, repetitions=3):
+    """Pour chaque format : {taille, ecriture, chargement, colonnes} (octets, secondes)."""
+    type_ = preparer_colonnes(df_texte)
+    chemins = {nom: os.path.join(dossier, f"donnees.{ext}")
+               for nom, ext in (('CSV', 'csv'), ('JSON', 'jsonl'), ('Parquet', 'parquet'), ('Arrow', 'arrow'))}
+    ecrire = {
+        'CSV': lambda: df_texte.to_csv(chemins['CSV'], index=False),
+        'JSON': lambda: vers_texte(type_).to_json(chemins['JSON'], orient='records', lines=True),
+        'Parquet': lambda: type_.to_parquet(chemins['Parquet'], index=False, compression=COMPRESSION),
+        'Arrow': lambda: type_.to_feather(chemins['Arrow'], compression=COMPRESSION),
+    }
+    charger = {
+        'CSV': lambda colonnes=None: typer_dataframe(
+            pd.read_csv(chemins['CSV'], dtype=str, keep_default_na=False, usecols=colonnes)),
+        'JSON': lambda colonnes=None: typer_dataframe(
+            pd.read_json(chemins['JSON'], lines=True, dtype=False)[colonnes or slice(None)]),
+        'Parquet': lambda colonnes=None: lire_table(chemins['Parquet'], colonnes),
+        'Arrow': lambda colonnes=None: lire_table(chemins['Arrow'], colonnes),
+    }
+    mesures = {}
+    for nom in chemins:
+        ecriture = chronometrer(ecrire[nom], 1)
+        mesures[nom] = {
+            'taille': os.path.getsize(chemins[nom]),
+            'ecriture': ecriture,
+            'chargement': chronometrer(charger[nom], repetitions),
+            'colonnes': chronometrer(lambda: charger[nom](COLONNES_RAPPORT), repetitions),
+        }
+    return mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV / JSON / Parquet / Arrow : taille et temps de chargement.")
+    parser.add_argument("--fichier", default=csv_file_path, help="CSV source (répété jusqu'à --lignes)")
+    parser.add_argument("--lignes", type=int, default=LIGNES)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--dossier", help="Dossier des fichiers produits (temporaire par défaut)")
+    args = parser.parse_args()
+
+    df = agrandir(pd.read_csv(args.fichier, dtype=str, keep_default_na=False), args.lignes)
+    with tempfile.TemporaryDirectory() as temporaire:
+        dossier = args.dossier or temporaire
+        os.makedirs(dossier, exist_ok=True)
+        mesures = mesurer(df, dossier, args.repetitions)
+
+    print(f"\n⏱️ {len(df)} lignes, chargement jusqu'au DataFrame typé (meilleur de {args.repetitions})\n")
+    print("{:<10}{:>12}{:>15}{:>17}{:>22}".format(
+        "Format", "Taille (Mo)", "Écriture (s)", "Chargement (s)", f"{len(COLONNES_RAPPORT)} colonnes (s)"))
+    print("-" * 76)
+    reference = mesures['CSV']
+    for nom, m in mesures.items():
+        print("{:<10}{:>12.1f}{:>15.2f}{:>17.2f}{:>22.2f}".format(
+            nom, m['taille'] / 1e6, m['ecriture'], m['chargement'], m['colonnes']))
+    for nom in ('Parquet', 'Arrow'):
+        m = mesures[nom]
+        print(f"\n→ {nom} : fichier x{reference['taille'] / m['taille']:.1f} plus petit, "
+              f"chargement x{reference['chargement'] / m['chargement']:.1f} plus rapide que le CSV")
+
+
+if __name__ == "__main__":
+    main()
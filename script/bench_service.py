@@ -0,0 +1,106 @@
+"""
+Script : bench_service.py
+But : Test de charge de service_rapports.py contre un mongod local.
+      Le service est démarré dans le processus sur un port libre ; pour
+      chaque niveau de concurrence, N clients HTTP enchaînent des requêtes
+      sur les rapports du registre pendant --duree secondes.
+      Affiche débit, latence p50 / p99 et réponses refusées (503) ou
+      expirées (504), avec et sans regroupement des requêtes identiques.
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+from rapports import MONGO_URI, RAPPORTS
+from service_rapports import DELAI, FILE_MAX, MAX_EN_VOL, demarrer
+
+NIVEAUX = [1, 8, 32, 128]
+
+
+def centile(valeurs_triees, p):
+    """Centile p (0-100) par rang le plus proche."""
+    if not valeurs_triees:
+        return float('nan')
+    rang = max(0, min(len(valeurs_triees) - 1, round(p / 100 * len(valeurs_triees)) - 1))
+    return valeurs_triees[rang]
+
+
+async def requete(hote, port, chemin):
+    """Envoie un GET et retourne le code de statut HTTP."""
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    try:
+        ecrivain.write(f"GET {chemin} HTTP/1.1\r\nHost: {hote}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+        await ecrivain.drain()
+        ligne = await lecteur.readline()
+        await lecteur.read()
+        return int(ligne.split()[1])
+    finally:
+        ecrivain.close()
+
+
+async def niveau(hote, port, concurrence, duree):
+    """Lance `concurrence` clients pendant `duree` secondes ; retourne (latences 200, statuts, durée)."""
+    latences, statuts = [], Counter()
+    rapports = itertools.cycle(RAPPORTS)
+    fin = time.perf_counter() + duree
+
+    async def client():
+        while time.perf_counter() < fin:
+            debut = time.perf_counter()
+            try:
+                statut = await requete(hote, port, f"/rapports/{next(rapports)}")
+            except OSError:
+                statut = 'connexion'
+            statuts[statut] += 1
+            if statut == 200:
+                latences.append(time.perf_counter() - debut)
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrence)))
+    return sorted(latences), statuts, time.perf_counter() - debut
+
+
+async def executer(args):
+    for regrouper in (True, False):
+        serveur, service, client = await demarrer(
+            args.uri, '127.0.0.1', 0, max_en_vol=args.max_en_vol, file_max=args.file_max,
+            delai=args.delai, regrouper=regrouper)
+        port = serveur.sockets[0].getsockname()[1]
+        titre = "avec regroupement" if regrouper else "sans regroupement"
+        print(f"\n⏱️ Service des rapports, {titre} (max en vol {args.max_en_vol}, file {args.file_max})\n")
+        print("{:>12}{:>12}{:>12}{:>12}{:>10}{:>10}{:>14}".format(
+            "Clients", "Req/s", "p50 (ms)", "p99 (ms)", "503", "504", "Agrégations"))
+        print("-" * 82)
+        try:
+            async with serveur:
+                for concurrence in args.niveaux:
+                    avant = service.stats['agregations']
+                    latences, statuts, duree = await niveau('127.0.0.1', port, concurrence, args.duree)
+                    print("{:>12}{:>12.0f}{:>12.1f}{:>12.1f}{:>10}{:>10}{:>14}".format(
+                        concurrence, sum(statuts.values()) / duree,
+                        centile(latences, 50) * 1000, centile(latences, 99) * 1000,
+                        statuts[503], statuts[504], service.stats['agregations'] - avant))
+                    autres = {k: v for k, v in statuts.items() if k not in (200, 503, 504)}
+                    if autres:
+                        print(f"{'':>12}⚠️ autres réponses : {autres}")
+        finally:
+            await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du service des rapports.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--niveaux", type=int, nargs="+", default=NIVEAUX, help="Nombres de clients simultanés")
+    parser.add_argument("--duree", type=float, default=10.0, help="Secondes par niveau")
+    parser.add_argument("--max-en-vol", type=int, default=MAX_EN_VOL)
+    parser.add_argument("--file-max", type=int, default=FILE_MAX)
+    parser.add_argument("--delai", type=float, default=DELAI)
+    args = parser.parse_args()
+    asyncio.run(executer(args))
+
+
+if __name__ == "__main__":
+    main()
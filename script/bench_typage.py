@@ -0,0 +1,89 @@
+"""
+Script : bench_typage.py
+But : Mesurer le gain du typage à l'import sur les agrégations des rapports.
+      Les anciens pipelines (conversion $toInt / $toDate à chaque document)
+      tournent sur une collection importée en texte, les nouveaux sur la
+      collection typée.
+
+Préparation :
+    python migration.py --sans-typage   # puis renommer medic2 en medic2_texte
+    python migration.py                 # collection typée medic2
+"""
+
+import argparse
+import time
+
+from pymongo import MongoClient
+
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+
+# Pipelines d'origine, sur valeurs texte
+PIPELINES_TEXTE = {
+    'AgeByDesease': [
+        {'$match': {'Age': {'$exists': True, '$ne': ''}}},
+        {'$project': {'Medical Condition': 1, 'Age': {'$toInt': '$Age'}}},
+        {'$group': {'_id': '$Medical Condition', 'ageMoyen': {'$avg': '$Age'}, 'nbPatients': {'$sum': 1}}},
+    ],
+    'DureeMoyenneSejourHopital': [
+        {'$project': {'stayDuration': {'$dateDiff': {
+            'startDate': {'$toDate': '$Date of Admission'},
+            'endDate': {'$toDate': '$Discharge Date'},
+            'unit': 'day'
+        }}}},
+        {'$group': {'_id': None, 'averageStay': {'$avg': '$stayDuration'}}},
+    ],
+    'SommeFacturation': [
+        {'$group': {'_id': None, 'total': {'$sum': {'$toDouble': '$Billing Amount'}}}},
+    ],
+}
+
+# Mêmes rapports sur la collection typée
+PIPELINES_TYPES = {
+    'AgeByDesease': [
+        {'$match': {'Age': {'$type': 'number'}}},
+        {'$group': {'_id': '$Medical Condition', 'ageMoyen': {'$avg': '$Age'}, 'nbPatients': {'$sum': 1}}},
+    ],
+    'DureeMoyenneSejourHopital': [
+        {'$group': {'_id': None, 'averageStay': {'$avg': '$Length of Stay'}}},
+    ],
+    'SommeFacturation': [
+        {'$group': {'_id': None, 'total': {'$sum': '$Billing Amount'}}},
+    ],
+}
+
+
+def chronometrer(collection, pipeline, repetitions):
+    """Retourne la meilleure durée (s) sur `repetitions` exécutions complètes."""
+    meilleure = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        list(collection.aggregate(pipeline, allowDiskUse=True))
+        meilleure = min(meilleure, time.perf_counter() - debut)
+    return meilleure
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrégations texte vs typées.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--collection-texte", default='medic2_texte')
+    parser.add_argument("--collection-typee", default='medic2')
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[BASE]
+    texte = db[args.collection_texte]
+    typee = db[args.collection_typee]
+
+    print("\n⏱️ Agrégations avant / après typage à l'import\n")
+    print("{:<30}{:>15}{:>15}{:>10}".format("Rapport", "Texte (ms)", "Typé (ms)", "Gain"))
+    print("-" * 70)
+    for nom in PIPELINES_TEXTE:
+        avant = chronometrer(texte, PIPELINES_TEXTE[nom], args.repetitions)
+        apres = chronometrer(typee, PIPELINES_TYPES[nom], args.repetitions)
+        gain = f"x{avant / apres:.1f}" if apres > 0 else "-"
+        print("{:<30}{:>15.1f}{:>15.1f}{:>10}".format(nom, avant * 1000, apres * 1000, gain))
+
+
+if __name__ == "__main__":
+    main()
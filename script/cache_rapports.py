@@ -0,0 +1,203 @@
+"""
+Script : cache_rapports.py
+But : Mettre en cache les résultats des rapports entre deux modifications
+      des données.
+      La clé d'un résultat est le hachage du pipeline, du serveur et de la
+      collection (base.collection) et de la version des données. Cette version
+      est un compteur de la collection FirstTry.versions, incrémenté par
+      migration.py, dedup_mongo.py et CrudTry1.py (incrementer_version), et
+      un jeton aléatoire tiré à la création du compteur : une base supprimée
+      puis recréée ne retrouve pas les entrées de l'ancienne. Elle peut aussi
+      suivre un change stream sur un replica set local. Un changement de
+      version invalide de fait toutes les entrées précédentes.
+      Deux niveaux : LRU en mémoire avec TTL (réponse en moins d'une
+      milliseconde) puis stockage local sur disque (sqlite3), qui survit au
+      redémarrage du processus.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+# === CONFIGURATION ===
+COLLECTION_VERSIONS = 'versions'
+TTL = 3600                # Secondes de validité d'une entrée
+TAILLE_MAX = 256          # Entrées gardées en mémoire (LRU)
+INTERVALLE_VERSION = 1.0  # Secondes entre deux lectures de la version (sans change stream)
+FICHIER_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'migration-mongodb', 'rapports.sqlite')
+
+
+def incrementer_version(db, collection_nom='medic2'):
+    """À appeler après toute écriture dans la collection : invalide les résultats en cache."""
+    db[COLLECTION_VERSIONS].update_one({'_id': collection_nom},
+                                       {'$inc': {'version': 1}, '$setOnInsert': {'jeton': uuid.uuid4().hex}},
+                                       upsert=True)
+
+
+def lire_version(db, collection_nom='medic2'):
+    """(jeton, compteur) ; le document de version est créé, ou complété d'un jeton, s'il le faut."""
+    versions = db[COLLECTION_VERSIONS]
+    document = versions.find_one({'_id': collection_nom})
+    if document is None or 'jeton' not in document:
+        try:
+            versions.update_one({'_id': collection_nom, 'jeton': {'$exists': False}},
+                                {'$set': {'jeton': uuid.uuid4().hex}}, upsert=True)
+        except DuplicateKeyError:
+            pass  # Jeton posé entre-temps par un autre processus
+        document = versions.find_one({'_id': collection_nom})
+    return document['jeton'], document.get('version', 0)
+
+
+def espace(collection):
+    """Serveur (replica set ou adresses) et nom complet de la collection : portée des entrées du cache."""
+    topologie = collection.database.client.topology_description
+    serveur = topologie.replica_set_name or ','.join(
+        sorted(f"{hote}:{port}" for hote, port in topologie.server_descriptions()))
+    return f"{serveur}/{collection.full_name}"
+
+
+def cle_pipeline(espace_collection, pipeline, version):
+    """Clé stable : le JSON canonique du pipeline ne dépend pas de l'ordre d'insertion Python."""
+    texte = json.dumps([espace_collection, pipeline, version], sort_keys=True, default=str)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+
+class CacheRapports:
+    """
+    Cache à deux niveaux des résultats d'agrégation.
+    obtenir() retourne le résultat en cache pour (pipeline, version courante)
+    ou exécute l'agrégation et le mémorise.
+    """
+
+    def __init__(self, ttl=TTL, taille_max=TAILLE_MAX, fichier=FICHIER_CACHE,
+                 intervalle_version=INTERVALLE_VERSION):
+        self.ttl = ttl
+        self.taille_max = taille_max
+        self.intervalle_version = intervalle_version
+        self._memoire = OrderedDict()
+        self._verrou = threading.Lock()
+        self._versions = {}  # espace de la collection → (version, lue à)
+        self._surveillees = set()  # espaces suivis par change stream : version jamais relue
+        self.stats = {'hits_memoire': 0, 'hits_disque': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        self._disque = None
+        if fichier:
+            os.makedirs(os.path.dirname(fichier) or '.', exist_ok=True)
+            self._disque = sqlite3.connect(fichier, check_same_thread=False)
+            self._disque.execute(
+                'CREATE TABLE IF NOT EXISTS resultats (cle TEXT PRIMARY KEY, cree REAL, valeur BLOB)')
+
+    # --- Version des données ---
+    def version(self, collection):
+        """Version des données, relue au plus toutes les intervalle_version secondes (sauf change stream)."""
+        cle = espace(collection)
+        version, lue = self._versions.get(cle, (None, 0.0))
+        if version is None or (cle not in self._surveillees and time.monotonic() - lue > self.intervalle_version):
+            version = lire_version(collection.database, collection.name)
+            self._versions[cle] = (version, time.monotonic())
+        return version
+
+    def surveiller(self, collection):
+        """
+        Suit la collection par change stream (replica set requis) : chaque
+        écriture remplace la version par le jeton de reprise de l'événement,
+        unique, sans attendre la relecture. Si le flux ne peut pas s'ouvrir
+        (serveur autonome) ou s'interrompt, la collection revient à la
+        relecture périodique de sa version. Retourne le thread démon lancé.
+        """
+        cle = espace(collection)
+
+        def boucle():
+            try:
+                with collection.watch() as flux:
+                    for _ in flux:
+                        self._versions[cle] = (f"flux:{flux.resume_token}", time.monotonic())
+            except PyMongoError as e:
+                print(f"⚠️ Change stream sur {collection.full_name} interrompu, relecture de la version "
+                      f"toutes les {self.intervalle_version} s : {e}")
+            finally:
+                self._surveillees.discard(cle)
+                self._versions.pop(cle, None)  # Version périmée : relue à la prochaine demande
+
+        self._versions[cle] = (lire_version(collection.database, collection.name), time.monotonic())
+        self._surveillees.add(cle)
+        thread = threading.Thread(target=boucle, daemon=True, name='cache-change-stream')
+        thread.start()
+        return thread
+
+    # --- Lecture / écriture ---
+    def _lire(self, cle):
+        maintenant = time.time()
+        with self._verrou:
+            entree = self._memoire.get(cle)
+            if entree is not None:
+                cree, valeur = entree
+                if maintenant - cree <= self.ttl:
+                    self._memoire.move_to_end(cle)
+                    self.stats['hits_memoire'] += 1
+                    return True, valeur
+                del self._memoire[cle]
+                self.stats['expirations'] += 1
+            if self._disque is not None:
+                ligne = self._disque.execute('SELECT cree, valeur FROM resultats WHERE cle = ?', (cle,)).fetchone()
+                if ligne and maintenant - ligne[0] <= self.ttl:
+                    valeur = pickle.loads(ligne[1])
+                    self._ranger(cle, ligne[0], valeur)
+                    self.stats['hits_disque'] += 1
+                    return True, valeur
+            self.stats['misses'] += 1
+            return False, None
+
+    def _ranger(self, cle, cree, valeur):
+        """Place une entrée en mémoire et applique la limite LRU (verrou tenu)."""
+        self._memoire[cle] = (cree, valeur)
+        self._memoire.move_to_end(cle)
+        while len(self._memoire) > self.taille_max:
+            self._memoire.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _ecrire(self, cle, valeur):
+        cree = time.time()
+        with self._verrou:
+            self._ranger(cle, cree, valeur)
+            if self._disque is not None:
+                self._disque.execute('INSERT OR REPLACE INTO resultats VALUES (?, ?, ?)',
+                                     (cle, cree, pickle.dumps(valeur)))
+                self._disque.execute('DELETE FROM resultats WHERE cree < ?', (cree - self.ttl,))
+                self._disque.commit()
+
+    def obtenir(self, collection, pipeline, executer=None, **options):
+        """
+        Résultat du pipeline pour la version courante des données.
+        `executer` (par défaut list(collection.aggregate(pipeline, **options)))
+        n'est appelé qu'en cas d'absence dans le cache. Les options
+        d'agrégation (ex. collation) font partie de la clé.
+        """
+        cle_options = {nom: getattr(valeur, 'document', valeur) for nom, valeur in options.items()}
+        cle = cle_pipeline(espace(collection), [pipeline, cle_options] if options else pipeline,
+                           self.version(collection))
+        trouve, valeur = self._lire(cle)
+        if trouve:
+            return valeur
+        valeur = executer() if executer else list(collection.aggregate(pipeline, **options))
+        self._ecrire(cle, valeur)
+        return valeur
+
+    def vider(self):
+        with self._verrou:
+            self._memoire.clear()
+            if self._disque is not None:
+                self._disque.execute('DELETE FROM resultats')
+                self._disque.commit()
+
+    def taux_hits(self):
+        hits = self.stats['hits_memoire'] + self.stats['hits_disque']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
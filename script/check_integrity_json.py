@@ -11,28 +11,38 @@ Définition d’un doublon :
 
 import pandas as pd
 import numpy as np
+import argparse
 import os
 import sys
 
+from formats import est_colonnaire
+
 # === CONFIGURATION ===
 FICHIER_JSON = "../data/FirstTry.medic2.json"  # Fichier JSON MongoDB
 
 
 # === 1. Chargement du fichier JSON ===
 def charger_json(fichier):
-    """Charge un fichier JSON (MongoDB export) et retourne un DataFrame pandas."""
+    """
+    Charge un fichier JSON (export MongoDB, tableau ou une ligne par
+    document) ou un fichier en colonnes (.parquet / .arrow) et retourne un
+    DataFrame pandas. La forme du JSON est reconnue à son premier caractère :
+    le fichier n'est analysé qu'une fois.
+    """
     if not os.path.exists(fichier):
         print(f"❌ Erreur : Le fichier '{fichier}' est introuvable.")
         sys.exit(1)
 
     try:
-        df = pd.read_json(fichier, lines=True)
-    except ValueError:
-        try:
-            df = pd.read_json(fichier)
-        except Exception as e:
-            print(f"❌ Erreur lors du chargement du JSON : {e}")
-            sys.exit(1)
+        if est_colonnaire(fichier):
+            from format_colonnes import lire_table  # pyarrow : fichiers en colonnes seulement
+            return lire_table(fichier)
+        with open(fichier, encoding="utf-8") as f:
+            premier = f.read(4096).lstrip()[:1]
+        df = pd.read_json(fichier, lines=(premier != "["))
+    except Exception as e:
+        print(f"❌ Erreur lors du chargement du fichier : {e}")
+        sys.exit(1)
     return df
 
 
@@ -76,73 +86,110 @@ def verifier_types_mixtes(df):
 
 
 # === 5. Détection avancée de doublons ===
+COLONNES_EXACTES = ["Gender", "Blood Type", "Doctor", "Hospital", "Billing Amount", "Date of Admission"]
+ECART_AGE_MAX = 7
+
+
+def trouver_doublons_personnalises(df):
+    """
+    Recherche vectorisée des paires de doublons personnalisés.
+    Les lignes sont groupées sur le nom normalisé et les colonnes exactes,
+    triées par âge dans chaque groupe, puis chaque ligne est associée aux
+    lignes suivantes du groupe dont l'âge est à ±7 ans (np.searchsorted).
+
+    Retourne (paires, compteurs) : un DataFrame avec une ligne par paire
+    (groupe, index d'origine, nom, âges, hôpital) et un dict de comptages.
+    """
+    colonnes_paires = ["groupe", "index_1", "index_2", "Name", "Age_1", "Age_2", "Hospital"]
+    ages = pd.to_numeric(df["Age"], errors="coerce")
+    travail = df[COLONNES_EXACTES].copy()
+    travail["_norm_name"] = df["Name"].astype(str).str.strip().str.lower()
+    travail["_age"] = ages
+    travail = travail[ages.notna()]
+
+    groupes = travail.groupby(["_norm_name"] + COLONNES_EXACTES, sort=False, dropna=True).ngroup()
+    travail = travail[groupes >= 0].assign(_groupe=groupes[groupes >= 0])
+    travail = travail.sort_values(["_groupe", "_age"], kind="mergesort")
+
+    if travail.empty:
+        paires = pd.DataFrame(columns=colonnes_paires)
+    else:
+        age_np = travail["_age"].to_numpy(dtype=float)
+        # Clé composite croissante : les groupes sont espacés de plus de ECART_AGE_MAX
+        etendue = age_np.max() - age_np.min() + ECART_AGE_MAX + 1
+        cle = travail["_groupe"].to_numpy(dtype=float) * etendue + (age_np - age_np.min())
+        positions = np.arange(len(cle))
+        bornes = np.searchsorted(cle, cle + ECART_AGE_MAX, side="right")
+        nb_partenaires = bornes - positions - 1
+
+        gauche = np.repeat(positions, nb_partenaires)
+        decalage = np.arange(len(gauche)) - np.repeat(np.cumsum(nb_partenaires) - nb_partenaires, nb_partenaires)
+        droite = gauche + 1 + decalage
+
+        index_origine = travail.index.to_numpy()
+        paires = pd.DataFrame({
+            "groupe": travail["_groupe"].to_numpy()[gauche],
+            "index_1": index_origine[gauche],
+            "index_2": index_origine[droite],
+            "Name": df.loc[index_origine[gauche], "Name"].to_numpy(),
+            "Age_1": age_np[gauche],
+            "Age_2": age_np[droite],
+            "Hospital": travail["Hospital"].to_numpy()[gauche],
+        })
+
+    compteurs = {
+        "paires": len(paires),
+        "lignes_concernees": int(pd.concat([paires["index_1"], paires["index_2"]]).nunique()),
+        "groupes_concernes": int(paires["groupe"].nunique()),
+    }
+    return paires, compteurs
+
+
 def verifier_doublons_personnalises(df):
     """
     Vérifie les doublons selon les critères personnalisés :
     - Name (insensible à la casse)
     - Age à ±7 ans
     - Gender, Blood Type, Doctor, Hospital, Billing Amount, Date of Admission
+
+    Retourne le DataFrame complet des paires détectées (None si une colonne manque).
     """
     print("\n🧬 Vérification des doublons personnalisés :")
 
     # Colonnes requises
-    required_cols = [
-        "Name", "Age", "Gender", "Blood Type",
-        "Doctor", "Hospital", "Billing Amount", "Date of Admission"
-    ]
+    required_cols = ["Name", "Age"] + COLONNES_EXACTES
 
     for col in required_cols:
         if col not in df.columns:
             print(f"⚠️ Colonne manquante : {col}. Impossible de détecter les doublons.")
-            return
-
-    # Normalisation du nom pour comparaison insensible à la casse
-    df["_norm_name"] = df["Name"].astype(str).str.strip().str.lower()
-
-    doublons = []
-    df_sorted = df.sort_values(by="_norm_name").reset_index()
-
-    for i in range(len(df_sorted)):
-        for j in range(i + 1, len(df_sorted)):
-            row_i = df_sorted.loc[i]
-            row_j = df_sorted.loc[j]
-
-            # Si noms différents, on peut casser la boucle car trié par nom
-            if row_j["_norm_name"] != row_i["_norm_name"]:
-                break
-
-            # Comparaison selon critères
-            if (
-                abs(row_i["Age"] - row_j["Age"]) <= 7
-                and row_i["Gender"] == row_j["Gender"]
-                and row_i["Blood Type"] == row_j["Blood Type"]
-                and row_i["Doctor"] == row_j["Doctor"]
-                and row_i["Hospital"] == row_j["Hospital"]
-                and row_i["Billing Amount"] == row_j["Billing Amount"]
-                and row_i["Date of Admission"] == row_j["Date of Admission"]
-            ):
-                doublons.append((row_i["Name"], row_i["Age"], row_j["Age"], row_i["Hospital"]))
-
-    if doublons:
-        print(f"⚠️ {len(doublons)} doublon(s) potentiel(s) détecté(s) :")
-        for d in doublons[:10]:  # Affiche les 10 premiers
-            print(f"   → {d[0]} (âges {d[1]} et {d[2]}) à {d[3]}")
+            return None
+
+    paires, compteurs = trouver_doublons_personnalises(df)
+
+    if compteurs["paires"]:
+        print(f"⚠️ {compteurs['paires']} doublon(s) potentiel(s) détecté(s) "
+              f"sur {compteurs['lignes_concernees']} ligne(s) :")
+        for d in paires.head(10).itertuples(index=False):  # Affiche les 10 premiers
+            print(f"   → {d.Name} (âges {d.Age_1:g} et {d.Age_2:g}) à {d.Hospital}")
         print("   → Recommandation : examiner et fusionner les doublons si nécessaire.")
     else:
         print("✅ Aucun doublon personnalisé détecté.")
 
-    # Nettoyage colonne temporaire
-    df.drop(columns=["_norm_name"], inplace=True, errors="ignore")
+    return paires
 
 
 
 
 # === 7. Main ===
 def main():
+    parser = argparse.ArgumentParser(description="Vérification d'intégrité d'un export JSON MongoDB.")
+    parser.add_argument("fichier", nargs="?", default=FICHIER_JSON, help="Export JSON, .parquet ou .arrow")
+    args = parser.parse_args()
+
     print("=== 🧾 Vérification d'intégrité JSON avant migration MongoDB ===")
 
-    df = charger_json(FICHIER_JSON)
-    print(f"\n✅ Fichier chargé avec succès : {FICHIER_JSON}")
+    df = charger_json(args.fichier)
+    print(f"\n✅ Fichier chargé avec succès : {args.fichier}")
     print(f"→ {df.shape[0]} lignes, {df.shape[1]} colonnes")
 
     verifier_colonnes(df)
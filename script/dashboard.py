@@ -0,0 +1,118 @@
+"""
+Script : dashboard.py
+But : Calculer tous les rapports du tableau de bord en un seul parcours de
+      FirstTry.medic2 grâce à une agrégation $facet.
+      Chaque facette reprend tel quel le pipeline d'un rapport du registre
+      (rapports.RAPPORTS), les résultats sont donc identiques à ceux des
+      scripts individuels.
+      Les rapports qui déclarent une collation (MedicationByCancer*,
+      insensibles à la casse) restent hors du $facet : une collation vaut
+      pour toute l'agrégation et changerait les regroupements des autres
+      facettes, et une facette ne peut pas utiliser l'index ci_. Ils sont
+      exécutés à part, par rapports.executer_rapport.
+
+      --benchmark compare le temps total avec les six parcours séparés et
+      vérifie que les chiffres sont les mêmes.
+"""
+
+import argparse
+import time
+
+from pymongo import MongoClient
+
+from rapports import BASE, COLLECTION, MONGO_URI, RAPPORTS, executer_rapport
+
+# Seuls champs lus par les rapports : réduit la taille des documents passés à $facet
+CHAMPS_UTILES = ['Age', 'Blood Type', 'Hospital', 'Medical Condition', 'Medication',
+                 'Test Results', 'Length of Stay']
+
+
+def _collation(nom):
+    return getattr(RAPPORTS[nom], 'collation', None)
+
+
+def pipeline_dashboard(noms=None):
+    """Pipeline $facet regroupant les rapports demandés (tous par défaut) qui n'ont pas de collation."""
+    noms = [nom for nom in noms or RAPPORTS if _collation(nom) is None]
+    return [
+        {'$project': {'_id': 0, **{champ: 1 for champ in CHAMPS_UTILES}}},
+        {'$facet': {nom: RAPPORTS[nom].pipeline for nom in noms}},
+    ]
+
+
+def executer_dashboard(collection, noms=None):
+    """
+    Exécute le $facet, puis les rapports avec collation un par un ;
+    retourne ({nom: documents}, latence en secondes).
+    """
+    noms = list(noms or RAPPORTS)
+    debut = time.perf_counter()
+    pipeline = pipeline_dashboard(noms)
+    document = next(collection.aggregate(pipeline, allowDiskUse=True), {}) if pipeline[-1]['$facet'] else {}
+    for nom in noms:
+        if _collation(nom) is not None:
+            document[nom] = executer_rapport(collection, nom)['resultats']
+    return document, time.perf_counter() - debut
+
+
+def _normaliser(resultats):
+    """Forme comparable d'un résultat : ordre des documents et arrondis neutralisés."""
+    def valeur(v):
+        return round(v, 6) if isinstance(v, float) else v
+    return sorted((tuple(sorted((k, repr(valeur(v))) for k, v in doc.items())) for doc in resultats))
+
+
+def comparer(collection, repetitions=3):
+    """
+    Chronomètre le tableau de bord $facet contre les six agrégations lancées
+    l'une après l'autre (meilleur temps sur `repetitions`) et vérifie la
+    parité des résultats. Retourne un dict de mesures.
+    """
+    meilleur_facet = meilleur_separe = float('inf')
+    for _ in range(repetitions):
+        facettes, latence = executer_dashboard(collection)
+        meilleur_facet = min(meilleur_facet, latence)
+
+        debut = time.perf_counter()
+        separes = {nom: executer_rapport(collection, nom)['resultats'] for nom in RAPPORTS}
+        meilleur_separe = min(meilleur_separe, time.perf_counter() - debut)
+
+    parite = {nom: _normaliser(facettes.get(nom, [])) == _normaliser(separes[nom]) for nom in RAPPORTS}
+    return {
+        'documents': collection.estimated_document_count(),
+        'facet': meilleur_facet,
+        'separes': meilleur_separe,
+        'parite': parite,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tableau de bord en une seule agrégation $facet.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Comparer avec les six parcours séparés et vérifier la parité")
+    parser.add_argument("--repetitions", type=int, default=3)
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[BASE][COLLECTION]
+
+    if args.benchmark:
+        mesures = comparer(collection, args.repetitions)
+        print(f"\n⏱️ Tableau de bord sur {mesures['documents']} documents (meilleur de {args.repetitions})\n")
+        print(f"   $facet (1 parcours)        : {mesures['facet'] * 1000:>10.1f} ms")
+        print(f"   Rapports séparés (6 parcours) : {mesures['separes'] * 1000:>7.1f} ms")
+        if mesures['facet'] > 0:
+            print(f"   Gain                       : x{mesures['separes'] / mesures['facet']:.1f}")
+        print("\n🔎 Parité des résultats :")
+        for nom, ok in mesures['parite'].items():
+            print(f"   {'✅' if ok else '❌'} {nom}")
+        return
+
+    facettes, latence = executer_dashboard(collection)
+    for nom, module in RAPPORTS.items():
+        print(module.formater(facettes.get(nom, [])))
+    print(f"\n⏱️ Tableau de bord calculé en un parcours : {latence * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
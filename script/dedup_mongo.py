@@ -0,0 +1,194 @@
+"""
+Script : dedup_mongo.py
+But : Détecter et traiter les doublons directement dans FirstTry.medic2,
+      sans exporter la collection.
+      Une seule agrégation (allowDiskUse) regroupe les documents sur la clé
+      exacte normalisée (Name, Gender, Blood Type, Doctor, Hospital, Date of
+      Admission, Billing Amount au centime) et ne renvoie que les groupes d'au
+      moins deux documents. La fenêtre d'âge ±7 ans et les règles de
+      check_doublons.fusion_ou_suppression sont appliquées à chaque groupe,
+      puis les mises à jour et suppressions partent par lots de bulk_write.
+      Les collections de résumés (resumes.py) sont corrigées des mêmes
+      suppressions et changements d'âge.
+"""
+
+import argparse
+import math
+import time
+
+from pymongo import DeleteOne, MongoClient, UpdateOne
+
+import resumes
+from cache_rapports import incrementer_version
+
+# === CONFIGURATION ===
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+COLLECTION = 'medic2'
+TAILLE_LOT = 1000
+ECART_AGE_MAX = 7
+CLES_TEXTE = ['Name', 'Gender', 'Blood Type', 'Doctor', 'Hospital']
+# Ordre des membres d'un groupe (le premier d'un couple est conservé) : les ObjectId, dans
+# leur ordre de création, avant les _id texte (clé naturelle de --incremental et de
+# depot_patients.py, sans ordre d'insertion mais stables d'une exécution à l'autre).
+# Le tri a lieu côté serveur : Python ne sait pas comparer un ObjectId et une chaîne.
+ORDRE_MEMBRES = {'type_id': 1, 'id': 1}
+
+
+def _texte_normalise(champ):
+    """Équivalent serveur de normaliser_texte : chaîne, sans espaces, en minuscules."""
+    return {'$toLower': {'$trim': {'input': {'$ifNull': [{'$toString': f'${champ}'}, '']}}}}
+
+
+def _date_normalisee(champ):
+    """Date BSON (import typé) ou texte (ancien import) ramenée à 'AAAA-MM-JJ'."""
+    return {'$cond': [
+        {'$eq': [{'$type': f'${champ}'}, 'date']},
+        {'$dateToString': {'format': '%Y-%m-%d', 'date': f'${champ}'}},
+        _texte_normalise(champ),
+    ]}
+
+
+def pipeline_groupes_doublons():
+    """
+    Pipeline retournant un document par groupe candidat : les membres avec
+    leur âge et leur diagnostic, triés côté serveur par ORDRE_MEMBRES.
+    Les documents dont l'âge ou le montant ne sont pas numériques sont ignorés,
+    comme dans sont_doublons.
+    """
+    cle = {champ: _texte_normalise(champ) for champ in CLES_TEXTE}
+    cle['Date of Admission'] = _date_normalisee('Date of Admission')
+    cle['Billing Amount'] = {'$round': [{'$multiply': ['$_billing', 100]}, 0]}
+    return [
+        {'$addFields': {
+            '_age': {'$convert': {'input': '$Age', 'to': 'double', 'onError': None, 'onNull': None}},
+            '_billing': {'$convert': {'input': '$Billing Amount', 'to': 'double', 'onError': None, 'onNull': None}},
+        }},
+        {'$match': {'_age': {'$ne': None}, '_billing': {'$ne': None}}},
+        {'$group': {
+            '_id': cle,
+            'nb': {'$sum': 1},
+            'membres': {'$push': {
+                'id': '$_id',
+                'type_id': {'$type': '$_id'},
+                'age': '$_age',
+                'age_brut': '$Age',
+                'condition': _texte_normalise('Medical Condition'),
+                'resume': {champ: f'${champ}' for champ in resumes.CHAMPS_RESUMES},
+            }},
+        }},
+        {'$match': {'nb': {'$gte': 2}}},
+        {'$set': {'membres': {'$sortArray': {'input': '$membres', 'sortBy': ORDRE_MEMBRES}}}},
+    ]
+
+
+def apparier(membres):
+    """
+    Même règle que check_doublons.apparier_bloc : chaque membre libre est
+    associé au premier membre suivant encore libre dont l'âge est à ±7 ans.
+    """
+    couples = []
+    libres = list(membres)
+    while libres:
+        premier = libres.pop(0)
+        for idx, autre in enumerate(libres):
+            if abs(premier['age'] - autre['age']) <= ECART_AGE_MAX:
+                couples.append((premier, autre))
+                del libres[idx]
+                break
+    return couples
+
+
+def operations_groupe(membres):
+    """
+    Traduit un groupe en opérations d'écriture selon fusion_ou_suppression :
+    diagnostics différents → suppression des deux documents, sinon le premier
+    garde l'âge moyen arrondi à l'entier supérieur et le second est supprimé.
+    Retourne aussi les deltas à appliquer aux collections de résumés.
+    """
+    operations = []
+    fusions = suppressions = 0
+    supprimes, avant, apres = [], [], []
+    for doc1, doc2 in apparier(membres):
+        if doc1['condition'] != doc2['condition']:
+            suppressions += 1
+            operations += [DeleteOne({'_id': doc1['id']}), DeleteOne({'_id': doc2['id']})]
+            supprimes += [doc1['resume'], doc2['resume']]
+        else:
+            fusions += 1
+            age = int(math.ceil((doc1['age'] + doc2['age']) / 2))
+            # Conserve le type d'origine (texte pour un ancien import, entier sinon)
+            age = str(age) if isinstance(doc1['age_brut'], str) else age
+            operations += [UpdateOne({'_id': doc1['id']}, {'$set': {'Age': age}}),
+                           DeleteOne({'_id': doc2['id']})]
+            supprimes.append(doc2['resume'])
+            avant.append(doc1['resume'])
+            apres.append({**doc1['resume'], 'Age': age})
+    deltas = resumes.fusionner_deltas(resumes.calculer_deltas(supprimes + avant, -1),
+                                      resumes.calculer_deltas(apres, 1))
+    return operations, fusions, suppressions, deltas
+
+
+def dedupliquer(collection, taille_lot=TAILLE_LOT, simulation=False):
+    """
+    Parcourt les groupes candidats en un seul scan d'agrégation et applique les
+    écritures par lots. Avec simulation=True, rien n'est écrit.
+    """
+    stats = {'groupes': 0, 'doublons': 0, 'fusions': 0, 'suppressions': 0,
+             'documents_supprimes': 0, 'documents_modifies': 0}
+    debut = time.perf_counter()
+    en_attente = []
+    deltas_en_attente = []
+
+    def vider():
+        if en_attente and not simulation:
+            result = collection.bulk_write(en_attente, ordered=False)
+            stats['documents_supprimes'] += result.deleted_count
+            stats['documents_modifies'] += result.modified_count
+            resumes.appliquer_deltas(collection.database, resumes.fusionner_deltas(*deltas_en_attente))
+        en_attente.clear()
+        deltas_en_attente.clear()
+
+    for groupe in collection.aggregate(pipeline_groupes_doublons(), allowDiskUse=True):
+        stats['groupes'] += 1
+        operations, fusions, suppressions, deltas = operations_groupe(groupe['membres'])
+        stats['fusions'] += fusions
+        stats['suppressions'] += suppressions
+        stats['doublons'] += fusions + suppressions
+        en_attente.extend(operations)
+        deltas_en_attente.append(deltas)
+        if len(en_attente) >= taille_lot:
+            vider()
+    vider()
+    if not simulation and stats['doublons']:
+        incrementer_version(collection.database, collection.name)
+
+    stats['duree'] = time.perf_counter() - debut
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Déduplication de FirstTry.medic2 côté serveur.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--batch-size", type=int, default=TAILLE_LOT, help="Opérations par bulk_write")
+    parser.add_argument("--simulation", action="store_true", help="Compter les doublons sans rien écrire")
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[BASE][COLLECTION]
+    stats = dedupliquer(collection, args.batch_size, args.simulation)
+
+    print("\n=== Résumé du traitement (MongoDB) ===")
+    print(f"🧺 Groupes candidats : {stats['groupes']}")
+    print(f"🔎 Doublons détectés : {stats['doublons']}")
+    print(f"🔗 Fusions effectuées : {stats['fusions']}")
+    print(f"🗑️ Suppressions effectuées : {stats['suppressions']}")
+    if args.simulation:
+        print("ℹ️ Mode simulation : aucune écriture.")
+    else:
+        print(f"→ {stats['documents_modifies']} documents modifiés, "
+              f"{stats['documents_supprimes']} documents supprimés en {stats['duree']:.2f} s")
+    print("======================================\n")
+
+
+if __name__ == "__main__":
+    main()
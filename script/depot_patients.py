@@ -0,0 +1,172 @@
+"""
+Script : depot_patients.py
+But : Dépôt des patients de FirstTry.medic2 pour les écritures applicatives,
+      à la place du CRUD document par document de CrudTry1.py (insert_one
+      puis update_one / delete_one filtrés sur Name, champ ni indexé ni
+      unique : un parcours de collection et un aller-retour par appel).
+      - Les créations, modifications et suppressions sont mises en attente et
+        envoyées par lots de bulk_write non ordonnés, ciblés sur _id. Un
+        nouveau patient reçoit pour _id le hash de sa clé naturelle
+        (migration.cle_naturelle), comme l'import --incremental.
+      - Write concern (w, j) configurable ; écritures réessayables
+        (retryWrites) : toutes les opérations visent un seul document.
+      - Lectures avec projection limitée aux champs demandés.
+      Les résumés (resumes.py) et la version du cache des rapports
+      (cache_rapports.py) sont mis à jour une fois par lot.
+"""
+
+import time
+from datetime import datetime
+
+from pymongo import DeleteOne, InsertOne, MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+import resumes
+from cache_rapports import incrementer_version
+from instrumentation import METRIQUES
+from migration import BASE, COLLECTION, FORMAT_DATE, MONGO_URI, cle_naturelle
+
+# === CONFIGURATION ===
+TAILLE_LOT = 1000    # Opérations par bulk_write
+CHAMPS_LECTURE = ['Name', 'Age', 'Medical Condition', 'Hospital', 'Date of Admission']  # Projection par défaut
+
+
+def identifiant(doc):
+    """_id du document s'il en a un, sinon hash de sa clé naturelle (dates au format de l'import)."""
+    if doc.get('_id') is not None:
+        return doc['_id']
+    return cle_naturelle({champ: valeur.strftime(FORMAT_DATE) if isinstance(valeur, datetime) else valeur
+                          for champ, valeur in doc.items()})
+
+
+def ouvrir_depot(uri=MONGO_URI, w=1, journal=None, retry_writes=True, **options):
+    """Dépôt sur FirstTry.medic2 avec le write concern et les écritures réessayables demandés."""
+    client = MongoClient(uri, retryWrites=retry_writes)
+    return DepotPatients(client[BASE][COLLECTION], w=w, journal=journal, **options)
+
+
+class DepotPatients:
+    """
+    Écritures en attente regroupées en bulk_write, lectures projetées.
+    S'utilise comme gestionnaire de contexte : les compteurs (stats) et les
+    erreurs d'écriture (erreurs) repartent de zéro à l'entrée du bloc, les
+    opérations restantes sont envoyées à sa sortie (envoyer() les force
+    avant).
+    Une opération sur un _id déjà en attente provoque d'abord l'envoi du
+    lot, pour que l'ordre des opérations d'un même patient soit respecté.
+    """
+
+    def __init__(self, collection, w=1, journal=None, taille_lot=TAILLE_LOT, maj_resumes=True):
+        self.collection = collection.with_options(write_concern=WriteConcern(w=w, j=journal))
+        self.taille_lot = taille_lot
+        self.maj_resumes = maj_resumes
+        self._attente = []      # (type, _id, operation, champs modifiés ou document créé)
+        self._ids = set()
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """Remet à zéro les compteurs et la liste des erreurs d'écriture."""
+        self.stats = {'lots': 0, 'crees': 0, 'modifies': 0, 'supprimes': 0, 'echecs': 0, 'duree': 0.0}
+        self.erreurs = []  # {_id, operation, code, message} de chaque écriture refusée
+
+    def __enter__(self):
+        self.reinitialiser()
+        return self
+
+    def __exit__(self, *exc):
+        self.envoyer()
+
+    # --- Écritures ---
+    def creer(self, doc):
+        """Met en attente l'insertion de `doc` ; retourne son _id."""
+        doc = {**doc, '_id': identifiant(doc)}
+        self._ajouter('creation', doc['_id'], InsertOne(doc), doc)
+        return doc['_id']
+
+    def modifier(self, cle, champs):
+        """Met en attente un $set de `champs` ; `cle` est un _id ou un document (clé naturelle)."""
+        _id = identifiant(cle) if isinstance(cle, dict) else cle
+        self._ajouter('modification', _id, UpdateOne({'_id': _id}, {'$set': champs}), champs)
+
+    def supprimer(self, cle):
+        """Met en attente la suppression ; `cle` est un _id ou un document (clé naturelle)."""
+        _id = identifiant(cle) if isinstance(cle, dict) else cle
+        self._ajouter('suppression', _id, DeleteOne({'_id': _id}), None)
+
+    def _ajouter(self, type_, _id, operation, contenu):
+        if _id in self._ids:
+            self.envoyer()
+        self._attente.append((type_, _id, operation, contenu))
+        self._ids.add(_id)
+        if len(self._attente) >= self.taille_lot:
+            self.envoyer()
+
+    def envoyer(self):
+        """Envoie les opérations en attente en un bulk_write non ordonné ; retourne le nombre d'échecs."""
+        if not self._attente:
+            return 0
+        attente, self._attente, self._ids = self._attente, [], set()
+        debut = time.perf_counter()
+        anciens = {}
+        if self.maj_resumes:
+            # Versions avant écriture des patients modifiés ou supprimés, pour corriger les résumés
+            ids = [_id for type_, _id, _, _ in attente if type_ != 'creation']
+            if ids:
+                projection = dict.fromkeys(resumes.CHAMPS_RESUMES, 1)
+                anciens = {doc['_id']: doc for doc in self.collection.find({'_id': {'$in': ids}}, projection)}
+        try:
+            resultat = self.collection.bulk_write([operation for _, _, operation, _ in attente], ordered=False)
+            en_echec = set()
+            if resultat.acknowledged:
+                comptes = (resultat.inserted_count, resultat.modified_count, resultat.deleted_count)
+            else:  # w=0 : aucun retour du serveur, opérations comptées comme envoyées
+                comptes = [sum(type_ == t for type_, _, _, _ in attente)
+                           for t in ('creation', 'modification', 'suppression')]
+        except BulkWriteError as e:
+            en_echec = {erreur['index'] for erreur in e.details.get('writeErrors', [])}
+            self.erreurs += [{'_id': attente[erreur['index']][1], 'operation': attente[erreur['index']][0],
+                              'code': erreur.get('code'), 'message': erreur.get('errmsg')}
+                             for erreur in e.details.get('writeErrors', [])]
+            comptes = (e.details.get('nInserted', 0), e.details.get('nModified', 0), e.details.get('nRemoved', 0))
+        duree = time.perf_counter() - debut
+        METRIQUES.lot('depot_patients', len(attente), duree, echecs=len(en_echec))
+        self.stats['lots'] += 1
+        self.stats['duree'] += duree
+        self.stats['echecs'] += len(en_echec)
+        for cle, nombre in zip(('crees', 'modifies', 'supprimes'), comptes):
+            self.stats[cle] += nombre
+
+        reussies = [element for i, element in enumerate(attente) if i not in en_echec]
+        if self.maj_resumes:
+            self._maj_resumes(reussies, anciens)
+        if reussies:
+            incrementer_version(self.collection.database, self.collection.name)  # Invalide les rapports en cache
+        return len(en_echec)
+
+    def _maj_resumes(self, reussies, anciens):
+        crees, avant, apres, supprimes = [], [], [], []
+        for type_, _id, _, contenu in reussies:
+            if type_ == 'creation':
+                crees.append(contenu)
+            elif _id not in anciens:
+                continue  # Patient absent : rien n'a été modifié ni supprimé
+            elif type_ == 'modification':
+                avant.append(anciens[_id])
+                apres.append({**anciens[_id], **contenu})
+            else:
+                supprimes.append(anciens[_id])
+        db = self.collection.database
+        resumes.appliquer_deltas(db, resumes.fusionner_deltas(
+            resumes.calculer_deltas(crees, 1), resumes.calculer_deltas(supprimes, -1),
+            resumes.calculer_deltas(avant, -1), resumes.calculer_deltas(apres, 1)))
+
+    # --- Lectures ---
+    def lire(self, ids, champs=None):
+        """Patients d'après leurs _id, limités à `champs` (CHAMPS_LECTURE par défaut) ; dict _id → document."""
+        projection = dict.fromkeys(champs or CHAMPS_LECTURE, 1)
+        return {doc['_id']: doc for doc in self.collection.find({'_id': {'$in': list(ids)}}, projection)}
+
+    def trouver(self, filtre, champs=None, limite=0):
+        """Curseur sur les patients correspondant à `filtre`, limités à `champs` (CHAMPS_LECTURE par défaut)."""
+        return self.collection.find(filtre, dict.fromkeys(champs or CHAMPS_LECTURE, 1), limit=limite)
@@ -0,0 +1,166 @@
+"""
+Script : format_colonnes.py
+But : Format d'échange en colonnes entre les étapes purge → intégrité →
+      migration : Parquet (.parquet) ou Arrow IPC / Feather (.arrow,
+      .feather), à la place du CSV ou du JSON qu'il faut réanalyser et
+      retyper à chaque étape.
+      Les colonnes sont écrites typées (Age et durée de séjour en entiers,
+      Billing Amount en double, dates en timestamps) et les champs
+      catégoriels sont encodés en dictionnaire. Une valeur illisible devient
+      null.
+      pyarrow est optionnel : il n'est requis que pour ces extensions, le CSV
+      reste le format par défaut.
+
+Conversion : python format_colonnes.py healthcare_dataset_purge.csv healthcare_dataset_purge.parquet
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from formats import CHAMP_DUREE_SEJOUR, CHAMPS_CATEGORIELS, CHAMPS_DATES, FORMAT_DATE, est_colonnaire  # noqa: F401
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow optionnel
+    pa = pq = None
+
+# === CONFIGURATION ===
+COMPRESSION = 'zstd'
+CHAMPS_ENTIERS = ['Age', CHAMP_DUREE_SEJOUR]
+CHAMPS_DECIMAUX = ['Billing Amount']
+CHAMPS_DICTIONNAIRE = list(CHAMPS_CATEGORIELS)  # Faible cardinalité : encodés en dictionnaire
+
+
+def _exiger_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow est requis pour les fichiers .parquet / .arrow / .feather : pip install pyarrow")
+
+
+def typer_dataframe(df):
+    """
+    Typage vectorisé équivalent à migration.convertir_document : une valeur
+    illisible devient NaN / NaT (elle est ignorée par les moyennes, comme
+    une chaîne par $avg côté Mongo). Sans effet sur les colonnes déjà typées.
+    """
+    df = df.copy()
+    if 'Age' in df and not pd.api.types.is_numeric_dtype(df['Age']):
+        df['Age'] = np.trunc(pd.to_numeric(df['Age'], errors='coerce'))
+    for champ in CHAMPS_DATES:
+        if champ in df and not pd.api.types.is_datetime64_any_dtype(df[champ]):
+            df[champ] = pd.to_datetime(df[champ].astype(str).str.strip(), format=FORMAT_DATE, errors='coerce')
+    if CHAMP_DUREE_SEJOUR not in df and all(champ in df for champ in CHAMPS_DATES):
+        df[CHAMP_DUREE_SEJOUR] = (df[CHAMPS_DATES[1]] - df[CHAMPS_DATES[0]]).dt.days
+    for champ, normaliser in CHAMPS_CATEGORIELS.items():
+        if champ in df and (pd.api.types.is_object_dtype(df[champ]) or pd.api.types.is_string_dtype(df[champ])):
+            chaines = df[champ].map(lambda v: isinstance(v, str))
+            df.loc[chaines, champ] = df.loc[chaines, champ].str.strip().map(normaliser)
+    return df
+
+
+def preparer_colonnes(df):
+    """DataFrame typé prêt à écrire : entiers nullables, dates en ms, catégories."""
+    df = typer_dataframe(df)
+    for champ in CHAMPS_ENTIERS:
+        if champ in df:
+            df[champ] = pd.to_numeric(df[champ], errors='coerce').round().astype('Int64')
+    for champ in CHAMPS_DECIMAUX:
+        if champ in df:
+            df[champ] = pd.to_numeric(df[champ], errors='coerce').astype('float64')
+    for champ in CHAMPS_DATES:
+        if champ in df:
+            df[champ] = df[champ].astype('datetime64[ms]')
+    for champ in CHAMPS_DICTIONNAIRE:
+        if champ in df:
+            df[champ] = df[champ].astype('category')
+    return df
+
+
+def vers_texte(df):
+    """
+    Représentation texte d'un DataFrame typé, identique à une lecture CSV
+    dtype=str / keep_default_na=False : pour les étapes qui raisonnent sur
+    le texte (profilage, purge du pipeline).
+    """
+    texte = pd.DataFrame(index=df.index)
+    for champ in df.columns:
+        serie = df[champ]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            serie = serie.dt.strftime(FORMAT_DATE)
+        texte[champ] = serie.astype(object).where(serie.notna(), '').astype(str)
+    return texte
+
+
+def lire_table(chemin, colonnes=None):
+    """DataFrame typé depuis un fichier en colonnes (seulement `colonnes` si précisé)."""
+    _exiger_pyarrow()
+    if str(chemin).lower().endswith('.parquet'):
+        return pd.read_parquet(chemin, columns=colonnes)
+    return pd.read_feather(chemin, columns=colonnes)
+
+
+def ecrire_table(df, chemin):
+    """Écrit `df` typé et encodé en dictionnaire au format déduit de l'extension."""
+    _exiger_pyarrow()
+    df = preparer_colonnes(df).reset_index(drop=True)
+    if str(chemin).lower().endswith('.parquet'):
+        df.to_parquet(chemin, index=False, compression=COMPRESSION)
+    else:
+        df.to_feather(chemin, compression=COMPRESSION)
+
+
+def _lots_enregistrements(chemin, taille_lot):
+    if str(chemin).lower().endswith('.parquet'):
+        yield from pq.ParquetFile(chemin).iter_batches(batch_size=taille_lot)
+        return
+    with pa.memory_map(str(chemin)) as source:
+        lecteur = pa.ipc.open_file(source)
+        for i in range(lecteur.num_record_batches):
+            lot = lecteur.get_batch(i)
+            for debut in range(0, lot.num_rows, taille_lot):
+                yield lot.slice(debut, taille_lot)
+
+
+def lire_par_tranches(chemin, taille):
+    """DataFrames typés d'au plus `taille` lignes : mémoire bornée quelle que soit la taille du fichier."""
+    _exiger_pyarrow()
+    for lot in _lots_enregistrements(chemin, taille):
+        yield lot.to_pandas()
+
+
+def lire_par_lots(chemin, taille_lot):
+    """
+    Documents MongoDB par lots depuis un fichier en colonnes, sans
+    réanalyse : les types du fichier sont repris tels quels (entiers,
+    doubles, datetime, chaînes pour les catégories). Les valeurs null sont
+    omises du document, comme un champ absent.
+    """
+    _exiger_pyarrow()
+    for lot in _lots_enregistrements(chemin, taille_lot):
+        yield [{champ: valeur for champ, valeur in ligne.items() if valeur is not None}
+               for ligne in lot.to_pylist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversion CSV ↔ Parquet / Arrow du dataset santé.")
+    parser.add_argument("entree", help="Fichier source (.csv, .parquet, .arrow, .feather)")
+    parser.add_argument("sortie", help="Fichier produit (format déduit de l'extension)")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    df = lire_table(args.entree) if est_colonnaire(args.entree) else pd.read_csv(
+        args.entree, dtype=str, keep_default_na=False)
+    if est_colonnaire(args.sortie):
+        ecrire_table(df, args.sortie)
+    else:
+        vers_texte(df).to_csv(args.sortie, index=False)
+    print(f"✅ {args.entree} → {args.sortie} : {len(df)} lignes en {time.perf_counter() - debut:.2f} s "
+          f"({os.path.getsize(args.entree) / 1e6:.1f} Mo → {os.path.getsize(args.sortie) / 1e6:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Script : formats.py
+But : Constantes de typage du dataset santé et extensions des formats en
+      colonnes, partagées par la purge, le contrôle d'intégrité, la
+      conversion (format_colonnes.py) et l'import (migration.py).
+      Module sans dépendance : les scripts de purge l'importent sans tirer
+      pymongo ni pyarrow ; format_colonnes n'est importé que pour un fichier
+      .parquet / .arrow / .feather.
+"""
+
+FORMAT_DATE = '%Y-%m-%d'
+CHAMPS_DATES = ['Date of Admission', 'Discharge Date']
+CHAMP_DUREE_SEJOUR = 'Length of Stay'  # Jours entre admission et sortie
+# Champs à faible cardinalité : normalisés pour que les $group/$match soient stables
+CHAMPS_CATEGORIELS = {
+    'Gender': str.capitalize,
+    'Blood Type': str.upper,
+    'Medical Condition': str.capitalize,
+    'Admission Type': str.capitalize,
+    'Medication': str.capitalize,
+    'Test Results': str.capitalize,
+    'Insurance Provider': str.strip,
+}
+
+EXTENSIONS_COLONNES = ('.parquet', '.arrow', '.feather')
+
+
+def est_colonnaire(chemin):
+    return str(chemin).lower().endswith(EXTENSIONS_COLONNES)
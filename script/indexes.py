@@ -0,0 +1,221 @@
+"""
+Script : indexes.py
+But : Déclarer et créer les index dont les rapports de script/ ont besoin.
+      Les index sont créés après le chargement en masse (pas avant) pour que
+      l'import reste rapide ; create_index est idempotent, relancer le script
+      ne recrée rien. Chaque rapport est ensuite vérifié via explain() pour
+      s'assurer qu'il n'est plus servi par un COLLSCAN : ce sont les
+      pipelines du registre rapports.RAPPORTS qui sont expliqués, avec leur
+      collation et leur hint.
+      Un rapport qui regroupe toute la collection (ByBlood, TopHospital,
+      AgeByDesease) désigne son index par l'attribut `index` ; il est passé
+      en hint à aggregate seulement s'il existe (hint_si_present), pour que
+      le rapport reste exécutable sans index.
+      Les index ci_ portent la collation insensible à la casse (COLLATION)
+      utilisée par requetes.py : ils ne servent que les requêtes qui
+      déclarent cette même collation.
+"""
+
+import argparse
+
+from pymongo import ASCENDING, MongoClient
+from pymongo.collation import Collation, CollationStrength
+
+# === CONFIGURATION ===
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+COLLECTION = 'medic2'
+
+# Collation de force 2 : comparaison insensible à la casse (voir requetes.py)
+COLLATION = Collation(locale='en', strength=CollationStrength.SECONDARY)
+
+# Index déclarés : nom → (clés, rapports servis[, collation])
+INDEXES = {
+    'condition_age': (
+        [('Medical Condition', ASCENDING), ('Age', ASCENDING)],
+        ['AgeByDesease.py'],
+    ),
+    'name': (
+        [('Name', ASCENDING)],
+        ['CrudTry1.py'],
+    ),
+    'hospital': (
+        [('Hospital', ASCENDING)],
+        ['TopHospital.py'],
+    ),
+    'blood_type': (
+        [('Blood Type', ASCENDING)],
+        ['ByBlood.py'],
+    ),
+    'ci_condition_medication_resultats': (
+        [('Medical Condition', ASCENDING), ('Medication', ASCENDING), ('Test Results', ASCENDING)],
+        ['MedicationByCancer.py', 'MedicationByCancerAndResults.py', 'requetes.py'],
+        COLLATION,
+    ),
+    'ci_hospital': (
+        [('Hospital', ASCENDING)],
+        ['requetes.py'],
+        COLLATION,
+    ),
+    'ci_doctor': (
+        [('Doctor', ASCENDING)],
+        ['requetes.py'],
+        COLLATION,
+    ),
+    'ci_name': (
+        [('Name', ASCENDING)],
+        ['requetes.py'],
+        COLLATION,
+    ),
+}
+
+# Requêtes de vérification hors registre des rapports : pipeline, index attendu[, collation]
+VERIFICATIONS = {
+    'CrudTry1.py': (
+        [{'$match': {'Name': 'John Doe'}}],
+        'name',
+    ),
+    'requetes.py --condition cancer': (
+        [{'$match': {'Medical Condition': 'cancer'}},
+         {'$group': {'_id': '$Medication', 'count': {'$sum': 1}}}],
+        'ci_condition_medication_resultats',
+        COLLATION,
+    ),
+    'requetes.py --hopital': (
+        [{'$match': {'Hospital': 'sons and miller'}}],
+        'ci_hospital',
+        COLLATION,
+    ),
+    'requetes.py --medecin': (
+        [{'$match': {'Doctor': 'matthew smith'}}],
+        'ci_doctor',
+        COLLATION,
+    ),
+}
+
+
+def hint_si_present(collection, index):
+    """{'hint': index} si l'index existe sur la collection, sinon {} (plan choisi par le serveur)."""
+    if index and index in {i['name'] for i in collection.list_indexes()}:
+        return {'hint': index}
+    return {}
+
+
+def index_declare(fichier):
+    """Nom de l'index déclaré dans INDEXES pour servir `fichier` (ex. 'ByBlood.py'), ou None."""
+    return next((nom for nom, (_, rapports, *_) in INDEXES.items() if fichier in rapports), None)
+
+
+def requetes_verification():
+    """
+    {rapport: (pipeline, index attendu, collation, hint)} : les pipelines réels
+    du registre des rapports, puis les requêtes de VERIFICATIONS.
+    """
+    # Import local : rapports importe les modules des rapports, qui importent ce module
+    from rapports import RAPPORTS
+    requetes = {}
+    for nom, module in RAPPORTS.items():
+        attendu = index_declare(f"{nom}.py")
+        if attendu:
+            requetes[f"{nom}.py"] = (module.pipeline, attendu, getattr(module, 'collation', None),
+                                     getattr(module, 'index', None))
+    for rapport, (pipeline, attendu, *collation) in VERIFICATIONS.items():
+        requetes[rapport] = (pipeline, attendu, collation[0] if collation else None, None)
+    return requetes
+
+
+def creer_indexes(collection):
+    """Crée (ou confirme) chaque index déclaré. Retourne la liste des noms."""
+    noms = []
+    for nom, (cles, _, *collation) in INDEXES.items():
+        options = {'collation': collation[0]} if collation else {}
+        noms.append(collection.create_index(cles, name=nom, **options))
+    return noms
+
+
+def etapes_plan(plan):
+    """Liste à plat des étapes (stage) d'un plan gagnant."""
+    etapes = [plan.get('stage')]
+    for enfant in ('inputStage', 'queryPlan'):
+        if enfant in plan:
+            etapes += etapes_plan(plan[enfant])
+    for sous_plan in plan.get('inputStages', []):
+        etapes += etapes_plan(sous_plan)
+    return [e for e in etapes if e]
+
+
+def plan_gagnant(explication):
+    """Extrait le winningPlan d'un explain d'agrégation (formats classique et SBE)."""
+    if 'queryPlanner' in explication:
+        return explication['queryPlanner']['winningPlan']
+    for etape in explication.get('stages', []):
+        if '$cursor' in etape:
+            return etape['$cursor']['queryPlanner']['winningPlan']
+    for shard in explication.get('shards', {}).values():
+        return plan_gagnant(shard)
+    return {}
+
+
+def statistiques_execution(explication):
+    """executionStats d'un explain d'agrégation en mode executionStats (formats classique et SBE)."""
+    if 'executionStats' in explication:
+        return explication['executionStats']
+    for etape in explication.get('stages', []):
+        if 'executionStats' in etape.get('$cursor', {}):
+            return etape['$cursor']['executionStats']
+    for shard in explication.get('shards', {}).values():
+        return statistiques_execution(shard)
+    return {}
+
+
+def verifier_indexes(db, collection_nom=COLLECTION):
+    """
+    Explique chaque requête de vérification (requetes_verification) et
+    retourne, par rapport, l'index attendu, les étapes du plan, si le plan
+    est servi par un index (IXSCAN) et s'il est couvert (IXSCAN sans FETCH
+    ni COLLSCAN).
+    """
+    resultats = {}
+    for rapport, (pipeline, index_attendu, collation, index) in requetes_verification().items():
+        commande = {'aggregate': collection_nom, 'pipeline': pipeline, 'cursor': {}}
+        if collation is not None:
+            commande['collation'] = collation.document
+        commande.update(hint_si_present(db[collection_nom], index))
+        explication = db.command('explain', commande, verbosity='queryPlanner')
+        plan = plan_gagnant(explication)
+        etapes = etapes_plan(plan)
+        ixscan = 'IXSCAN' in etapes or 'DISTINCT_SCAN' in etapes
+        resultats[rapport] = {
+            'index': index_attendu,
+            'etapes': etapes,
+            'ixscan': ixscan,
+            'couvert': ixscan and 'COLLSCAN' not in etapes and 'FETCH' not in etapes,
+        }
+    return resultats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Création et vérification des index des rapports.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--verifier-seulement", action="store_true", help="Ne pas créer, seulement expliquer")
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[BASE]
+    collection = db[COLLECTION]
+
+    if not args.verifier_seulement:
+        print("\n🗂️ Création des index (idempotente) :")
+        for nom in creer_indexes(collection):
+            cles, rapports, *_ = INDEXES[nom]
+            print(f"   ✅ {nom:<32} {[c for c, _ in cles]} → {', '.join(rapports)}")
+
+    print("\n🔬 Vérification des plans via explain() :")
+    print("{:<35}{:<34}{:<10}{}".format("Rapport", "Index attendu", "Couvert", "Étapes"))
+    print("-" * 110)
+    for rapport, r in verifier_indexes(db).items():
+        statut = "✅" if r['couvert'] else ("🟡" if r['ixscan'] else "❌")
+        print("{:<35}{:<34}{:<10}{}".format(rapport, r['index'], statut, " → ".join(r['etapes'])))
+
+
+if __name__ == "__main__":
+    main()
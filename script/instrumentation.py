@@ -0,0 +1,254 @@
+"""
+Script : instrumentation.py
+But : Mesures communes à toutes les étapes (purge, intégrité, import,
+      rapports) pour comprendre pourquoi une exécution est lente.
+      - Étapes chronométrées (Metriques.etape) : temps mur, lignes ou
+        documents par seconde, pic de mémoire résidente (RSS) du processus.
+      - Lots (Metriques.lot) : nombre, taille et durée des lots écrits.
+      - Temps serveur MongoDB d'une agrégation (explain executionStats) et
+        latences cumulées de la collection ($collStats).
+      Les mesures sont ajoutées à un fichier JSON lines (--metriques) et/ou
+      exposées au format texte Prometheus (--metriques-port, GET /metrics).
+      Les événements par ligne (fusion, suppression...) passent par un
+      journal échantillonné : un événement sur --echantillon est écrit en
+      JSON via logging, les compteurs restent exacts.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows : pas de pic RSS
+    resource = None
+
+# === CONFIGURATION ===
+PREFIXE = 'medic'          # Préfixe des métriques Prometheus
+ECHANTILLON = 1000         # 1 événement par ligne journalisé sur ECHANTILLON
+HOTE_METRIQUES = '127.0.0.1'
+
+
+def rss_max():
+    """Pic de mémoire résidente du processus depuis son démarrage, en octets (None si indisponible)."""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic if sys.platform == 'darwin' else pic * 1024  # Linux : kilo-octets
+
+
+def _cle(nom, etiquettes):
+    return nom, tuple(sorted(etiquettes.items()))
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquettes_prometheus(etiquettes):
+    if not etiquettes:
+        return ''
+    return '{' + ','.join(f'{k}="{_echapper(v)}"' for k, v in etiquettes) + '}'
+
+
+class Metriques:
+    """
+    Registre de compteurs et de jauges étiquetés, partagé entre threads.
+    Chaque étape et chaque lot sont aussi écrits comme un événement dans le
+    fichier JSON lines s'il est configuré.
+    """
+
+    def __init__(self, fichier=None):
+        self.fichier = fichier
+        self._verrou = threading.Lock()
+        self._compteurs = defaultdict(float)
+        self._jauges = {}
+
+    def incrementer(self, nom, valeur=1, **etiquettes):
+        with self._verrou:
+            self._compteurs[_cle(nom, etiquettes)] += valeur
+
+    def jauge(self, nom, valeur, **etiquettes):
+        with self._verrou:
+            self._jauges[_cle(nom, etiquettes)] = valeur
+
+    def enregistrer(self, type_, **champs):
+        """Ajoute un événement horodaté au fichier JSON lines (sans effet s'il n'y en a pas)."""
+        if not self.fichier:
+            return
+        ligne = json.dumps({'horodatage': datetime.now().isoformat(timespec='milliseconds'), 'type': type_,
+                            **champs}, ensure_ascii=False, default=str)
+        with self._verrou, open(self.fichier, 'a', encoding='utf-8') as f:
+            f.write(ligne + '\n')
+
+    @contextmanager
+    def etape(self, nom, **etiquettes):
+        """
+        Chronomètre une étape. Le dict produit accepte 'lignes' (lignes ou
+        documents traités, pour le débit) et tout autre champ à enregistrer.
+        """
+        mesure = {}
+        debut = time.perf_counter()
+        try:
+            yield mesure
+        finally:
+            duree = time.perf_counter() - debut
+            lignes = mesure.pop('lignes', None)
+            debit = lignes / duree if lignes is not None and duree > 0 else None
+            pic = rss_max()
+            self.incrementer('etape_executions_total', etape=nom, **etiquettes)
+            self.incrementer('etape_duree_secondes_total', duree, etape=nom, **etiquettes)
+            if lignes is not None:
+                self.incrementer('etape_lignes_total', lignes, etape=nom, **etiquettes)
+                self.jauge('etape_lignes_par_seconde', debit, etape=nom, **etiquettes)
+            if pic is not None:
+                self.jauge('rss_max_octets', pic)
+            self.enregistrer('etape', etape=nom, **etiquettes, duree=duree, lignes=lignes,
+                             lignes_par_seconde=debit, rss_max=pic, **mesure)
+
+    def lot(self, etape, taille, duree, echecs=0):
+        """Un lot de `taille` documents écrit en `duree` secondes."""
+        self.incrementer('lots_total', etape=etape)
+        self.incrementer('lot_documents_total', taille, etape=etape)
+        self.incrementer('lot_duree_secondes_total', duree, etape=etape)
+        if echecs:
+            self.incrementer('lot_echecs_total', echecs, etape=etape)
+        self.enregistrer('lot', etape=etape, taille=taille, duree=duree, echecs=echecs)
+
+    def exposition(self):
+        """Texte au format d'exposition Prometheus."""
+        with self._verrou:
+            series = [('counter', self._compteurs), ('gauge', self._jauges)]
+            lignes = []
+            for type_, valeurs in series:
+                deja = set()
+                for (nom, etiquettes), valeur in sorted(valeurs.items()):
+                    if valeur is None:
+                        continue
+                    if nom not in deja:
+                        lignes.append(f"# TYPE {PREFIXE}_{nom} {type_}")
+                        deja.add(nom)
+                    lignes.append(f"{PREFIXE}_{nom}{_etiquettes_prometheus(etiquettes)} {float(valeur)!r}")
+        return '\n'.join(lignes) + '\n'
+
+    def servir(self, port, hote=HOTE_METRIQUES):
+        """Expose GET /metrics dans un thread démon ; retourne le serveur HTTP."""
+        registre = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/metriques'):
+                    self.send_error(404)
+                    return
+                corps = registre.exposition().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, *args):
+                pass
+
+        serveur = ThreadingHTTPServer((hote, port), Gestionnaire)
+        threading.Thread(target=serveur.serve_forever, daemon=True, name='metriques').start()
+        return serveur
+
+
+class JournalEchantillonne:
+    """
+    Journal structuré des événements par ligne : tous sont comptés, seul le
+    premier puis un sur `taux` de chaque type est écrit (JSON, niveau INFO).
+    """
+
+    def __init__(self, nom=PREFIXE, taux=ECHANTILLON, metriques=None):
+        self.logger = logging.getLogger(nom)
+        self.taux = max(1, taux)
+        self.metriques = metriques
+        self._verrou = threading.Lock()
+        self.compteurs = defaultdict(int)
+
+    def evenement(self, type_, **champs):
+        with self._verrou:
+            self.compteurs[type_] += 1
+            n = self.compteurs[type_]
+        if self.metriques is not None:
+            self.metriques.incrementer('evenements_total', evenement=type_)
+        if (n - 1) % self.taux == 0 and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(json.dumps({'evenement': type_, 'n': n, **champs}, ensure_ascii=False, default=str))
+
+
+# Instances partagées par les scripts d'un même processus
+METRIQUES = Metriques()
+JOURNAL = JournalEchantillonne(metriques=METRIQUES)
+
+
+# === MongoDB ===
+def temps_explain(noeud):
+    """Plus grand executionTimeMillis(Estimate) d'un explain (tous formats), en ms."""
+    temps = [0]
+    if isinstance(noeud, dict):
+        for cle, valeur in noeud.items():
+            if cle in ('executionTimeMillis', 'executionTimeMillisEstimate') and isinstance(valeur, (int, float)):
+                temps.append(valeur)
+            else:
+                temps.append(temps_explain(valeur))
+    elif isinstance(noeud, list):
+        temps += [temps_explain(element) for element in noeud]
+    return max(temps)
+
+
+def temps_serveur(collection, pipeline, collation=None, hint=None):
+    """
+    Temps d'exécution d'une agrégation côté serveur, en secondes, d'après
+    explain en mode executionStats (le pipeline est réellement exécuté).
+    """
+    commande = {'aggregate': collection.name, 'pipeline': pipeline, 'cursor': {}}
+    if collation is not None:
+        commande['collation'] = collation.document
+    if hint is not None:
+        commande['hint'] = hint
+    explication = collection.database.command('explain', commande, verbosity='executionStats')
+    return temps_explain(explication) / 1000
+
+
+def latences_collection(collection):
+    """Latences cumulées de la collection ($collStats) : {reads|writes|commands: {latence (s), ops}}."""
+    stats = next(collection.aggregate([{'$collStats': {'latencyStats': {}}}]), {})
+    latences = stats.get('latencyStats', {})
+    return {op: {'latence': latences.get(op, {}).get('latency', 0) / 1e6, 'ops': latences.get(op, {}).get('ops', 0)}
+            for op in ('reads', 'writes', 'commands')}
+
+
+def ecart_latences(avant, apres):
+    """Latence et opérations ajoutées entre deux relevés de latences_collection."""
+    return {op: {cle: apres[op][cle] - avant[op][cle] for cle in ('latence', 'ops')} for op in apres}
+
+
+# === CLI ===
+def ajouter_options(parser):
+    """Options communes : --metriques, --metriques-port, --echantillon, --niveau-journal."""
+    groupe = parser.add_argument_group("instrumentation")
+    groupe.add_argument("--metriques", metavar="FICHIER", help="Ajouter les mesures à ce fichier JSON lines")
+    groupe.add_argument("--metriques-port", type=int, metavar="PORT",
+                        help="Exposer les mesures au format Prometheus sur http://127.0.0.1:PORT/metrics")
+    groupe.add_argument("--echantillon", type=int, default=ECHANTILLON,
+                        help="Journaliser 1 événement par ligne sur N (1 = tous)")
+    groupe.add_argument("--niveau-journal", default="INFO", help="Niveau du journal structuré (INFO, WARNING...)")
+
+
+def configurer(args):
+    """Applique les options de ajouter_options aux instances partagées."""
+    logging.basicConfig(level=args.niveau_journal.upper(), format="%(asctime)s %(name)s %(message)s",
+                        stream=sys.stderr)
+    METRIQUES.fichier = args.metriques
+    JOURNAL.taux = max(1, args.echantillon)
+    if args.metriques_port:
+        METRIQUES.servir(args.metriques_port)
+        print(f"📈 Mesures sur http://{HOTE_METRIQUES}:{args.metriques_port}/metrics")
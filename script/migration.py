@@ -1,28 +1,564 @@
+"""
+Script : migration.py
+But : Importer le fichier CSV purgé dans la collection MongoDB FirstTry.medic2.
+      Le fichier est lu en flux par lots de taille fixe : un thread lit et
+      prépare les lots pendant que le thread principal les écrit avec des
+      insert_many non ordonnés. La mémoire reste bornée (quelques lots en
+      attente au maximum) quelle que soit la taille du fichier.
+      Avec --workers N, le fichier est découpé en tranches d'octets alignées
+      sur les fins de ligne : un pool de processus analyse les tranches et un
+      pool de threads partageant un MongoClient écrit les documents.
+      Chaque ligne est typée pendant la lecture (convertir_document) : Age en
+      entier, Billing Amount en double, dates en dates BSON, durée de séjour
+      précalculée et champs catégoriels normalisés.
+      Avec --incremental, chaque ligne reçoit un _id dérivé de sa clé naturelle
+      et une empreinte de son contenu : seules les lignes nouvelles ou
+      modifiées sont upsertées. Une ligne dont la clé naturelle répète celle
+      d'une ligne précédente du fichier est ignorée et signalée. Un point de reprise par fichier (empreinte
+      SHA-1 du fichier entier) est tenu dans la collection
+      migration_checkpoints. Les lignes retirées du fichier ne sont pas
+      supprimées de la collection.
+      Un fichier .parquet / .arrow (format_colonnes.py) est lu par lots
+      d'enregistrements déjà typés, sans analyse ni conversion de texte.
+      Chaque lot écrit (taille, durée, échecs) et l'import complet (débit,
+      pic mémoire) sont mesurés par instrumentation.py (--metriques).
+"""
+
+import argparse
 import csv
-from pymongo import MongoClient
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from pymongo.write_concern import WriteConcern
 
-# Connexion à la base MongoDB locale
-client = MongoClient('mongodb://localhost:27017')
-db = client['FirstTry']
-collection = db['medic2']
+import instrumentation
+import resumes
+from cache_rapports import incrementer_version
+from formats import CHAMP_DUREE_SEJOUR, CHAMPS_CATEGORIELS, CHAMPS_DATES, FORMAT_DATE, est_colonnaire
+from indexes import creer_indexes
+from instrumentation import METRIQUES
 
+# === CONFIGURATION ===
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+COLLECTION = 'medic2'
+COLLECTION_CONTROLE = 'migration_checkpoints'  # Points de reprise du mode incrémental
 
 # Chemin vers votre fichier CSV
 csv_file_path = 'healthcare_dataset_purge.csv'
 # csv_file_path = '../data/healthcare_dataset_purge.csv'
 
+TAILLE_LOT = 5000      # Nombre de documents par insert_many
+LOTS_EN_ATTENTE = 4    # Lots lus d'avance : borne la mémoire utilisée
+_FIN = object()        # Marqueur de fin de flux dans la file
+TAILLE_SHARD = 8 * 1024 * 1024  # Octets par tranche en mode --workers
+
+CHAMP_EMPREINTE = '_empreinte'  # Hash du contenu de la ligne source (--incremental)
+# Colonnes de la clé naturelle (en plus de Age en entier et de Billing Amount arrondi au centime)
+CLE_NATURELLE = ['Name', 'Gender', 'Blood Type', 'Doctor', 'Hospital', 'Date of Admission', 'Medical Condition']
+
+
+def _en_entier(valeur):
+    return int(float(valeur))
+
+
+def _en_date(valeur):
+    try:
+        return datetime.strptime(valeur.strip(), FORMAT_DATE)
+    except ValueError:
+        return datetime.fromisoformat(valeur.strip())
+
+
+def convertir_document(row):
+    """
+    Convertit une ligne CSV (toutes valeurs texte) en document typé.
+    Une valeur vide ou illisible est laissée telle quelle plutôt que perdue.
+    """
+    doc = dict(row)
+    for champ, conversion in (('Age', _en_entier), ('Billing Amount', float)):
+        try:
+            doc[champ] = conversion(doc[champ])
+        except (KeyError, TypeError, ValueError):
+            pass
+    for champ in CHAMPS_DATES:
+        try:
+            doc[champ] = _en_date(doc[champ])
+        except (KeyError, AttributeError, ValueError):
+            pass
+    admission = doc.get('Date of Admission')
+    sortie = doc.get('Discharge Date')
+    if isinstance(admission, datetime) and isinstance(sortie, datetime):
+        doc[CHAMP_DUREE_SEJOUR] = (sortie - admission).days
+    for champ, normaliser in CHAMPS_CATEGORIELS.items():
+        valeur = doc.get(champ)
+        if isinstance(valeur, str):
+            doc[champ] = normaliser(valeur.strip())
+    return doc
+
+
+def lire_par_lots(chemin, taille_lot=TAILLE_LOT, typage=True):
+    """
+    Lit le CSV en flux et produit des listes d'au plus taille_lot documents,
+    typés par convertir_document sauf si typage=False. Un fichier en
+    colonnes est déjà typé : ses lots sont repris tels quels.
+    """
+    if est_colonnaire(chemin):
+        from format_colonnes import lire_par_lots as lire_par_lots_colonnes  # pyarrow : fichiers en colonnes seulement
+        yield from lire_par_lots_colonnes(chemin, taille_lot)
+        return
+    with open(chemin, mode='r', encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)  # Lecture en dict pour avoir les colonnes comme clés
+        lot = []
+        for row in reader:
+            lot.append(convertir_document(row) if typage else row)
+            if len(lot) >= taille_lot:
+                yield lot
+                lot = []
+        if lot:
+            yield lot
+
+
+def _producteur(lots, file_lots, erreurs):
+    """Pousse les lots dans la file ; le put bloquant applique la contre-pression."""
+    try:
+        for lot in lots:
+            file_lots.put(lot)
+    except Exception as e:
+        erreurs.append(e)
+    finally:
+        file_lots.put(_FIN)
+
+
+def inserer_lot(collection, lot, maj_resumes=False):
+    """
+    Insère un lot en mode non ordonné.
+    Retourne (documents insérés, documents en échec) sans lever d'exception :
+    un lot en erreur n'interrompt pas l'import. Avec maj_resumes, les
+    collections de résumés sont incrémentées des seuls documents insérés.
+    """
+    debut = time.perf_counter()
+    try:
+        collection.insert_many(lot, ordered=False)
+        inseres = lot
+    except BulkWriteError as e:
+        en_echec = {erreur['index'] for erreur in e.details.get('writeErrors', [])}
+        inseres = [doc for i, doc in enumerate(lot) if i not in en_echec]
+    except PyMongoError as e:
+        print(f"⚠️ Lot en échec ({len(lot)} documents) : {e}")
+        METRIQUES.lot('ingestion', len(lot), time.perf_counter() - debut, echecs=len(lot))
+        return 0, len(lot)
+    METRIQUES.lot('ingestion', len(lot), time.perf_counter() - debut, echecs=len(lot) - len(inseres))
+    if maj_resumes and inseres:
+        resumes.maj_insertion(collection.database, inseres)
+    return len(inseres), len(lot) - len(inseres)
+
+
+def charger(collection, lots, lots_en_attente=LOTS_EN_ATTENTE, maj_resumes=True):
+    """
+    Écrit les lots produits par l'itérable `lots` dans la collection.
+    La lecture tourne dans un thread séparé pour recouvrir l'analyse du CSV
+    et les écritures réseau. Retourne un dict de statistiques.
+    """
+    file_lots = queue.Queue(maxsize=lots_en_attente)
+    erreurs_lecture = []
+    lecteur = threading.Thread(target=_producteur, args=(lots, file_lots, erreurs_lecture), daemon=True)
+
+    stats = {'lots': 0, 'inseres': 0, 'echecs': 0, 'lots_en_echec': 0}
+    debut = time.perf_counter()
+    lecteur.start()
+    while True:
+        lot = file_lots.get()
+        if lot is _FIN:
+            break
+        inseres, echecs = inserer_lot(collection, lot, maj_resumes)
+        stats['lots'] += 1
+        stats['inseres'] += inseres
+        stats['echecs'] += echecs
+        if echecs:
+            stats['lots_en_echec'] += 1
+    lecteur.join()
+
+    if erreurs_lecture:
+        raise erreurs_lecture[0]
+
+    stats['duree'] = time.perf_counter() - debut
+    stats['docs_par_seconde'] = stats['inseres'] / stats['duree'] if stats['duree'] > 0 else 0.0
+    return stats
+
+
+# === Mode parallèle (--workers N) ===
+def decouper_en_shards(chemin, taille_shard=TAILLE_SHARD):
+    """
+    Découpe le fichier en tranches [début, fin) d'environ taille_shard octets,
+    chaque borne étant placée au début d'une ligne. Retourne (colonnes, tranches).
+    Suppose qu'aucun champ ne contient de saut de ligne, ce qui est le cas du
+    dataset santé.
+    """
+    taille = os.path.getsize(chemin)
+    with open(chemin, mode='rb') as file:
+        entete = file.readline()
+        bornes = [file.tell()]
+        position = bornes[0] + taille_shard
+        while position < taille:
+            file.seek(position)
+            file.readline()  # Avance jusqu'au début de la ligne suivante
+            debut = file.tell()
+            if debut >= taille:
+                break
+            if debut > bornes[-1]:
+                bornes.append(debut)
+            position = debut + taille_shard
+    bornes.append(taille)
+    colonnes = next(csv.reader([entete.decode('utf-8')]))
+    return colonnes, list(zip(bornes[:-1], bornes[1:]))
+
+
+def parser_shard(chemin, colonnes, debut, fin, typage=True):
+    """Analyse une tranche du CSV dans un processus du pool. Retourne (docs, pid, durée)."""
+    t0 = time.perf_counter()
+    with open(chemin, mode='rb') as file:
+        file.seek(debut)
+        texte = file.read(fin - debut).decode('utf-8')
+    docs = list(csv.DictReader(io.StringIO(texte, newline=''), fieldnames=colonnes))
+    if typage:
+        docs = [convertir_document(doc) for doc in docs]
+    return docs, os.getpid(), time.perf_counter() - t0
+
+
+def charger_en_parallele(collection, chemin, workers, taille_lot=TAILLE_LOT, taille_shard=TAILLE_SHARD,
+                         typage=True, maj_resumes=True):
+    """
+    Charge le CSV avec `workers` processus d'analyse et `workers` threads d'écriture.
+    Le nombre de tranches et de lots en vol est limité à 2 × workers pour que
+    la mémoire reste bornée. Retourne les statistiques globales et par worker.
+    """
+    colonnes, shards = decouper_en_shards(chemin, taille_shard)
+    verrou = threading.Lock()
+    par_worker = defaultdict(lambda: {'docs': 0, 'duree': 0.0})
+    stats = {'lots': 0, 'inseres': 0, 'echecs': 0, 'lots_en_echec': 0, 'shards': len(shards)}
+
+    def ecrire(lot):
+        t0 = time.perf_counter()
+        inseres, echecs = inserer_lot(collection, lot, maj_resumes)
+        duree = time.perf_counter() - t0
+        with verrou:
+            ecrivain = par_worker[f"écriture {threading.current_thread().name}"]
+            ecrivain['docs'] += inseres
+            ecrivain['duree'] += duree
+            stats['lots'] += 1
+            stats['inseres'] += inseres
+            stats['echecs'] += echecs
+            if echecs:
+                stats['lots_en_echec'] += 1
+
+    limite = 2 * workers
+    debut = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as parseurs, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mongo') as ecrivains:
+        a_parser = iter(shards)
+        analyses, ecritures = set(), set()
+        while True:
+            while len(analyses) < limite:
+                shard = next(a_parser, None)
+                if shard is None:
+                    break
+                analyses.add(parseurs.submit(parser_shard, chemin, colonnes, *shard, typage))
+            if not analyses:
+                break
+            termines, analyses = wait(analyses, return_when=FIRST_COMPLETED)
+            for future in termines:
+                docs, pid, duree = future.result()
+                parseur = par_worker[f"analyse pid {pid}"]
+                parseur['docs'] += len(docs)
+                parseur['duree'] += duree
+                for i in range(0, len(docs), taille_lot):
+                    ecritures.add(ecrivains.submit(ecrire, docs[i:i + taille_lot]))
+            while len(ecritures) > limite:
+                _, ecritures = wait(ecritures, return_when=FIRST_COMPLETED)
+        for future in ecritures:
+            future.result()
+
+    stats['duree'] = time.perf_counter() - debut
+    stats['docs_par_seconde'] = stats['inseres'] / stats['duree'] if stats['duree'] > 0 else 0.0
+    stats['par_worker'] = dict(par_worker)
+    return stats
+
+
+def afficher_debit_workers(par_worker):
+    """Affiche le débit de chaque processus d'analyse et thread d'écriture."""
+    print("\n⚙️ Débit par worker :")
+    for nom, s in sorted(par_worker.items()):
+        debit = s['docs'] / s['duree'] if s['duree'] > 0 else 0.0
+        print(f"   {nom:<25} {s['docs']:>10} docs  {s['duree']:>8.2f} s  {debit:>10.0f} docs/s")
+
+
+# === Mode incrémental (--incremental) ===
+def cle_naturelle(row):
+    """
+    Hash déterministe d'une ligne brute, calculé sur les colonnes qui
+    identifient une admission. Sert de _id : un même patient réimporté
+    est mis à jour au lieu d'être dupliqué. L'âge en fait partie : la purge
+    (check_doublons.py) garde deux lignes identiques par ailleurs dont les
+    âges diffèrent de plus de 7 ans.
+    """
+    parties = [str(row.get(champ) or '').strip().lower() for champ in CLE_NATURELLE]
+    for champ, formater in (('Age', lambda v: str(_en_entier(v))), ('Billing Amount', lambda v: f"{float(v):.2f}")):
+        try:
+            parties.append(formater(row.get(champ)))
+        except (TypeError, ValueError):
+            parties.append(str(row.get(champ) or '').strip())
+    return hashlib.sha1('\x1f'.join(parties).encode('utf-8')).hexdigest()
+
+
+def empreinte_ligne(valeurs, typage=True):
+    """Hash du contenu brut d'une ligne : une ligne dont l'empreinte n'a pas changé n'est pas réécrite."""
+    return hashlib.sha1(('\x1f'.join(['t' if typage else 'x', *valeurs])).encode('utf-8')).hexdigest()
+
+
+def empreinte_fichier(chemin, taille_bloc=8 * 1024 * 1024):
+    """Empreinte du fichier : taille + SHA-1 du contenu entier, lu par blocs."""
+    sha = hashlib.sha1()
+    with open(chemin, mode='rb') as file:
+        for bloc in iter(lambda: file.read(taille_bloc), b''):
+            sha.update(bloc)
+    return f"{os.path.getsize(chemin)}-{sha.hexdigest()}"
+
+
+def cles_avant_offset(chemin, offset):
+    """_id des lignes situées avant `offset` : lignes déjà validées lors d'un import interrompu."""
+    cles = set()
+    if not offset:
+        return cles
+    with open(chemin, mode='rb') as file:
+        colonnes = next(csv.reader([file.readline().decode('utf-8')]))
+        while file.tell() < offset:
+            ligne = file.readline()
+            if not ligne:
+                break
+            valeurs = next(csv.reader([ligne.decode('utf-8')]), None)
+            if valeurs:
+                cles.add(cle_naturelle(dict(zip(colonnes, valeurs))))
+    return cles
+
+
+def lire_par_lots_avec_offsets(chemin, taille_lot=TAILLE_LOT, offset=None, typage=True):
+    """
+    Lit le CSV en binaire à partir de `offset` (début des données si None) et
+    produit des tuples (documents, offset de fin du lot, lignes lues).
+    Comme le mode --workers, suppose qu'aucun champ ne contient de saut de ligne.
+    """
+    with open(chemin, mode='rb') as file:
+        colonnes = next(csv.reader([file.readline().decode('utf-8')]))
+        if offset:
+            file.seek(offset)
+        lot = []
+        for ligne in iter(file.readline, b''):
+            valeurs = next(csv.reader([ligne.decode('utf-8')]), None)
+            if not valeurs:
+                continue
+            row = dict(zip(colonnes, valeurs))
+            doc = convertir_document(row) if typage else row
+            doc['_id'] = cle_naturelle(row)
+            doc[CHAMP_EMPREINTE] = empreinte_ligne(valeurs, typage)
+            lot.append(doc)
+            if len(lot) >= taille_lot:
+                yield lot, file.tell(), len(lot)
+                lot = []
+        if lot:
+            yield lot, file.tell(), len(lot)
+
+
+def charger_incremental(collection, chemin, taille_lot=TAILLE_LOT, typage=True, lots_en_attente=LOTS_EN_ATTENTE,
+                        maj_resumes=True):
+    """
+    Upsert en masse sur la clé naturelle, avec point de reprise.
+    Après chaque lot validé, l'offset atteint est enregistré dans la
+    collection de contrôle ; une relance sur le même fichier repart de là.
+    Un lot en échec arrête l'import pour que le point de reprise reste
+    exact. Les empreintes des documents du lot déjà en base sont lues en
+    une requête : seules les lignes nouvelles ou modifiées sont envoyées.
+    Une ligne dont la clé naturelle a déjà été vue dans le fichier n'est pas
+    écrite (elle écraserait la première) et est comptée dans 'doublons' ;
+    les _id vus sont gardés en mémoire le temps de l'import.
+    Les documents absents du fichier sont laissés en place.
+    """
+    controle = collection.database[COLLECTION_CONTROLE]
+    empreinte = empreinte_fichier(chemin)
+    point = controle.find_one({'_id': empreinte}) or {}
+    if point.get('termine'):
+        print(f"✅ Fichier déjà importé ({point['lignes']} lignes), rien à faire.")
+        return {'lots': 0, 'inseres': 0, 'modifies': 0, 'inchanges': 0, 'doublons': 0, 'echecs': 0,
+                'lots_en_echec': 0, 'duree': 0.0, 'docs_par_seconde': 0.0}
+    offset, lignes = point.get('offset'), point.get('lignes', 0)
+    if offset:
+        print(f"↩️ Reprise à l'octet {offset} ({lignes} lignes déjà validées)")
+    vus = cles_avant_offset(chemin, offset)
+
+    lots = lire_par_lots_avec_offsets(chemin, taille_lot, offset, typage)
+    file_lots = queue.Queue(maxsize=lots_en_attente)
+    erreurs_lecture = []
+    lecteur = threading.Thread(target=_producteur, args=(lots, file_lots, erreurs_lecture), daemon=True)
+
+    def maj_resumes_lot(en_base, ecrits):
+        # Un seul delta par _id écrit : l'ancienne version (si elle existait) est retirée, la nouvelle ajoutée
+        if maj_resumes and ecrits:
+            anciens = [en_base[doc['_id']] for doc in ecrits if doc['_id'] in en_base]
+            resumes.maj_modification(collection.database, anciens, ecrits)
+
+    stats = {'lots': 0, 'inseres': 0, 'modifies': 0, 'inchanges': 0, 'doublons': 0, 'echecs': 0,
+             'lots_en_echec': 0}
+    debut = time.perf_counter()
+    lecteur.start()
+    while True:
+        element = file_lots.get()
+        if element is _FIN:
+            break
+        lot, offset, nb = element
+        uniques = []
+        for doc in lot:
+            if doc['_id'] not in vus:
+                vus.add(doc['_id'])
+                uniques.append(doc)
+        stats['doublons'] += len(lot) - len(uniques)
+        t0 = time.perf_counter()
+        en_base, changes = {}, []
+        try:
+            # Versions actuelles des lignes déjà présentes : empreinte, et champs retirés des résumés avant réajout
+            champs = [CHAMP_EMPREINTE] + (resumes.CHAMPS_RESUMES if maj_resumes else [])
+            en_base = {doc['_id']: doc for doc in collection.find({'_id': {'$in': [d['_id'] for d in uniques]}},
+                                                                   dict.fromkeys(champs, 1))}
+            changes = [doc for doc in uniques
+                       if en_base.get(doc['_id'], {}).get(CHAMP_EMPREINTE) != doc[CHAMP_EMPREINTE]]
+            operations = [UpdateOne({'_id': doc['_id']}, {'$set': {k: v for k, v in doc.items() if k != '_id'}},
+                                    upsert=True) for doc in changes]
+            result = collection.bulk_write(operations, ordered=False) if operations else None
+        except PyMongoError as e:
+            ecrits = []
+            if isinstance(e, BulkWriteError):
+                # Écritures du lot passées malgré l'échec : les résumés les prennent en compte, et la
+                # relance les retrouvera à jour (même empreinte) sans les recompter
+                en_echec = {erreur['index'] for erreur in e.details.get('writeErrors', [])}
+                ecrits = [doc for i, doc in enumerate(changes) if i not in en_echec]
+            maj_resumes_lot(en_base, ecrits)
+            stats['echecs'] += len(lot) - len(ecrits)
+            stats['lots_en_echec'] += 1
+            METRIQUES.lot('ingestion', len(lot), time.perf_counter() - t0, echecs=len(lot) - len(ecrits))
+            print(f"⚠️ Lot en échec, arrêt au dernier point de reprise ({lignes} lignes) : {e}")
+            break
+        METRIQUES.lot('ingestion', len(operations), time.perf_counter() - t0)
+        maj_resumes_lot(en_base, changes)
+        lignes += nb
+        stats['lots'] += 1
+        inseres, modifies = (result.upserted_count, result.modified_count) if result else (0, 0)
+        stats['inseres'] += inseres
+        stats['modifies'] += modifies
+        stats['inchanges'] += len(uniques) - inseres - modifies
+        controle.update_one(
+            {'_id': empreinte},
+            {'$set': {'fichier': os.path.basename(chemin), 'offset': offset, 'lignes': lignes,
+                      'termine': False, 'maj': datetime.now()}},
+            upsert=True
+        )
+
+    if stats['lots_en_echec'] == 0:
+        lecteur.join()
+        if erreurs_lecture:
+            raise erreurs_lecture[0]
+        controle.update_one({'_id': empreinte}, {'$set': {'termine': True, 'maj': datetime.now()}}, upsert=True)
+
+    stats['duree'] = time.perf_counter() - debut
+    traites = stats['inseres'] + stats['modifies'] + stats['inchanges']
+    stats['docs_par_seconde'] = traites / stats['duree'] if stats['duree'] > 0 else 0.0
+    return stats
+
+
+def ouvrir_collection(uri=MONGO_URI, w=1, journal=None):
+    """Retourne la collection cible avec le write concern demandé."""
+    client = MongoClient(uri)
+    collection = client[BASE][COLLECTION]
+    return collection.with_options(write_concern=WriteConcern(w=w, j=journal))
+
+
+def _write_concern(valeur):
+    """Accepte un entier (1, 0...) ou une chaîne comme 'majority'."""
+    return int(valeur) if valeur.isdigit() else valeur
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import du CSV purgé dans MongoDB.")
+    parser.add_argument("--fichier", default=csv_file_path, help="CSV, .parquet ou .arrow à importer")
+    parser.add_argument("--uri", default=MONGO_URI, help="URI MongoDB")
+    parser.add_argument("--batch-size", type=int, default=TAILLE_LOT, help="Documents par lot")
+    parser.add_argument("--w", type=_write_concern, default=1,
+                        help="Write concern w (0, 1, majority...)")
+    parser.add_argument("--journal", action="store_true", help="Attendre l'écriture du journal (j=true)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus d'analyse et de threads d'écriture (1 = mode série)")
+    parser.add_argument("--sans-typage", action="store_true",
+                        help="Importer toutes les valeurs en texte (ancien comportement)")
+    parser.add_argument("--sans-index", action="store_true",
+                        help="Ne pas créer les index des rapports après le chargement")
+    parser.add_argument("--sans-resumes", action="store_true",
+                        help="Ne pas maintenir les collections de résumés (voir resumes.py)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Upsert sur la clé naturelle avec reprise sur le dernier lot validé")
+    instrumentation.ajouter_options(parser)
+    args = parser.parse_args()
+    if est_colonnaire(args.fichier) and (args.workers > 1 or args.incremental):
+        parser.error("--workers et --incremental découpent le CSV par octets : non disponibles pour un fichier "
+                     "en colonnes")
+    return args
+
+
+def main():
+    args = parse_args()
+    instrumentation.configurer(args)
+    collection = ouvrir_collection(args.uri, w=args.w, journal=args.journal or None)
+
+    mode = 'incremental' if args.incremental else ('parallele' if args.workers > 1 else 'serie')
+    with METRIQUES.etape('ingestion', mode=mode) as mesure:
+        if args.incremental:
+            stats = charger_incremental(collection, args.fichier, args.batch_size, typage=not args.sans_typage,
+                                        maj_resumes=not args.sans_resumes)
+        elif args.workers > 1:
+            stats = charger_en_parallele(collection, args.fichier, args.workers, args.batch_size,
+                                         typage=not args.sans_typage, maj_resumes=not args.sans_resumes)
+        else:
+            stats = charger(collection, lire_par_lots(args.fichier, args.batch_size, typage=not args.sans_typage),
+                            maj_resumes=not args.sans_resumes)
+        mesure['lignes'] = stats['inseres'] + stats.get('modifies', 0) + stats.get('inchanges', 0)
+        mesure.update(lots=stats['lots'], taille_lot=args.batch_size, echecs=stats['echecs'])
+
+    incrementer_version(collection.database, COLLECTION)  # Invalide les rapports en cache
+    print("Import terminé avec succès.")
+    print(f"→ {stats['inseres']} documents insérés en {stats['lots']} lots "
+          f"({stats['duree']:.2f} s, {stats['docs_par_seconde']:.0f} docs/s)")
+    if stats['echecs']:
+        print(f"⚠️ {stats['echecs']} documents en échec dans {stats['lots_en_echec']} lots")
+    if 'modifies' in stats:
+        print(f"→ {stats['modifies']} documents modifiés, {stats['inchanges']} inchangés")
+    if stats.get('doublons'):
+        print(f"⚠️ {stats['doublons']} lignes ignorées : même clé naturelle qu'une ligne précédente du fichier")
+    if 'par_worker' in stats:
+        afficher_debit_workers(stats['par_worker'])
 
+    # Index créés après le chargement en masse : l'import n'a pas à les maintenir
+    if not args.sans_index:
+        noms = creer_indexes(collection)
+        print(f"🗂️ Index des rapports en place : {', '.join(noms)}")
 
-with open(csv_file_path, mode='r', encoding='utf-8') as file:
-    reader = csv.DictReader(file)  # Lecture en dict pour avoir les colonnes comme clés
-    data = []
-    for row in reader:
-        # Ici, vous pouvez transformer les valeurs si besoin, par exemple convertir en int/float
-        data.append(row)
-    if data:
-        collection.insert_many(data)
+    for doc in collection.find().limit(5):
+        print(doc)
 
-print("Import terminé avec succès.")
 
-for doc in collection.find().limit(5):
-    print(doc)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Script : rapports.py
+But : Exécuter les rapports de script/ depuis un seul processus.
+      Le registre RAPPORTS référence le module de chaque rapport (qui expose
+      `pipeline` et `formater`). Un seul MongoClient, dont le pool de
+      connexions est partagé, sert toutes les agrégations, lancées en
+      parallèle dans un pool de threads. Chaque résultat est structuré
+      (documents, texte affiché, latence) ; la sortie CLI reprend les
+      tableaux imprimés par les scripts individuels.
+      Chaque exécution est comptée par instrumentation.METRIQUES ;
+      --temps-serveur ajoute le temps passé dans mongod (explain
+      executionStats par rapport, $collStats pour l'ensemble).
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient
+
+import AgeByDesease
+import ByBlood
+import DureeMoyenneSejourHopital
+import MedicationByCancer
+import MedicationByCancerAndResults
+import TopHospital
+import instrumentation
+from cache_rapports import FICHIER_CACHE, TTL, CacheRapports
+from indexes import hint_si_present
+from instrumentation import METRIQUES, ecart_latences, latences_collection, temps_serveur
+
+# === CONFIGURATION ===
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+COLLECTION = 'medic2'
+
+# Registre : nom du rapport → module (pipeline + formater)
+RAPPORTS = {
+    'AgeByDesease': AgeByDesease,
+    'ByBlood': ByBlood,
+    'TopHospital': TopHospital,
+    'MedicationByCancer': MedicationByCancer,
+    'MedicationByCancerAndResults': MedicationByCancerAndResults,
+    'DureeMoyenneSejourHopital': DureeMoyenneSejourHopital,
+}
+
+
+def executer_rapport(collection, nom, cache=None):
+    """
+    Exécute un rapport et retourne {nom, resultats, texte, latence, erreur}.
+    Une erreur d'agrégation ou de mise en forme est rapportée dans `erreur`
+    sans interrompre les autres rapports.
+    Avec un CacheRapports, le résultat est servi depuis le cache tant que la
+    version des données n'a pas changé. Un rapport qui déclare une
+    `collation` (comparaison insensible à la casse) est exécuté avec elle,
+    et avec son `index` en hint s'il existe.
+    """
+    module = RAPPORTS[nom]
+    options = {'collation': module.collation} if getattr(module, 'collation', None) else {}
+    debut = time.perf_counter()
+
+    def agreger():
+        # Le hint ne change pas le résultat : hors de la clé du cache, vérifié seulement en cas d'absence
+        return list(collection.aggregate(module.pipeline, **options,
+                                         **hint_si_present(collection, getattr(module, 'index', None))))
+    try:
+        if cache is not None:
+            resultats = cache.obtenir(collection, module.pipeline, executer=agreger, **options)
+        else:
+            resultats = agreger()
+        erreur = None
+    except Exception as e:
+        resultats, erreur = [], str(e)
+    latence = time.perf_counter() - debut
+    texte = None
+    if erreur is None:
+        try:
+            texte = module.formater(resultats)
+        except Exception as e:  # Les documents restent disponibles, seul l'affichage manque
+            erreur = f"mise en forme : {e}"
+    METRIQUES.incrementer('rapport_executions_total', rapport=nom)
+    METRIQUES.incrementer('rapport_latence_secondes_total', latence, rapport=nom)
+    METRIQUES.jauge('rapport_documents', len(resultats), rapport=nom)
+    if erreur is not None:
+        METRIQUES.incrementer('rapport_erreurs_total', rapport=nom)
+    METRIQUES.enregistrer('rapport', rapport=nom, latence=latence, documents=len(resultats), erreur=erreur)
+    if texte is None:
+        texte = f"❌ {nom} : {erreur}"
+    return {'nom': nom, 'resultats': resultats, 'texte': texte, 'latence': latence, 'erreur': erreur}
+
+
+def executer_rapports(collection, noms=None, workers=None, cache=None):
+    """
+    Lance les rapports demandés (tous par défaut) en parallèle sur la même
+    collection, donc sur le même pool de connexions. Les résultats sont
+    retournés dans l'ordre du registre.
+    """
+    noms = list(noms or RAPPORTS)
+    with ThreadPoolExecutor(max_workers=workers or len(noms), thread_name_prefix='rapport') as pool:
+        return list(pool.map(lambda nom: executer_rapport(collection, nom, cache), noms))
+
+
+def mesurer_temps_serveur(collection, noms=None):
+    """Temps d'exécution dans mongod de chaque rapport (explain executionStats), en secondes."""
+    temps = {}
+    for nom in noms or RAPPORTS:
+        module = RAPPORTS[nom]
+        temps[nom] = temps_serveur(collection, module.pipeline, getattr(module, 'collation', None),
+                                   hint_si_present(collection, getattr(module, 'index', None)).get('hint'))
+        METRIQUES.jauge('rapport_temps_serveur_secondes', temps[nom], rapport=nom)
+        METRIQUES.enregistrer('temps_serveur', rapport=nom, duree=temps[nom])
+    return temps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exécution groupée des rapports MongoDB.")
+    parser.add_argument("rapports", nargs="*", metavar="RAPPORT",
+                        help=f"Rapports à lancer parmi {', '.join(RAPPORTS)} (tous par défaut)")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--workers", type=int, help="Rapports exécutés simultanément (défaut : tous)")
+    parser.add_argument("--cache", action="store_true", help="Servir les résultats depuis le cache local")
+    parser.add_argument("--cache-fichier", default=FICHIER_CACHE, help="Stockage disque du cache (sqlite)")
+    parser.add_argument("--cache-ttl", type=int, default=TTL, help="Durée de validité d'un résultat (s)")
+    parser.add_argument("--change-stream", action="store_true",
+                        help="Suivre les écritures par change stream (replica set) pour invalider le cache")
+    parser.add_argument("--temps-serveur", action="store_true",
+                        help="Mesurer le temps passé dans mongod (explain executionStats, $collStats)")
+    instrumentation.ajouter_options(parser)
+    args = parser.parse_args()
+    inconnus = [nom for nom in args.rapports if nom not in RAPPORTS]
+    if inconnus:
+        parser.error(f"rapport(s) inconnu(s) : {', '.join(inconnus)}")
+    instrumentation.configurer(args)
+
+    client = MongoClient(args.uri, maxPoolSize=max(len(RAPPORTS), args.workers or 0))
+    collection = client[BASE][COLLECTION]
+
+    cache = None
+    if args.cache:
+        cache = CacheRapports(ttl=args.cache_ttl, fichier=args.cache_fichier)
+        if args.change_stream:
+            cache.surveiller(collection)
+
+    latences_avant = latences_collection(collection) if args.temps_serveur else None
+    debut = time.perf_counter()
+    with METRIQUES.etape('rapports') as mesure:
+        resultats = executer_rapports(collection, args.rapports, args.workers, cache)
+        mesure['rapports'] = len(resultats)
+    total = time.perf_counter() - debut
+
+    for r in resultats:
+        print(r['texte'])
+
+    serveur = {}
+    if args.temps_serveur:
+        ecart = ecart_latences(latences_avant, latences_collection(collection))
+        serveur = mesurer_temps_serveur(collection, args.rapports)
+
+    print("\n⏱️ Latence par rapport :")
+    for r in resultats:
+        ligne = f"   {r['nom']:<32} {r['latence'] * 1000:>10.1f} ms"
+        if r['nom'] in serveur:
+            ligne += f"   (mongod {serveur[r['nom']] * 1000:>8.1f} ms)"
+        print(ligne)
+    print(f"   {'Total (parallèle)':<32} {total * 1000:>10.1f} ms")
+    if args.temps_serveur:
+        lectures = ecart['reads']
+        print(f"   {'Lectures mongod ($collStats)':<32} {lectures['latence'] * 1000:>10.1f} ms "
+              f"sur {lectures['ops']} opérations")
+    if cache is not None:
+        print(f"\n🗃️ Cache : {cache.stats} (taux de hits {cache.taux_hits():.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Script : repartition_resultats.py
+But : Répartition des résultats (outcome breakdown) par groupe pour une
+      condition médicale donnée, par exemple la part de tests Abnormal /
+      Inconclusive / Normal par médicament pour 'Cancer'.
+      Chaque résultat est compté par un $sum conditionnel dans un seul
+      $group : la mémoire par groupe est constante, alors que l'ancienne
+      forme ($push de tous les résultats puis $size/$filter) grossit avec le
+      nombre de patients et peut atteindre la limite de 100 Mo par étape.
+
+      La condition est comparée sans tenir compte de la casse (collation
+      COLLATION, index ci_condition_medication_resultats).
+
+      --verifier compare les pourcentages avec l'ancienne forme ;
+      --benchmark mesure la latence et la mémoire du $group (explain).
+"""
+
+import argparse
+import sys
+import time
+
+from pymongo import MongoClient
+
+from indexes import COLLATION
+
+# === CONFIGURATION ===
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+COLLECTION = 'medic2'
+
+RESULTATS_TESTS = ['Abnormal', 'Inconclusive', 'Normal']
+
+
+def champ_pourcentage(valeur):
+    """Nom du champ de sortie : 'Abnormal' → 'abnormalPercent'."""
+    mot = ''.join(c for c in valeur.title() if c.isalnum())
+    return mot[:1].lower() + mot[1:] + 'Percent'
+
+
+def pipeline_repartition(condition='Cancer', champ_resultat='Test Results', valeurs=RESULTATS_TESTS,
+                         champ_groupe='Medication'):
+    """
+    Pipeline compteur : un $sum conditionnel par valeur de résultat, puis les
+    pourcentages. Sortie : _id (groupe), totalTests et <valeur>Percent.
+    """
+    compteurs = {
+        f'_n{i}': {'$sum': {'$cond': [{'$eq': [f'${champ_resultat}', valeur]}, 1, 0]}}
+        for i, valeur in enumerate(valeurs)
+    }
+    pourcentages = {
+        champ_pourcentage(valeur): {'$multiply': [{'$divide': [f'$_n{i}', '$totalTests']}, 100]}
+        for i, valeur in enumerate(valeurs)
+    }
+    return [
+        {'$match': {'Medical Condition': condition}},  # insensible à la casse avec COLLATION
+        {'$group': {'_id': f'${champ_groupe}', 'totalTests': {'$sum': 1}, **compteurs}},
+        {'$project': {'_id': 1, 'totalTests': 1, **pourcentages}},
+    ]
+
+
+def pipeline_push_filter(condition='Cancer', champ_resultat='Test Results', valeurs=RESULTATS_TESTS,
+                         champ_groupe='Medication'):
+    """Ancienne forme ($push puis $size/$filter), conservée comme référence de non-régression."""
+    pourcentages = {
+        champ_pourcentage(valeur): {'$multiply': [{'$divide': [
+            {'$size': {'$filter': {'input': '$testResults', 'as': 'result',
+                                   'cond': {'$eq': ['$$result', valeur]}}}},
+            {'$size': '$testResults'}
+        ]}, 100]}
+        for valeur in valeurs
+    }
+    return [
+        {'$match': {'Medical Condition': condition}},
+        {'$group': {'_id': f'${champ_groupe}', 'testResults': {'$push': f'${champ_resultat}'}}},
+        {'$project': {'_id': 1, 'totalTests': {'$size': '$testResults'}, **pourcentages}},
+    ]
+
+
+def verifier_parite(collection, **parametres):
+    """
+    Exécute les deux formes et retourne la liste des écarts (vide si les
+    totaux et pourcentages sont identiques pour chaque groupe).
+    """
+    nouveau = {doc['_id']: doc
+               for doc in collection.aggregate(pipeline_repartition(**parametres), collation=COLLATION)}
+    ancien = {doc['_id']: doc
+              for doc in collection.aggregate(pipeline_push_filter(**parametres), collation=COLLATION)}
+    ecarts = []
+    for groupe in sorted(set(nouveau) | set(ancien), key=str):
+        a, n = ancien.get(groupe), nouveau.get(groupe)
+        if a is None or n is None:
+            ecarts.append((groupe, 'groupe absent', a, n))
+            continue
+        for champ, valeur in a.items():
+            if isinstance(valeur, float) and abs(valeur - n.get(champ, float('nan'))) <= 1e-9:
+                continue
+            if valeur != n.get(champ):
+                ecarts.append((groupe, champ, valeur, n.get(champ)))
+    return ecarts
+
+
+def memoire_group(collection, pipeline):
+    """Mémoire maximale des accumulateurs du $group (octets), si le serveur la rapporte."""
+    explication = collection.database.command(
+        'explain', {'aggregate': collection.name, 'pipeline': pipeline, 'cursor': {},
+                    'collation': COLLATION.document},
+        verbosity='executionStats')
+    for etape in explication.get('stages', []):
+        if '$group' in etape:
+            memoire = etape.get('maxAccumulatorMemoryUsageBytes')
+            # Selon la version : un total ou un détail par accumulateur
+            return sum(memoire.values()) if isinstance(memoire, dict) else memoire
+    return None
+
+
+def benchmark(collection, repetitions=5, **parametres):
+    """Meilleure latence et mémoire du $group pour l'ancienne et la nouvelle forme."""
+    mesures = {}
+    for nom, construire in (('push_filter', pipeline_push_filter), ('compteurs', pipeline_repartition)):
+        pipeline = construire(**parametres)
+        meilleure = float('inf')
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            list(collection.aggregate(pipeline, allowDiskUse=True, collation=COLLATION))
+            meilleure = min(meilleure, time.perf_counter() - debut)
+        mesures[nom] = {'latence': meilleure, 'memoire_group': memoire_group(collection, pipeline)}
+    return mesures
+
+
+def formater(results, condition='Cancer', valeurs=RESULTATS_TESTS, champ_groupe='Medication'):
+    """Tableau de répartition, au format de MedicationByCancerAndResults."""
+    lignes = [
+        f"\n📊 Répartition des résultats par {champ_groupe} pour la condition '{condition}':\n",
+        "{:<30}{:<15}".format(champ_groupe, "Tests") + "".join("{:<18}".format(f"% {v}") for v in valeurs),
+        "-" * (45 + 18 * len(valeurs)),
+    ]
+    for doc in results:
+        groupe = doc['_id'] if doc['_id'] else "Inconnu"
+        ligne = "{:<30}{:<15}".format(str(groupe), doc['totalTests'])
+        ligne += "".join("{:<18}".format(f"{round(doc[champ_pourcentage(v)], 2)}%") for v in valeurs)
+        lignes.append(ligne)
+    return "\n".join(lignes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Répartition des résultats par groupe pour une condition.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--condition", default='Cancer', help="Valeur de 'Medical Condition' (défaut : Cancer)")
+    parser.add_argument("--champ", default='Test Results', help="Champ résultat à répartir")
+    parser.add_argument("--valeurs", nargs="+", default=RESULTATS_TESTS, help="Valeurs du champ résultat")
+    parser.add_argument("--groupe", default='Medication', help="Champ de regroupement")
+    parser.add_argument("--verifier", action="store_true", help="Comparer avec l'ancienne forme $push/$filter")
+    parser.add_argument("--benchmark", action="store_true", help="Latence et mémoire : ancienne vs nouvelle forme")
+    args = parser.parse_args()
+
+    collection = MongoClient(args.uri)[BASE][COLLECTION]
+    parametres = {'condition': args.condition, 'champ_resultat': args.champ,
+                  'valeurs': args.valeurs, 'champ_groupe': args.groupe}
+
+    if args.verifier:
+        ecarts = verifier_parite(collection, **parametres)
+        if ecarts:
+            print(f"❌ {len(ecarts)} écart(s) entre les deux formes :")
+            for ecart in ecarts[:10]:
+                print(f"   → {ecart}")
+            sys.exit(1)
+        print("✅ Pourcentages identiques entre $push/$filter et compteurs $sum.")
+        return
+
+    if args.benchmark:
+        mesures = benchmark(collection, **parametres)
+        print("\n⏱️ Répartition des résultats : $push/$filter vs compteurs\n")
+        print("{:<15}{:>15}{:>25}".format("Forme", "Latence (ms)", "Mémoire $group (octets)"))
+        for nom, m in mesures.items():
+            memoire = m['memoire_group'] if m['memoire_group'] is not None else "n/d"
+            print("{:<15}{:>15.1f}{:>25}".format(nom, m['latence'] * 1000, memoire))
+        return
+
+    results = collection.aggregate(pipeline_repartition(**parametres), collation=COLLATION)
+    print(formater(results, args.condition, args.valeurs, args.groupe))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Script : requetes.py
+But : Couche de requêtes paramétrées sur FirstTry.medic2.
+      Condition, hôpital, médecin, patient... sont des paramètres au lieu de
+      valeurs écrites en dur dans chaque rapport. La comparaison est
+      insensible à la casse grâce à une collation de force 2 (COLLATION) et
+      aux index créés avec la même collation (indexes.py, préfixe ci_) :
+      'cancer', 'CANCER' et 'Cancer' passent par un IXSCAN, là où
+      $regex /^cancer$/i ou $toLower parcourent tout l'index ou la collection.
+
+      --benchmark compare la latence et le plan d'exécution des deux formes.
+"""
+
+import argparse
+import re
+import time
+
+from pymongo import MongoClient
+
+from indexes import COLLATION, etapes_plan, plan_gagnant
+
+# === CONFIGURATION ===
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+COLLECTION = 'medic2'
+
+# Paramètre → champ filtré
+CHAMPS_FILTRES = {
+    'condition': 'Medical Condition',
+    'hopital': 'Hospital',
+    'medecin': 'Doctor',
+    'nom': 'Name',
+    'medicament': 'Medication',
+    'resultat': 'Test Results',
+    'groupe_sanguin': 'Blood Type',
+    'assurance': 'Insurance Provider',
+    'admission': 'Admission Type',
+}
+
+
+def construire_filtre(**parametres):
+    """
+    Filtre $match à partir des paramètres renseignés (None ignoré ; une
+    liste devient un $in). Exemple : construire_filtre(condition='cancer').
+    """
+    inconnus = set(parametres) - set(CHAMPS_FILTRES)
+    if inconnus:
+        raise ValueError(f"paramètre(s) inconnu(s) : {', '.join(sorted(inconnus))}")
+    filtre = {}
+    for parametre, valeur in parametres.items():
+        if valeur is None:
+            continue
+        champ = CHAMPS_FILTRES[parametre]
+        filtre[champ] = {'$in': list(valeur)} if isinstance(valeur, (list, tuple, set)) else valeur
+    return filtre
+
+
+def construire_filtre_regex(**parametres):
+    """Même filtre sous forme $regex /^...$/i : la forme contournée, gardée pour la comparaison."""
+    filtre = {}
+    for champ, valeur in construire_filtre(**parametres).items():
+        valeurs = valeur['$in'] if isinstance(valeur, dict) else [valeur]
+        motif = '^(' + '|'.join(re.escape(v) for v in valeurs) + ')$'
+        filtre[champ] = {'$regex': motif, '$options': 'i'}
+    return filtre
+
+
+def pipeline_filtre(suite=(), **parametres):
+    """[$match paramétré] suivi des étapes de `suite`."""
+    return [{'$match': construire_filtre(**parametres)}, *suite]
+
+
+def agreger(collection, pipeline, **options):
+    """aggregate() avec la collation insensible à la casse."""
+    return collection.aggregate(pipeline, collation=COLLATION, **options)
+
+
+def compter_par(collection, champ_groupe='Medication', **parametres):
+    """Nombre de documents par valeur de `champ_groupe` parmi ceux qui correspondent aux paramètres."""
+    suite = [{'$group': {'_id': f'${champ_groupe}', 'count': {'$sum': 1}}}, {'$sort': {'count': -1}}]
+    return list(agreger(collection, pipeline_filtre(suite, **parametres)))
+
+
+def _plan(collection, pipeline, collation):
+    commande = {'aggregate': collection.name, 'pipeline': pipeline, 'cursor': {}}
+    if collation is not None:
+        commande['collation'] = collation.document
+    explication = collection.database.command('explain', commande, verbosity='executionStats')
+    return etapes_plan(plan_gagnant(explication))
+
+
+def benchmark(collection, repetitions=5, **parametres):
+    """
+    Meilleure latence, étapes du plan et nombre de documents pour le filtre
+    en collation (index ci_) et pour le filtre $regex insensible à la casse.
+    """
+    formes = {
+        'collation': ([{'$match': construire_filtre(**parametres)}], COLLATION),
+        'regex': ([{'$match': construire_filtre_regex(**parametres)}], None),
+    }
+    mesures = {}
+    for nom, (pipeline, collation) in formes.items():
+        pipeline = pipeline + [{'$count': 'n'}]
+        options = {'collation': collation} if collation is not None else {}
+        meilleure, documents = float('inf'), 0
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            documents = next(collection.aggregate(pipeline, **options), {'n': 0})['n']
+            meilleure = min(meilleure, time.perf_counter() - debut)
+        mesures[nom] = {'latence': meilleure, 'documents': documents,
+                        'etapes': _plan(collection, pipeline, collation)}
+    return mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requêtes paramétrées, insensibles à la casse.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    for parametre, champ in CHAMPS_FILTRES.items():
+        parser.add_argument(f"--{parametre.replace('_', '-')}", nargs="+", help=f"Valeur(s) de '{champ}'")
+    parser.add_argument("--groupe", default='Medication', help="Champ de regroupement du comptage")
+    parser.add_argument("--benchmark", action="store_true", help="Collation + index vs $regex insensible")
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    parametres = {}
+    for parametre in CHAMPS_FILTRES:
+        valeurs = getattr(args, parametre)
+        if valeurs:
+            parametres[parametre] = valeurs[0] if len(valeurs) == 1 else valeurs
+    if not parametres:
+        parser.error("au moins un filtre est requis (ex. --condition cancer)")
+
+    collection = MongoClient(args.uri)[BASE][COLLECTION]
+
+    if args.benchmark:
+        mesures = benchmark(collection, args.repetitions, **parametres)
+        print(f"\n⏱️ Filtre insensible à la casse {parametres} (meilleur de {args.repetitions})\n")
+        print("{:<12}{:>14}{:>12}   {}".format("Forme", "Latence (ms)", "Documents", "Plan"))
+        print("-" * 80)
+        for nom, m in mesures.items():
+            print("{:<12}{:>14.1f}{:>12}   {}".format(nom, m['latence'] * 1000, m['documents'],
+                                                    " → ".join(m['etapes'])))
+        return
+
+    resultats = compter_par(collection, args.groupe, **parametres)
+    print(f"\n📊 {args.groupe} pour {parametres} (insensible à la casse):\n")
+    print("{:<30}{}".format(args.groupe, "Nombre"))
+    print("-" * 45)
+    for doc in resultats:
+        print("{:<30}{}".format(str(doc['_id']) if doc['_id'] else "Inconnu", doc['count']))
+
+
+if __name__ == "__main__":
+    main()
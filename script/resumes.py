@@ -0,0 +1,183 @@
+"""
+Script : resumes.py
+But : Tenir à jour des collections de résumés (pré-agrégations) de
+      FirstTry.medic2 pour que les rapports lisent quelques dizaines de
+      documents au lieu de parcourir toute la collection :
+        - resume_blood_type                      : patients par Blood Type
+        - resume_hospital                        : admissions par Hospital
+        - resume_condition_medication_resultats  : par (condition, médicament, résultat)
+        - resume_condition                       : patients, somme des âges et des
+                                                   durées de séjour par condition
+      migration.py, dedup_mongo.py et CrudTry1.py les maintiennent par des
+      upserts $inc. --reconstruire les recalcule entièrement depuis medic2,
+      --verifier compare les résumés à un recalcul complet.
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+
+from pymongo import MongoClient, UpdateOne
+
+# === CONFIGURATION ===
+MONGO_URI = 'mongodb://localhost:27017'
+BASE = 'FirstTry'
+COLLECTION = 'medic2'
+
+# Résumés : collection → champs de la clé et sommes numériques (nom → champ source)
+RESUMES = {
+    'resume_blood_type': {'cle': ['Blood Type'], 'sommes': {}},
+    'resume_hospital': {'cle': ['Hospital'], 'sommes': {}},
+    'resume_condition_medication_resultats': {
+        'cle': ['Medical Condition', 'Medication', 'Test Results'], 'sommes': {}},
+    'resume_condition': {
+        'cle': ['Medical Condition'], 'sommes': {'age': 'Age', 'sejour': 'Length of Stay'}},
+}
+# Champs à lire pour calculer les deltas d'un document
+CHAMPS_RESUMES = sorted({champ for d in RESUMES.values() for champ in d['cle'] + list(d['sommes'].values())})
+
+
+def _est_nombre(valeur):
+    return isinstance(valeur, (int, float)) and not isinstance(valeur, bool)
+
+
+def _cle(doc, champs):
+    """Clé hachable d'un document pour un résumé."""
+    return tuple(doc.get(champ) for champ in champs)
+
+
+def _id_resume(cle, champs):
+    """
+    _id stocké : valeur simple pour une clé à un champ, sous-document sinon.
+    Un champ absent du document y figure à None, comme dans pipeline_recalcul.
+    """
+    return cle[0] if len(champs) == 1 else dict(zip(champs, cle))
+
+
+def calculer_deltas(docs, signe=1):
+    """
+    Agrège en mémoire les incréments d'un lot de documents :
+    {collection: {clé: {champ: delta}}}. Un lot de milliers de documents
+    se réduit ainsi à quelques dizaines d'upserts.
+    """
+    deltas = {nom: defaultdict(lambda: defaultdict(int)) for nom in RESUMES}
+    for doc in docs:
+        for nom, definition in RESUMES.items():
+            increment = deltas[nom][_cle(doc, definition['cle'])]
+            increment['count'] += signe
+            for somme, champ in definition['sommes'].items():
+                valeur = doc.get(champ)
+                if _est_nombre(valeur):
+                    increment[f'{somme}_somme'] += signe * valeur
+                    increment[f'{somme}_nb'] += signe
+    return deltas
+
+
+def fusionner_deltas(*tous):
+    """Additionne plusieurs jeux de deltas (ex. retrait de l'ancienne version + ajout de la nouvelle)."""
+    total = {nom: defaultdict(lambda: defaultdict(int)) for nom in RESUMES}
+    for deltas in tous:
+        for nom, par_cle in deltas.items():
+            for cle, increment in par_cle.items():
+                for champ, valeur in increment.items():
+                    total[nom][cle][champ] += valeur
+    return total
+
+
+def appliquer_deltas(db, deltas):
+    """Envoie les deltas par upserts $inc, un bulk_write par collection de résumé."""
+    for nom, par_cle in deltas.items():
+        operations = [
+            UpdateOne({'_id': _id_resume(cle, RESUMES[nom]['cle'])}, {'$inc': dict(increment)}, upsert=True)
+            for cle, increment in par_cle.items()
+            if any(increment.values())
+        ]
+        if operations:
+            db[nom].bulk_write(operations, ordered=False)
+
+
+def maj_insertion(db, docs):
+    """À appeler après l'insertion de `docs` dans medic2."""
+    appliquer_deltas(db, calculer_deltas(docs, 1))
+
+
+def maj_suppression(db, docs):
+    """À appeler avec les documents supprimés de medic2 (version avant suppression)."""
+    appliquer_deltas(db, calculer_deltas(docs, -1))
+
+
+def maj_modification(db, avant, apres):
+    """À appeler avec les versions avant / après des documents modifiés."""
+    appliquer_deltas(db, fusionner_deltas(calculer_deltas(avant, -1), calculer_deltas(apres, 1)))
+
+
+def pipeline_recalcul(nom):
+    """Pipeline recalculant un résumé depuis medic2."""
+    definition = RESUMES[nom]
+    champs = definition['cle']
+    # $ifNull : un champ absent donne null au lieu de disparaître de la clé, comme _id_resume
+    cle = f'${champs[0]}' if len(champs) == 1 else {champ: {'$ifNull': [f'${champ}', None]} for champ in champs}
+    groupe = {'_id': cle, 'count': {'$sum': 1}}
+    for somme, champ in definition['sommes'].items():
+        est_nombre = {'$isNumber': f'${champ}'}
+        groupe[f'{somme}_somme'] = {'$sum': {'$cond': [est_nombre, f'${champ}', 0]}}
+        groupe[f'{somme}_nb'] = {'$sum': {'$cond': [est_nombre, 1, 0]}}
+    return [{'$group': groupe}]
+
+
+def reconstruire(db, collection_nom=COLLECTION):
+    """Recalcule chaque résumé depuis medic2 et le remplace via $out."""
+    for nom in RESUMES:
+        db[collection_nom].aggregate(pipeline_recalcul(nom) + [{'$out': nom}], allowDiskUse=True)
+
+
+def verifier(db, collection_nom=COLLECTION):
+    """
+    Compare chaque résumé à un recalcul complet. Les entrées à count 0 (clés
+    dont tous les documents ont été supprimés) sont ignorées. Retourne la
+    liste des écarts (collection, _id, stocké, attendu).
+    """
+    def indexer(docs):
+        return {repr(doc['_id']): doc for doc in docs if doc.get('count')}
+
+    ecarts = []
+    for nom in RESUMES:
+        attendu = indexer(db[collection_nom].aggregate(pipeline_recalcul(nom), allowDiskUse=True))
+        stocke = indexer(db[nom].find())
+        for cle in sorted(set(attendu) | set(stocke)):
+            a, s = attendu.get(cle), stocke.get(cle)
+            champs = set(a or {}) | set(s or {})
+            if any(abs((a or {}).get(c, 0) - (s or {}).get(c, 0)) > 1e-6 for c in champs if c != '_id'):
+                ecarts.append((nom, cle, s, a))
+    return ecarts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collections de résumés de medic2.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--reconstruire", action="store_true", help="Recalculer tous les résumés depuis medic2")
+    parser.add_argument("--verifier", action="store_true", help="Comparer les résumés à un recalcul complet")
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[BASE]
+
+    if args.reconstruire:
+        reconstruire(db)
+        print(f"✅ Résumés reconstruits : {', '.join(RESUMES)}")
+
+    if args.verifier:
+        ecarts = verifier(db)
+        if ecarts:
+            print(f"❌ {len(ecarts)} écart(s) entre les résumés et un recalcul complet :")
+            for nom, cle, stocke, attendu in ecarts[:10]:
+                print(f"   → {nom} {cle} : stocké {stocke}, attendu {attendu}")
+            sys.exit(1)
+        print("✅ Résumés cohérents avec un recalcul complet.")
+
+    if not (args.reconstruire or args.verifier):
+        for nom in RESUMES:
+            print(f"{nom:<42} {db[nom].estimated_document_count():>6} documents")
+
+
+if __name__ == "__main__":
+    main()
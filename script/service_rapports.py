@@ -0,0 +1,220 @@
+"""
+Script : service_rapports.py
+But : Exposer les rapports du registre (rapports.RAPPORTS) aux tableaux de
+      bord internes par un petit service HTTP asyncio, sur le client
+      asynchrone de pymongo (AsyncMongoClient).
+
+        GET /rapports               → liste des rapports
+        GET /rapports/<nom>         → {nom, resultats, latence} en JSON
+        GET /rapports/<nom>?texte   → tableau texte (formater du rapport)
+        GET /sante                  → compteurs du service
+        GET /metrics                → mesures au format Prometheus
+
+      - Regroupement : les requêtes simultanées pour un même rapport
+        partagent une seule agrégation en cours.
+      - Contre-pression : au plus MAX_EN_VOL agrégations tournent en même
+        temps ; au-delà de FILE_MAX agrégations en attente, la requête est
+        refusée immédiatement (503 + Retry-After) au lieu de s'empiler.
+      - Délai : chaque agrégation est bornée par DELAI secondes côté client
+        et par maxTimeMS côté serveur (504 si dépassé).
+
+      Test de charge : bench_service.py.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from pymongo import AsyncMongoClient
+
+from instrumentation import METRIQUES
+from rapports import BASE, COLLECTION, MONGO_URI, RAPPORTS
+
+# === CONFIGURATION ===
+HOTE = '127.0.0.1'
+PORT = 8080
+MAX_EN_VOL = 8    # Agrégations exécutées simultanément
+FILE_MAX = 32     # Agrégations en attente d'un créneau avant refus (503)
+DELAI = 10.0      # Secondes par agrégation avant abandon (504)
+
+STATUTS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+
+class Surcharge(Exception):
+    """Trop d'agrégations en attente : la requête est refusée sans être mise en file."""
+
+
+class ServiceRapports:
+    """
+    Exécution asynchrone des rapports avec regroupement des requêtes
+    identiques, limite de concurrence et délai maximal.
+    """
+
+    def __init__(self, collection, max_en_vol=MAX_EN_VOL, file_max=FILE_MAX, delai=DELAI, regrouper=True):
+        self.collection = collection
+        self.delai = delai
+        self.file_max = file_max
+        self.regrouper = regrouper
+        self._creneaux = asyncio.Semaphore(max_en_vol)
+        self._en_vol = {}      # nom → tâche de l'agrégation en cours
+        self._en_attente = 0   # agrégations lancées qui attendent un créneau
+        self.stats = {'requetes': 0, 'agregations': 0, 'regroupees': 0,
+                      'refusees': 0, 'expirees': 0, 'erreurs': 0}
+
+    async def _agreger(self, nom):
+        self._en_attente += 1
+        try:
+            await self._creneaux.acquire()
+        finally:
+            self._en_attente -= 1
+        try:
+            self.stats['agregations'] += 1
+            module = RAPPORTS[nom]
+            options = {'collation': module.collation} if getattr(module, 'collation', None) else {}
+            index = getattr(module, 'index', None)
+            if index and index in {i['name'] async for i in await self.collection.list_indexes()}:
+                options['hint'] = index  # Même règle que indexes.hint_si_present
+            curseur = await self.collection.aggregate(module.pipeline, maxTimeMS=int(self.delai * 1000), **options)
+            return await curseur.to_list()
+        finally:
+            self._creneaux.release()
+
+    async def rapport(self, nom):
+        """
+        Résultats du rapport `nom`. Rejoint l'agrégation en cours s'il y en
+        a une ; lève Surcharge si la file est pleine, asyncio.TimeoutError
+        au-delà du délai.
+        """
+        self.stats['requetes'] += 1
+        tache = self._en_vol.get(nom) if self.regrouper else None
+        if tache is not None:
+            self.stats['regroupees'] += 1
+        else:
+            if self._en_attente >= self.file_max:
+                self.stats['refusees'] += 1
+                raise Surcharge(nom)
+            tache = asyncio.ensure_future(asyncio.wait_for(self._agreger(nom), self.delai))
+            if self.regrouper:
+                self._en_vol[nom] = tache
+                tache.add_done_callback(lambda t: self._en_vol.pop(nom) if self._en_vol.get(nom) is t else None)
+        try:
+            # shield : l'abandon d'un client n'annule pas l'agrégation des autres
+            return await asyncio.shield(tache)
+        except asyncio.TimeoutError:
+            self.stats['expirees'] += 1
+            raise
+        except Exception:
+            self.stats['erreurs'] += 1
+            raise
+
+    # --- HTTP ---
+    async def _repondre(self, chemin, requete):
+        if chemin == '/sante':
+            return 200, {**self.stats, 'en_vol': len(self._en_vol), 'en_attente': self._en_attente}
+        if chemin == '/metrics':
+            for nom, valeur in {**self.stats, 'en_vol': len(self._en_vol), 'en_attente': self._en_attente}.items():
+                METRIQUES.jauge(f'service_{nom}', valeur)
+            return 200, METRIQUES.exposition()
+        if chemin in ('/rapports', '/rapports/'):
+            return 200, sorted(RAPPORTS)
+        if not chemin.startswith('/rapports/'):
+            return 404, {'erreur': f"chemin inconnu : {chemin}"}
+        nom = chemin[len('/rapports/'):]
+        if nom not in RAPPORTS:
+            return 404, {'erreur': f"rapport inconnu : {nom}"}
+
+        debut = time.perf_counter()
+        try:
+            resultats = await self.rapport(nom)
+        except Surcharge:
+            return 503, {'erreur': "service surchargé, réessayer plus tard"}
+        except asyncio.TimeoutError:
+            return 504, {'erreur': f"délai de {self.delai} s dépassé"}
+        except Exception as e:
+            return 500, {'erreur': str(e)}
+        latence = time.perf_counter() - debut
+        METRIQUES.incrementer('service_latence_secondes_total', latence, rapport=nom)
+        METRIQUES.incrementer('service_reponses_total', rapport=nom)
+        if requete == 'texte':
+            try:
+                return 200, RAPPORTS[nom].formater(resultats)
+            except Exception as e:  # Comme rapports.executer_rapport : l'erreur de mise en forme est rapportée
+                self.stats['erreurs'] += 1
+                return 500, {'erreur': f"mise en forme : {e}"}
+        return 200, {'nom': nom, 'resultats': resultats, 'latence': latence}
+
+    async def traiter_connexion(self, lecteur, ecrivain):
+        """Une requête HTTP/1.1 par connexion (Connection: close)."""
+        try:
+            ligne = await lecteur.readline()
+            while (await lecteur.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # en-têtes ignorés
+            try:
+                methode, cible, _version = ligne.decode('latin-1').split()
+            except ValueError:
+                statut, corps = 400, {'erreur': "requête invalide"}
+            else:
+                url = urlsplit(cible)
+                if methode != 'GET':
+                    statut, corps = 405, {'erreur': "seul GET est accepté"}
+                else:
+                    statut, corps = await self._repondre(url.path, url.query)
+
+            if isinstance(corps, str):
+                donnees, type_contenu = corps.encode('utf-8'), 'text/plain; charset=utf-8'
+            else:
+                donnees = json.dumps(corps, ensure_ascii=False, default=str).encode('utf-8')
+                type_contenu = 'application/json'
+            entetes = [f"HTTP/1.1 {statut} {STATUTS[statut]}",
+                       f"Content-Type: {type_contenu}",
+                       f"Content-Length: {len(donnees)}",
+                       "Connection: close"]
+            if statut == 503:
+                entetes.append("Retry-After: 1")
+            ecrivain.write(("\r\n".join(entetes) + "\r\n\r\n").encode('latin-1') + donnees)
+            await ecrivain.drain()
+        except ConnectionError:
+            pass
+        finally:
+            ecrivain.close()
+
+
+async def demarrer(uri=MONGO_URI, hote=HOTE, port=PORT, **options):
+    """Crée le client, le service et le serveur HTTP ; retourne (serveur, service, client)."""
+    client = AsyncMongoClient(uri, maxPoolSize=options.get('max_en_vol', MAX_EN_VOL))
+    service = ServiceRapports(client[BASE][COLLECTION], **options)
+    serveur = await asyncio.start_server(service.traiter_connexion, hote, port, backlog=1024)
+    return serveur, service, client
+
+
+async def servir(args):
+    serveur, _service, client = await demarrer(args.uri, args.hote, args.port, max_en_vol=args.max_en_vol,
+                                               file_max=args.file_max, delai=args.delai)
+    print(f"🚀 Service des rapports sur http://{args.hote}:{args.port}/rapports")
+    try:
+        async with serveur:
+            await serveur.serve_forever()
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service HTTP asynchrone des rapports MongoDB.")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--hote", default=HOTE)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-en-vol", type=int, default=MAX_EN_VOL, help="Agrégations simultanées")
+    parser.add_argument("--file-max", type=int, default=FILE_MAX, help="Agrégations en attente avant refus (503)")
+    parser.add_argument("--delai", type=float, default=DELAI, help="Délai maximal d'une agrégation (s)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(servir(args))
+    except KeyboardInterrupt:
+        print("\n👋 Service arrêté.")
+
+
+if __name__ == "__main__":
+    main()
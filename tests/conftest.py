@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+sys.path.insert(0, os.path.join(RACINE, "script"))
+
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
+BASE_TESTS = "FirstTry_tests"
+
+
+@pytest.fixture
+def db():
+    """Base jetable sur le mongod de MONGO_URI ; le test est ignoré si aucun serveur ne répond."""
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"aucun mongod sur {MONGO_URI}")
+    client.drop_database(BASE_TESTS)
+    yield client[BASE_TESTS]
+    client.drop_database(BASE_TESTS)
+    client.close()
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from analyse_locale import RAPPORTS_LOCAUX, comparer_documents, executer_local, typer_dataframe
+
+COLONNES = ['Name', 'Age', 'Gender', 'Blood Type', 'Medical Condition', 'Date of Admission', 'Doctor', 'Hospital',
+            'Insurance Provider', 'Billing Amount', 'Room Number', 'Admission Type', 'Discharge Date',
+            'Medication', 'Test Results']
+LIGNES = [
+    ['A', '40', 'Female', 'A+', 'Cancer', '2023-01-10', 'D1', 'General', 'X', '100', '1', 'Urgent', '2023-01-15',
+     'Aspirin', 'Normal'],
+    ['B', '50', 'Male', 'O-', 'cancer', '2023-01-10', 'D2', 'General', 'X', '200', '2', 'Urgent', '2023-01-12',
+     'Aspirin', 'Abnormal'],
+    ['C', '61', 'Male', 'A+', 'Asthma', '2023-02-01', 'D3', 'Mercy', 'X', '300', '3', 'Elective', '2023-02-08',
+     'Ventolin', 'Normal'],
+    ['D', '', 'Male', 'A+', 'CANCER', '', 'D4', 'General', 'X', '400', '4', 'Urgent', '', 'Lipitor',
+     'Inconclusive'],
+]
+
+ATTENDUS = {
+    'AgeByDesease': [{'_id': 'Asthma', 'ageMoyen': 61.0, 'nbPatients': 1},
+                     {'_id': 'Cancer', 'ageMoyen': 45.0, 'nbPatients': 2}],
+    'ByBlood': [{'Blood Type': 'A+', 'count': 3, 'percentage': 75.0},
+                {'Blood Type': 'O-', 'count': 1, 'percentage': 25.0}],
+    'TopHospital': [{'_id': 'General', 'admissionCount': 3}],
+    'MedicationByCancer': [{'_id': 'Aspirin', 'count': 2}, {'_id': 'Lipitor', 'count': 1}],
+    'MedicationByCancerAndResults': [
+        {'_id': 'Aspirin', 'totalTests': 2, 'abnormalPercent': 50.0, 'inconclusivePercent': 0.0,
+         'normalPercent': 50.0},
+        {'_id': 'Lipitor', 'totalTests': 1, 'abnormalPercent': 0.0, 'inconclusivePercent': 100.0,
+         'normalPercent': 0.0}],
+    'DureeMoyenneSejourHopital': [{'_id': None, 'averageStay': 14 / 3}],
+}
+
+
+@pytest.fixture
+def df():
+    return typer_dataframe(pd.DataFrame(LIGNES, columns=COLONNES))
+
+
+@pytest.mark.parametrize('nom', list(RAPPORTS_LOCAUX))
+def test_rapport_local(df, nom):
+    resultat = executer_local(df, nom)
+    assert comparer_documents(resultat['resultats'], ATTENDUS[nom], nom) == []
+    assert resultat['texte']
+
+
+@pytest.mark.parametrize('nom', list(RAPPORTS_LOCAUX))
+def test_rapport_local_sans_ligne(nom):
+    vide = typer_dataframe(pd.DataFrame([], columns=COLONNES))
+    resultat = executer_local(vide, nom)
+    assert resultat['resultats'] == []  # Comme une agrégation sur une collection vide
+    assert resultat['texte']
+
+
+def test_duree_sans_valeur_lisible(df):
+    sans_dates = df.assign(**{'Length of Stay': float('nan')})
+    resultat = executer_local(sans_dates, 'DureeMoyenneSejourHopital')
+    assert resultat['resultats'] == [{'_id': None, 'averageStay': None}]  # $avg sans valeur numérique : null
+    assert 'Aucune durée' in resultat['texte']
@@ -0,0 +1,78 @@
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+
+import cache_rapports
+from cache_rapports import CacheRapports, cle_pipeline, espace, incrementer_version, lire_version
+
+PIPELINE = [{'$group': {'_id': '$Blood Type', 'n': {'$sum': 1}}}]
+
+
+def collection(uri, base='FirstTry'):
+    return MongoClient(uri, connect=False)[base]['medic2']
+
+
+def test_espace_distingue_serveur_et_base():
+    espaces = {
+        espace(collection('mongodb://localhost:27017')),
+        espace(collection('mongodb://localhost:27017', 'FirstTry_plans')),
+        espace(collection('mongodb://autre:27017')),
+    }
+    assert len(espaces) == 3
+    assert len({cle_pipeline(e, PIPELINE, ('jeton', 1)) for e in espaces}) == 3
+
+
+def test_espace_replica_set_independant_des_graines():
+    a = espace(collection('mongodb://h1:27017,h2:27017/?replicaSet=rs0'))
+    b = espace(collection('mongodb://h2:27017/?replicaSet=rs0'))
+    assert a == b == 'rs0/FirstTry.medic2'
+
+
+def test_base_recreee_change_de_version(db):
+    incrementer_version(db)
+    avant = lire_version(db)
+    db.client.drop_database(db.name)
+    incrementer_version(db)
+    apres = lire_version(db)
+    assert avant[1] == apres[1] == 1
+    assert avant != apres
+
+
+def test_cache_ne_melange_pas_les_bases(db, tmp_path):
+    autre = db.client[db.name + '_autre']
+    try:
+        db['medic2'].insert_one({'Blood Type': 'A+'})
+        autre['medic2'].insert_many([{'Blood Type': 'O-'}, {'Blood Type': 'O-'}])
+        cache = CacheRapports(fichier=str(tmp_path / 'cache.sqlite'))
+        assert cache.obtenir(db['medic2'], PIPELINE) == [{'_id': 'A+', 'n': 1}]
+        assert cache.obtenir(autre['medic2'], PIPELINE) == [{'_id': 'O-', 'n': 2}]
+    finally:
+        db.client.drop_database(autre.name)
+
+
+class SansChangeStream:
+    """Collection d'un serveur autonome : watch() est refusé."""
+    database = None
+    name = 'medic2'
+    full_name = 'FirstTry.medic2'
+
+    def __init__(self, espace):
+        self.espace = espace
+
+    def watch(self):
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", 40573)
+
+
+def test_echec_du_change_stream_retablit_la_relecture(monkeypatch, tmp_path):
+    versions = {'rs0/FirstTry.medic2': 1, 'rs0/FirstTry.autre': 1}
+    monkeypatch.setattr(cache_rapports, 'espace', lambda collection: collection.espace)
+    monkeypatch.setattr(cache_rapports, 'lire_version', lambda db, nom: versions[f'rs0/FirstTry.{nom}'])
+    cache = CacheRapports(fichier=None, intervalle_version=0.0)
+    suivie, autre = SansChangeStream('rs0/FirstTry.medic2'), SansChangeStream('rs0/FirstTry.autre')
+    autre.name = 'autre'
+    assert cache.version(autre) == 1
+    cache.surveiller(suivie).join(timeout=5)
+
+    # La version de la collection suivie redevient relue, et les autres collections n'ont jamais cessé de l'être
+    versions.update({'rs0/FirstTry.medic2': 2, 'rs0/FirstTry.autre': 2})
+    assert cache.version(suivie) == 2
+    assert cache.version(autre) == 2
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from check_doublons import apparier_bloc, traiter_doublons, traiter_doublons_par_blocs
+
+COLONNES = ["Name", "Age", "Gender", "Blood Type", "Medical Condition", "Date of Admission", "Doctor",
+            "Hospital", "Billing Amount"]
+
+
+def patient(nom, age, condition="Asthma", montant=1200.5, hopital="General"):
+    return [nom, age, "Female", "A+", condition, "2023-01-10", "Dr. Who", hopital, montant]
+
+
+def _nombre(valeur):
+    try:
+        return float(valeur)
+    except ValueError:
+        return valeur
+
+
+def comparable(df):
+    """Lignes conservées, âges en nombres, sans dépendre de l'index ni du type de colonne."""
+    df = df.reset_index(drop=True).astype(object)
+    df["Age"] = df["Age"].map(_nombre)
+    return df.to_dict("records")
+
+
+def test_parite_sur_groupes_de_deux():
+    df = pd.DataFrame([
+        patient("Ann Lee", 40), patient("ANN LEE ", 44),                             # fusion (âge 42)
+        patient("Bob Ray", 30), patient("bob ray", 33, condition="Cancer"),         # suppression des deux
+        patient("Cy Dunn", 20), patient("Cy Dunn", 50),                              # écart > 7 ans : gardées
+        patient("Di Fox", 61), patient("Di Fox", 62, hopital="North"),               # clé différente
+        patient("Ed Kim", "inconnu"), patient("Ed Kim", 45),                         # âge non numérique
+        patient("Flo Ng", 70, montant="n/a"), patient("Flo Ng", 71, montant="n/a"),  # montant non numérique
+        patient("Gus Orr", 35),
+    ], columns=COLONNES)
+    ancien, blocs = traiter_doublons(df), traiter_doublons_par_blocs(df)
+    assert comparable(blocs) == comparable(ancien)
+    assert len(blocs) == len(df) - 3
+    assert comparable(blocs)[0]["Age"] == 42
+
+
+def test_groupe_de_trois_ligne_absorbee_non_reutilisee():
+    # A et C sont à 7 ans, B et C aussi, A et B à 14 ans
+    df = pd.DataFrame([patient("Ann Lee", 30), patient("Ann Lee", 44), patient("Ann Lee", 37)], columns=COLONNES)
+    ancien, blocs = comparable(traiter_doublons(df)), comparable(traiter_doublons_par_blocs(df))
+    # traiter_doublons refusionne C, déjà absorbée par A, avec B ; le moteur par blocs garde B tel quel
+    assert [r["Age"] for r in ancien] == [34, 41]
+    assert [r["Age"] for r in blocs] == [34, 44]
+
+
+def test_apparier_bloc_dans_l_ordre_du_fichier():
+    assert apparier_bloc([10, 11, 12, 13], [30.0, 44.0, 37.0, 45.0]) == [(10, 12), (11, 13)]
+    assert apparier_bloc([5, 6, 7], [40.0, 41.0, 42.0]) == [(5, 6)]
@@ -0,0 +1,54 @@
+import itertools
+
+import pandas as pd
+
+from check_integrity_json import trouver_doublons_personnalises
+
+COLONNES = ["Name", "Age", "Gender", "Blood Type", "Doctor", "Hospital", "Billing Amount", "Date of Admission"]
+
+
+def patient(nom, age, hopital="General", montant=1200.5):
+    return [nom, age, "Female", "A+", "Dr. Who", hopital, montant, "2023-01-10"]
+
+
+def paires_reference(df):
+    """Critères de l'ancienne double boucle : même nom normalisé, colonnes exactes égales, âges à ±7 ans."""
+    paires = set()
+    for i, j in itertools.combinations(df.index, 2):
+        a, b = df.loc[i], df.loc[j]
+        if (str(a["Name"]).strip().lower() == str(b["Name"]).strip().lower()
+                and abs(a["Age"] - b["Age"]) <= 7
+                and all(a[c] == b[c] for c in COLONNES[2:])):
+            paires.add(frozenset((i, j)))
+    return paires
+
+
+def test_paires_identiques_a_la_double_boucle():
+    df = pd.DataFrame([
+        patient("Ann Lee", 30), patient("ann lee ", 37), patient("ANN LEE", 44),  # groupe de trois, bornes à 7 ans
+        patient("Bob Ray", 90), patient("Bob Ray", 0), patient("Bob Ray", 5),     # âges extrêmes
+        patient("Cy Dunn", 40), patient("Cy Dunn", 41, hopital="North"),           # colonne exacte différente
+        patient("Di Fox", 60), patient("Di Fox", 60, montant=1200.51),
+        patient("Ed Kim", 20), patient("Ed Kim", 21), patient("Ed Kim", 22),
+    ], columns=COLONNES)
+    paires, compteurs = trouver_doublons_personnalises(df)
+    trouvees = {frozenset(p) for p in zip(paires["index_1"], paires["index_2"])}
+    assert trouvees == paires_reference(df)
+    assert compteurs == {"paires": 6, "lignes_concernees": 8, "groupes_concernes": 3}
+
+
+def test_age_non_numerique_ou_colonne_vide_ignores():
+    df = pd.DataFrame([
+        patient("Ann Lee", "inconnu"), patient("Ann Lee", 40),
+        patient("Bob Ray", 30, hopital=None), patient("Bob Ray", 31, hopital=None),
+        patient("Cy Dunn", "45"), patient("Cy Dunn", 47),
+    ], columns=COLONNES)
+    paires, compteurs = trouver_doublons_personnalises(df)
+    assert list(zip(paires["index_1"], paires["index_2"])) == [(4, 5)]
+    assert compteurs["paires"] == 1
+
+
+def test_aucune_paire():
+    df = pd.DataFrame([patient("Ann Lee", 30), patient("Bob Ray", 30)], columns=COLONNES)
+    paires, compteurs = trouver_doublons_personnalises(df)
+    assert paires.empty and compteurs == {"paires": 0, "lignes_concernees": 0, "groupes_concernes": 0}
@@ -0,0 +1,22 @@
+from dashboard import _normaliser, executer_dashboard, pipeline_dashboard
+from rapports import RAPPORTS, executer_rapport
+
+
+def test_facet_sans_rapports_avec_collation():
+    facettes = pipeline_dashboard()[-1]['$facet']
+    assert set(facettes) == {nom for nom, module in RAPPORTS.items() if getattr(module, 'collation', None) is None}
+    assert 'MedicationByCancer' not in facettes
+
+
+def test_parite_dashboard_rapports_casse_mixte(db):
+    collection = db['medic2']
+    collection.insert_many([
+        {'Medical Condition': condition, 'Medication': medicament, 'Test Results': resultat, 'Age': age,
+         'Blood Type': 'A+', 'Hospital': 'General', 'Length of Stay': 3}
+        for condition, medicament, resultat, age in [
+            ('Cancer', 'Aspirin', 'Normal', 40), ('cancer', 'Aspirin', 'Abnormal', 52),
+            ('CANCER', 'Lipitor', 'Normal', 61), ('Asthma', 'Ventolin', 'Normal', 30)]
+    ])
+    facettes, _ = executer_dashboard(collection)
+    for nom in RAPPORTS:
+        assert _normaliser(facettes[nom]) == _normaliser(executer_rapport(collection, nom)['resultats']), nom
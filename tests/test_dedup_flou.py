@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from check_doublons import traiter_doublons_par_blocs
+from dedup_flou import apparier, normaliser_flou, purger_flou, similarite_dice, soundex
+
+COLONNES = ["Name", "Age", "Gender", "Blood Type", "Medical Condition", "Date of Admission", "Doctor",
+            "Hospital", "Billing Amount"]
+
+
+def patient(nom, age, condition="Asthma", groupe="A+", montant=1200.5, medecin="Dr. Watson", date="2023-01-10"):
+    return [nom, age, "Female", groupe, condition, date, medecin, "General Hospital", montant]
+
+
+def test_normalisation_et_phonetique():
+    assert normaliser_flou("Dr. Émile  WATSON") == "emile watson"
+    assert soundex("robert") == soundex("rupert") == "R163"
+    assert list(similarite_dice(["martha", "abc"], ["martha", "xyz"])) == [1.0, 0.0]
+
+
+def test_faute_de_frappe_et_titre_fusionnes():
+    df = pd.DataFrame([
+        patient("Martha Jones", 40, medecin="Dr. Watson"), patient("Martha Jnoes", 44, medecin="Dr Watson"),
+        patient("Rory Williams", 50), patient("Rory Wiliams", 52, condition="Cancer"),  # suppression des deux
+    ], columns=COLONNES)
+    resultat, stats = purger_flou(df)
+    assert resultat["Name"].tolist() == ["Martha Jones"]
+    assert resultat["Age"].tolist() == [42]
+    assert (stats["fusions"], stats["suppressions"], stats["doublons_flous"]) == (1, 1, 2)
+
+
+def test_filtres_exacts_et_valeurs_non_numeriques():
+    df = pd.DataFrame([
+        patient("Amy Pond", 30), patient("Amy Pnod", 31, groupe="O-"),             # groupe sanguin différent
+        patient("Clara Oswald", 30), patient("Clara Oswlad", 45),                  # âges à plus de 7 ans
+        patient("River Song", "inconnu"), patient("River Snog", 40),               # âge non numérique
+        patient("Donna Noble", 60, montant="n/a"), patient("Donna Nobel", 61, montant="n/a"),
+        patient("Jack Harkness", 35), patient("Jack Harknes", 36, date="2023-01-11"),
+    ], columns=COLONNES)
+    resultat, stats = purger_flou(df)
+    assert len(resultat) == len(df)
+    assert stats["doublons"] == 0
+
+
+def test_doublons_exacts_comme_le_moteur_par_blocs():
+    df = pd.DataFrame([
+        patient("Ann Lee", 40), patient("ann lee", 44), patient("Bob Ray", 30), patient("Bob Ray", 33, "Cancer"),
+        patient("Cy Dunn", 20), patient("Cy Dunn", 50),
+    ], columns=COLONNES)
+    flou, stats = purger_flou(df)
+    exact = traiter_doublons_par_blocs(df)
+    assert flou.index.tolist() == exact.index.tolist()
+    assert flou["Age"].tolist() == exact["Age"].tolist()
+    assert stats["doublons_flous"] == 0
+
+
+def test_appariement_une_ligne_au_plus_une_fois():
+    assert apparier(np.array([0, 0, 1, 2]), np.array([1, 2, 2, 3])) == [(0, 1), (2, 3)]
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne
+
+from dedup_mongo import ORDRE_MEMBRES, dedupliquer, operations_groupe, pipeline_groupes_doublons
+
+
+def patient(**champs):
+    return {'Name': 'Jane Roe', 'Gender': 'Female', 'Blood Type': 'A+', 'Doctor': 'Dr. Who',
+            'Hospital': 'General', 'Date of Admission': datetime(2023, 1, 10), 'Billing Amount': 1200.5,
+            'Medical Condition': 'Asthma', 'Age': 40, **champs}
+
+
+def test_membres_tries_cote_serveur():
+    derniere = pipeline_groupes_doublons()[-1]
+    assert derniere == {'$set': {'membres': {'$sortArray': {'input': '$membres', 'sortBy': ORDRE_MEMBRES}}}}
+
+
+def test_groupe_avec_id_mixtes():
+    # Ordre produit par ORDRE_MEMBRES : l'ObjectId ('objectId') avant l'_id texte ('string')
+    oid = ObjectId()
+    membres = [
+        {'id': oid, 'type_id': 'objectId', 'age': 40, 'age_brut': 40, 'condition': 'asthma', 'resume': {}},
+        {'id': 'a3f1c2', 'type_id': 'string', 'age': 45, 'age_brut': 45, 'condition': 'asthma', 'resume': {}},
+    ]
+    operations, fusions, suppressions, _ = operations_groupe(membres)
+    assert (fusions, suppressions) == (1, 0)
+    assert operations == [UpdateOne({'_id': oid}, {'$set': {'Age': 43}}), DeleteOne({'_id': 'a3f1c2'})]
+
+
+def test_dedupliquer_id_mixtes(db):
+    collection = db['medic2']
+    oid = collection.insert_one(patient(Age=40)).inserted_id
+    collection.insert_one(patient(_id='a3f1c2', Age=45))
+    stats = dedupliquer(collection)
+    assert stats['fusions'] == 1
+    assert list(collection.find({}, {'Age': 1})) == [{'_id': oid, 'Age': 43}]
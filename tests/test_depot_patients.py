@@ -0,0 +1,52 @@
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+
+import depot_patients
+from depot_patients import DepotPatients
+
+PATIENT = {'Name': 'John Doe', 'Gender': 'Male', 'Blood Type': 'O+', 'Doctor': 'Dr. Watson',
+           'Hospital': 'LLC Smith', 'Medical Condition': 'Asthma', 'Billing Amount': 1500.0}
+
+
+class Collection:
+    """Collection minimale : refuse l'insertion d'un _id déjà présent, comme l'index _id."""
+    name = 'medic2'
+    database = None
+
+    def __init__(self):
+        self.ids = set()
+
+    def with_options(self, **options):
+        return self
+
+    def find(self, filtre, projection):
+        return []
+
+    def bulk_write(self, operations, ordered):
+        erreurs, inseres = [], 0
+        for i, operation in enumerate(operations):
+            _id = operation._doc['_id']
+            if _id in self.ids:
+                erreurs.append({'index': i, 'code': 11000, 'errmsg': f'E11000 duplicate key {_id}'})
+            else:
+                self.ids.add(_id)
+                inseres += 1
+        details = {'nInserted': inseres, 'nModified': 0, 'nRemoved': 0, 'nUpserted': 0, 'nMatched': 0,
+                   'upserted': [], 'writeErrors': erreurs}
+        if erreurs:
+            raise BulkWriteError(details)
+        return BulkWriteResult(details, True)
+
+
+def test_doublon_signale_et_compteurs_par_execution(monkeypatch):
+    monkeypatch.setattr(depot_patients, 'incrementer_version', lambda *args: None)
+    depot = DepotPatients(Collection(), maj_resumes=False)
+    with depot:
+        _id = depot.creer(PATIENT)
+    assert depot.stats['crees'] == 1 and depot.erreurs == []
+
+    with depot:
+        depot.creer(PATIENT)
+    assert (depot.stats['crees'], depot.stats['echecs']) == (0, 1)
+    assert depot.erreurs == [{'_id': _id, 'operation': 'creation', 'code': 11000,
+                              'message': f'E11000 duplicate key {_id}'}]
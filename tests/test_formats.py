@@ -0,0 +1,12 @@
+import os
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_purge_csv_sans_pymongo():
+    code = ("import sys, check_doublons, check_integrity, dedup_externe; "
+            "print(sorted(m for m in ('pymongo', 'migration', 'format_colonnes') if m in sys.modules))")
+    sortie = subprocess.run([sys.executable, '-c', code], cwd=RACINE, capture_output=True, text=True, check=True)
+    assert sortie.stdout.strip() == '[]'
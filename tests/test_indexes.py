@@ -0,0 +1,44 @@
+import pytest
+
+from indexes import creer_indexes, hint_si_present, requetes_verification
+from rapports import RAPPORTS, executer_rapport
+
+
+class CollectionIndexes:
+    def __init__(self, noms):
+        self.noms = noms
+
+    def list_indexes(self):
+        return [{'name': nom} for nom in self.noms]
+
+
+def test_pipelines_sans_tri_initial():
+    for nom, module in RAPPORTS.items():
+        assert '$sort' not in module.pipeline[0], nom
+
+
+def test_hint_seulement_si_index_present():
+    assert hint_si_present(CollectionIndexes(['_id_', 'blood_type']), 'blood_type') == {'hint': 'blood_type'}
+    assert hint_si_present(CollectionIndexes(['_id_']), 'blood_type') == {}
+    assert hint_si_present(CollectionIndexes(['_id_']), None) == {}
+
+
+def test_verification_des_pipelines_reels():
+    requetes = requetes_verification()
+    for nom in ('ByBlood', 'TopHospital', 'AgeByDesease', 'MedicationByCancer'):
+        pipeline, _, collation, _ = requetes[f"{nom}.py"]
+        assert pipeline is RAPPORTS[nom].pipeline
+        assert collation is getattr(RAPPORTS[nom], 'collation', None)
+
+
+@pytest.mark.parametrize('avec_index', [False, True])
+def test_rapports_avec_et_sans_index(db, avec_index):
+    collection = db['medic2']
+    collection.insert_many([{'Blood Type': bt, 'Hospital': 'General', 'Medical Condition': 'Asthma', 'Age': 40,
+                             'Medication': 'Aspirin', 'Test Results': 'Normal', 'Length of Stay': 3}
+                            for bt in ('A+', 'A+', 'O-')])
+    if avec_index:
+        creer_indexes(collection)
+    for nom in ('ByBlood', 'TopHospital', 'AgeByDesease'):
+        resultat = executer_rapport(collection, nom)
+        assert resultat['erreur'] is None and resultat['resultats'], nom
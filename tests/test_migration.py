@@ -0,0 +1,103 @@
+import csv
+
+from pymongo.results import BulkWriteResult
+
+import migration
+from depot_patients import identifiant
+from migration import CHAMP_EMPREINTE, charger_incremental, cle_naturelle, convertir_document, empreinte_fichier
+
+COLONNES = ['Name', 'Age', 'Gender', 'Blood Type', 'Medical Condition', 'Date of Admission', 'Doctor',
+            'Hospital', 'Insurance Provider', 'Billing Amount', 'Room Number', 'Admission Type',
+            'Discharge Date', 'Medication', 'Test Results']
+
+
+def ecrire_csv(chemin, lignes):
+    with open(chemin, 'w', newline='', encoding='utf-8') as f:
+        ecrivain = csv.writer(f)
+        ecrivain.writerow(COLONNES)
+        ecrivain.writerows(lignes)
+
+
+def ligne(i, age=40, chambre='101'):
+    return [f'Patient {i}', str(age), 'Female', 'A+', 'Asthma', '2023-01-10', 'Dr. Who', 'General',
+            'Aetna', '1200.50', chambre, 'Urgent', '2023-01-15', 'Aspirin', 'Normal']
+
+
+class Base(dict):
+    """Base minimale : collections créées à la demande."""
+    def __missing__(self, nom):
+        self[nom] = Collection(self)
+        return self[nom]
+
+
+class Collection:
+    """Collection minimale en mémoire pour charger_incremental (find, bulk_write d'upserts, points de reprise)."""
+    def __init__(self, database=None):
+        self.database = database
+        self.docs = {}
+
+    def find_one(self, filtre):
+        return self.docs.get(filtre['_id'])
+
+    def find(self, filtre, projection):
+        return [dict(self.docs[_id]) for _id in filtre['_id']['$in'] if _id in self.docs]
+
+    def update_one(self, filtre, maj, upsert=False):
+        self.docs.setdefault(filtre['_id'], {'_id': filtre['_id']}).update(maj['$set'])
+
+    def bulk_write(self, operations, ordered):
+        upserts = []
+        for i, operation in enumerate(operations):
+            if operation._filter['_id'] not in self.docs:
+                upserts.append({'index': i, '_id': operation._filter['_id']})
+            self.update_one(operation._filter, operation._doc)
+        return BulkWriteResult({'nUpserted': len(upserts), 'upserted': upserts, 'nMatched': 0,
+                                'nModified': len(operations) - len(upserts), 'nInserted': 0, 'nRemoved': 0}, True)
+
+
+def test_empreinte_fichier_couvre_tout_le_fichier(tmp_path):
+    a, b = tmp_path / 'a.csv', tmp_path / 'b.csv'
+    debut = b'x' * (2 * 1024 * 1024)
+    a.write_bytes(debut + b'1')
+    b.write_bytes(debut + b'2')  # Même taille, différence après le premier Mo
+    assert empreinte_fichier(str(a)) != empreinte_fichier(str(b))
+
+
+def test_reimport_ne_reecrit_que_les_lignes_changees(db, tmp_path):
+    collection = db['medic2']
+    premier, second = tmp_path / 'j1.csv', tmp_path / 'j2.csv'
+    ecrire_csv(premier, [ligne(i) for i in range(10)])
+    stats = charger_incremental(collection, str(premier), taille_lot=4, maj_resumes=False)
+    assert (stats['inseres'], stats['modifies'], stats['inchanges']) == (10, 0, 0)
+
+    # Jour suivant : une ligne modifiée (hors clé naturelle), une ligne nouvelle
+    ecrire_csv(second, [ligne(i, chambre='102' if i == 3 else '101') for i in range(11)])
+    stats = charger_incremental(collection, str(second), taille_lot=4, maj_resumes=False)
+    assert (stats['inseres'], stats['modifies'], stats['inchanges']) == (1, 1, 9)
+    assert collection.count_documents({}) == 11
+    assert collection.count_documents({CHAMP_EMPREINTE: {'$exists': True}}) == 11
+
+
+def test_cle_naturelle_distingue_les_ages_et_ignore_le_typage():
+    brute = dict(zip(COLONNES, ligne(1, age=40)))
+    # Document typé (Age entier) : même _id que la ligne texte, comme dans depot_patients
+    assert cle_naturelle(brute) == identifiant(convertir_document(brute))
+    # Gardées toutes deux par la purge (écart d'âge > 7 ans) : deux patients, deux _id
+    assert cle_naturelle(brute) != cle_naturelle(dict(zip(COLONNES, ligne(1, age=60))))
+
+
+def test_doublon_de_cle_ignore_et_resumes_comptes_une_fois(tmp_path, monkeypatch):
+    appels = []
+    monkeypatch.setattr(migration.resumes, 'maj_modification',
+                        lambda db, anciens, nouveaux: appels.append((len(anciens), [d['_id'] for d in nouveaux])))
+    chemin = tmp_path / 'doublons.csv'
+    # Ligne 0 répétée dans le même lot et dans le lot suivant
+    ecrire_csv(chemin, [ligne(0), ligne(1), ligne(0, chambre='999'), ligne(2), ligne(0, chambre='888')])
+    collection = Base()['medic2']
+    stats = charger_incremental(collection, str(chemin), taille_lot=3)
+
+    assert (stats['inseres'], stats['doublons'], stats['echecs']) == (3, 2, 0)
+    assert len(collection.docs) == 3
+    assert collection.docs[cle_naturelle(dict(zip(COLONNES, ligne(0))))]['Room Number'] == '101'
+    ecrits = [_id for _, ids in appels for _id in ids]
+    assert sorted(ecrits) == sorted(collection.docs) and all(anciens == 0 for anciens, _ in appels)
@@ -0,0 +1,37 @@
+import rapports
+from rapports import executer_rapport
+
+
+class Collection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def aggregate(self, pipeline, **options):
+        return iter(self.documents)
+
+    def list_indexes(self):
+        return []
+
+
+def test_erreur_de_mise_en_forme_rapportee(monkeypatch):
+    def formater(resultats):
+        raise KeyError('count')
+    monkeypatch.setattr(rapports.RAPPORTS['TopHospital'], 'formater', formater)
+    resultat = executer_rapport(Collection([{'_id': 'General'}]), 'TopHospital')
+    assert resultat['erreur'] == "mise en forme : 'count'"
+    assert resultat['resultats'] == [{'_id': 'General'}]
+    assert resultat['texte'].startswith('❌ TopHospital')
+
+
+def test_rapport_sans_erreur():
+    resultat = executer_rapport(Collection([{'_id': 'General', 'admissionCount': 3}]), 'TopHospital')
+    assert resultat['erreur'] is None
+    assert 'General (3 admissions)' in resultat['texte']
+
+
+def test_age_moyen_sur_import_sans_typage(db):
+    # migration.py --sans-typage : Age reste en texte
+    db['medic2'].insert_many([{'Medical Condition': 'Asthma', 'Age': age} for age in ('40', '50', '', 'inconnu')]
+                             + [{'Medical Condition': 'Asthma', 'Age': 60}])
+    resultat = executer_rapport(db['medic2'], 'AgeByDesease')
+    assert resultat['resultats'] == [{'_id': 'Asthma', 'ageMoyen': 50.0, 'nbPatients': 3}]
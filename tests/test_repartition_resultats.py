@@ -0,0 +1,51 @@
+import pytest
+
+import MedicationByCancerAndResults
+from indexes import COLLATION
+from repartition_resultats import pipeline_push_filter, pipeline_repartition, verifier_parite
+
+
+def pourcentage_ancien(valeur):
+    filtre = {'$filter': {'input': '$testResults', 'as': 'result', 'cond': {'$eq': ['$$result', valeur]}}}
+    return {'$multiply': [{'$divide': [{'$size': filtre}, {'$size': '$testResults'}]}, 100]}
+
+
+# Pipeline d'origine de MedicationByCancerAndResults.py ($push puis $size/$filter)
+PIPELINE_ORIGINAL = [
+    {'$match': {'Medical Condition': 'Cancer'}},
+    {'$group': {'_id': '$Medication', 'testResults': {'$push': '$Test Results'}}},
+    {'$project': {'_id': 1, 'totalTests': {'$size': '$testResults'},
+                  'abnormalPercent': pourcentage_ancien('Abnormal'),
+                  'inconclusivePercent': pourcentage_ancien('Inconclusive'),
+                  'normalPercent': pourcentage_ancien('Normal')}},
+]
+
+PATIENTS = [
+    ('Cancer', 'Aspirin', 'Abnormal'), ('Cancer', 'Aspirin', 'Normal'), ('cancer', 'Aspirin', 'Normal'),
+    ('Cancer', 'Aspirin', 'Inconclusive'), ('CANCER', 'Lipitor', 'Abnormal'), ('Cancer', 'Lipitor', 'Abnormal'),
+    ('Cancer', 'Lipitor', 'Normal'), ('Cancer', 'Ibuprofen', 'Unknown'), ('Asthma', 'Aspirin', 'Normal'),
+]
+
+
+def test_reference_est_le_pipeline_original():
+    assert pipeline_push_filter() == PIPELINE_ORIGINAL
+
+
+def test_rapport_utilise_les_compteurs():
+    assert MedicationByCancerAndResults.pipeline == pipeline_repartition()
+
+
+def test_pourcentages_identiques_a_l_ancien_rapport(db):
+    collection = db['medic2']
+    collection.insert_many([{'Medical Condition': c, 'Medication': m, 'Test Results': r} for c, m, r in PATIENTS])
+    ancien = {doc['_id']: doc for doc in collection.aggregate(PIPELINE_ORIGINAL, collation=COLLATION)}
+    nouveau = {doc['_id']: doc for doc in collection.aggregate(MedicationByCancerAndResults.pipeline,
+                                                              collation=COLLATION)}
+    assert set(nouveau) == set(ancien) == {'Aspirin', 'Lipitor', 'Ibuprofen'}
+    for medicament, doc in ancien.items():
+        assert nouveau[medicament]['totalTests'] == doc['totalTests']
+        for champ in ('abnormalPercent', 'inconclusivePercent', 'normalPercent'):
+            assert nouveau[medicament][champ] == pytest.approx(doc[champ])
+    assert nouveau['Aspirin']['normalPercent'] == pytest.approx(50.0)
+    assert nouveau['Ibuprofen']['abnormalPercent'] == 0
+    assert verifier_parite(collection) == []
@@ -0,0 +1,26 @@
+import resumes
+from resumes import RESUMES, _id_resume, calculer_deltas, maj_insertion, pipeline_recalcul, verifier
+
+DOCS = [
+    {'Blood Type': 'A+', 'Hospital': 'General', 'Medical Condition': 'Cancer', 'Medication': 'Aspirin',
+     'Test Results': 'Normal', 'Age': 50, 'Length of Stay': 4},
+    # Import en colonnes : les valeurs nulles sont omises
+    {'Blood Type': 'O-', 'Hospital': 'General', 'Medical Condition': 'Cancer', 'Age': 60},
+]
+
+
+def test_cle_a_plusieurs_champs_garde_les_champs_absents():
+    nom = 'resume_condition_medication_resultats'
+    champs = RESUMES[nom]['cle']
+    (cle,) = [c for c in calculer_deltas(DOCS[1:])[nom]]
+    assert _id_resume(cle, champs) == {'Medical Condition': 'Cancer', 'Medication': None, 'Test Results': None}
+    assert pipeline_recalcul(nom)[0]['$group']['_id'] == {champ: {'$ifNull': [f'${champ}', None]}
+                                                          for champ in champs}
+
+
+def test_deltas_coherents_avec_le_recalcul(db):
+    db['medic2'].insert_many([dict(doc) for doc in DOCS])
+    maj_insertion(db, DOCS)
+    assert verifier(db) == []
+    resumes.reconstruire(db)
+    assert verifier(db) == []
@@ -0,0 +1,48 @@
+import asyncio
+
+import service_rapports
+from service_rapports import ServiceRapports
+
+
+class Ecrivain:
+    def __init__(self):
+        self.donnees = b''
+
+    def write(self, donnees):
+        self.donnees += donnees
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Rapport:
+    pipeline = []
+
+    @staticmethod
+    def formater(resultats):
+        raise KeyError('averageStay')
+
+
+def test_erreur_de_mise_en_forme_renvoie_500(monkeypatch):
+    monkeypatch.setitem(service_rapports.RAPPORTS, 'Casse', Rapport)
+
+    async def requete():
+        service = ServiceRapports(collection=None)
+
+        async def rapport(nom):
+            return [{'_id': 'A'}]
+        service.rapport = rapport
+        lecteur = asyncio.StreamReader()
+        lecteur.feed_data(b"GET /rapports/Casse?texte HTTP/1.1\r\nHost: x\r\n\r\n")
+        lecteur.feed_eof()
+        ecrivain = Ecrivain()
+        await service.traiter_connexion(lecteur, ecrivain)
+        return service, ecrivain.donnees.decode('utf-8')
+
+    service, reponse = asyncio.run(requete())
+    assert reponse.startswith("HTTP/1.1 500 Internal Server Error")
+    assert "mise en forme : 'averageStay'" in reponse
+    assert service.stats['erreurs'] == 1
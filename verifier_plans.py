@@ -0,0 +1,176 @@
+"""
+Script : verifier_plans.py
+But : Garde-fou contre les régressions de plan des rapports de script/
+      (AgeByDesease, ByBlood, TopHospital, MedicationByCancer*,
+      DureeMoyenneSejourHopital).
+      Les pipelines sont repris tels quels du registre rapports.RAPPORTS
+      (avec leur collation) et passés à explain('executionStats') sur une
+      base jetable remplie par generer_donnees.py (graine fixe) et indexée
+      par indexes.py. Pour chaque rapport sont relevés les documents et clés
+      examinés, l'étape gagnante du plan et le temps d'exécution.
+      --enregistrer écrit ces mesures comme référence ; sinon elles sont
+      comparées à la référence et le script sort en erreur si un rapport
+      examine plus de documents ou de clés, passe en COLLSCAN, change
+      d'étape gagnante ou devient nettement plus lent.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from pymongo import MongoClient
+
+from generer_donnees import ECHELLES, GRAINE, generer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "script"))
+from indexes import (creer_indexes, etapes_plan, hint_si_present, plan_gagnant,  # noqa: E402
+                     statistiques_execution)
+from instrumentation import temps_explain  # noqa: E402
+from migration import MONGO_URI, charger, lire_par_lots  # noqa: E402
+from rapports import BASE, COLLECTION, RAPPORTS  # noqa: E402
+
+# === CONFIGURATION ===
+BASE_PLANS = 'FirstTry_plans'            # Base jetable : FirstTry n'est jamais touchée
+FICHIER_REFERENCE = os.path.join("data", "plans_reference.json")
+LIGNES = ECHELLES['100k']
+TOLERANCE_EXAMINES = 0.0   # Données identiques d'une exécution à l'autre : aucun document en plus toléré
+SEUIL_TEMPS = 0.50         # +50 % de temps d'exécution = régression...
+ECART_TEMPS_MIN = 20       # ... si l'écart dépasse aussi 20 ms (bruit de mesure)
+
+
+def preparer_base(client, lignes, graine):
+    """Remplit la base jetable avec `lignes` lignes générées et crée les index ; retourne la collection."""
+    collection = client[BASE_PLANS][COLLECTION]
+    collection.drop()
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "plans.csv")
+        generer(chemin, lignes, graine)
+        charger(collection, lire_par_lots(chemin), maj_resumes=False)
+    creer_indexes(collection)
+    return collection
+
+
+def expliquer(collection, nom):
+    """explain('executionStats') du rapport `nom` : examinés, plan gagnant, temps (ms)."""
+    module = RAPPORTS[nom]
+    commande = {'aggregate': collection.name, 'pipeline': module.pipeline, 'cursor': {}}
+    if getattr(module, 'collation', None):
+        commande['collation'] = module.collation.document
+    commande.update(hint_si_present(collection, getattr(module, 'index', None)))
+    explication = collection.database.command('explain', commande, verbosity='executionStats')
+    stats = statistiques_execution(explication)
+    etapes = etapes_plan(plan_gagnant(explication))
+    return {
+        'docs_examines': stats.get('totalDocsExamined', 0),
+        'cles_examinees': stats.get('totalKeysExamined', 0),
+        'etape_gagnante': etapes[0] if etapes else None,
+        'etapes': etapes,
+        'temps_ms': temps_explain(explication),
+    }
+
+
+def mesurer(collection, noms=None, repetitions=3):
+    """Mesures de chaque rapport ; le temps retenu est le meilleur de `repetitions` explain."""
+    mesures = {}
+    for nom in noms or RAPPORTS:
+        essais = [expliquer(collection, nom) for _ in range(repetitions)]
+        mesures[nom] = {**essais[-1], 'temps_ms': min(e['temps_ms'] for e in essais)}
+    return mesures
+
+
+def comparer(mesures, reference, tolerance=TOLERANCE_EXAMINES, seuil_temps=SEUIL_TEMPS):
+    """Régressions par rapport à la référence : [(rapport, motif)]."""
+    regressions = []
+    for nom, m in mesures.items():
+        avant = reference.get(nom)
+        if avant is None:
+            regressions.append((nom, "absent de la référence (relancer avec --enregistrer)"))
+            continue
+        for champ in ('docs_examines', 'cles_examinees'):
+            if m[champ] > avant[champ] * (1 + tolerance):
+                regressions.append((nom, f"{champ} : {avant[champ]} → {m[champ]}"))
+        if 'COLLSCAN' in m['etapes'] and 'COLLSCAN' not in avant['etapes']:
+            regressions.append((nom, f"passage en COLLSCAN : {' → '.join(m['etapes'])}"))
+        elif m['etape_gagnante'] != avant['etape_gagnante']:
+            regressions.append((nom, f"étape gagnante : {avant['etape_gagnante']} → {m['etape_gagnante']}"))
+        if (m['temps_ms'] > avant['temps_ms'] * (1 + seuil_temps)
+                and m['temps_ms'] - avant['temps_ms'] >= ECART_TEMPS_MIN):
+            regressions.append((nom, f"temps : {avant['temps_ms']} ms → {m['temps_ms']} ms"))
+    return regressions
+
+
+def _echelle(valeur):
+    return ECHELLES.get(valeur) or int(valeur)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification des plans d'exécution des rapports.")
+    parser.add_argument("rapports", nargs="*", metavar="RAPPORT",
+                        help=f"Rapports à vérifier parmi {', '.join(RAPPORTS)} (tous par défaut)")
+    parser.add_argument("--uri", default=MONGO_URI)
+    parser.add_argument("--lignes", type=_echelle, default=LIGNES,
+                        help=f"Taille de la base générée ({', '.join(ECHELLES)} ou un nombre)")
+    parser.add_argument("--graine", type=int, default=GRAINE)
+    parser.add_argument("--existante", action="store_true",
+                        help=f"Expliquer sur {BASE}.{COLLECTION} au lieu d'une base générée")
+    parser.add_argument("--reference", default=FICHIER_REFERENCE, help="Fichier JSON de référence")
+    parser.add_argument("--enregistrer", action="store_true", help="Écrire les mesures comme nouvelle référence")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_EXAMINES,
+                        help="Hausse tolérée des documents / clés examinés (0.1 = +10 %%)")
+    parser.add_argument("--seuil-temps", type=float, default=SEUIL_TEMPS,
+                        help="Hausse tolérée du temps d'exécution (0.5 = +50 %%)")
+    args = parser.parse_args()
+    inconnus = [nom for nom in args.rapports if nom not in RAPPORTS]
+    if inconnus:
+        parser.error(f"rapport(s) inconnu(s) : {', '.join(inconnus)}")
+
+    client = MongoClient(args.uri)
+    if args.existante:
+        collection, jeu = client[BASE][COLLECTION], {'base': f"{BASE}.{COLLECTION}"}
+    else:
+        print(f"🌱 Base {BASE_PLANS} : {args.lignes} lignes générées (graine {args.graine})")
+        collection = preparer_base(client, args.lignes, args.graine)
+        jeu = {'lignes': args.lignes, 'graine': args.graine}
+    try:
+        mesures = mesurer(collection, args.rapports, args.repetitions)
+    finally:
+        if not args.existante:
+            client.drop_database(BASE_PLANS)
+
+    print("\n🔬 Plans des rapports (explain executionStats) :")
+    print("{:<32}{:>14}{:>14}{:>22}{:>12}".format("Rapport", "Docs exam.", "Clés exam.", "Étape gagnante",
+                                                  "Temps (ms)"))
+    print("-" * 94)
+    for nom, m in mesures.items():
+        print("{:<32}{:>14}{:>14}{:>22}{:>12}".format(nom, m['docs_examines'], m['cles_examinees'],
+                                                      m['etape_gagnante'] or '-', m['temps_ms']))
+
+    if args.enregistrer:
+        os.makedirs(os.path.dirname(args.reference) or ".", exist_ok=True)
+        with open(args.reference, "w", encoding="utf-8") as f:
+            json.dump({'jeu': jeu, 'rapports': mesures}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Référence enregistrée : {args.reference}")
+        return
+
+    if not os.path.exists(args.reference):
+        print(f"\n❌ Référence introuvable : {args.reference} (créer avec --enregistrer)")
+        sys.exit(1)
+    with open(args.reference, encoding="utf-8") as f:
+        reference = json.load(f)
+    if reference.get('jeu') != jeu:
+        print(f"\n❌ Référence mesurée sur {reference.get('jeu')}, exécution sur {jeu}")
+        sys.exit(1)
+    regressions = comparer(mesures, reference['rapports'], args.tolerance, args.seuil_temps)
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s) de plan :")
+        for nom, motif in regressions:
+            print(f"   → {nom} : {motif}")
+        sys.exit(1)
+    print(f"\n✅ Aucune régression par rapport à {args.reference}")
+
+
+if __name__ == "__main__":
+    main()